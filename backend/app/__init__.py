@@ -1,12 +1,30 @@
 import os
+import click
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from dotenv import load_dotenv
-from .config import db, migrate
+from .config import db
+from .database import engine_options, init_database, pool_status, check_database
+from .replicas import replica_binds, init_replicas, monitor as replica_monitor
+from utils.cache import init_cache
+from .json_provider import init_json_provider
+from middleware.instrumentation import init_instrumentation
+from utils.log import init_logging
 
 load_dotenv()
 
+
+def init_migrations(app):
+    """
+    Flask-Migrate pulls in all of Alembic (~0.1s of imports), and only the
+    `flask db ...` commands use it - so web workers and scripts skip it.
+    """
+    if os.environ.get('FLASK_RUN_FROM_CLI') == 'true' or os.environ.get('ENABLE_MIGRATIONS'):
+        from flask_migrate import Migrate
+        Migrate(app, db)
+
+
 def create_app():
     app = Flask(__name__)
     
@@ -43,14 +61,27 @@ def create_app():
 
     app.config['SQLALCHEMY_DATABASE_URI'] = uri
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Pool sizing, recycle, pre-ping and statement timeout from DB_* env vars (see app/database.py)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri)
+    # Optional read replicas (DATABASE_REPLICA_URLS, comma-separated) - see app/replicas.py
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(engine_options)
     
     # JWT Configuration - tokens expire after 24 hours
     app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'dev-secret-key-change-in-production')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 86400  # 24 hours
 
+    # JSON encoding - orjson when installed, JSON_PROVIDER=default forces Flask's encoder
+    app.config['JSON_PROVIDER'] = os.environ.get('JSON_PROVIDER', 'orjson')
+    init_json_provider(app)
+
     # Initialize database, migrations, and JWT
     db.init_app(app)
-    migrate.init_app(app, db)
+    init_database(app)
+    init_cache(app)
+    init_replicas(app)
+    init_migrations(app)
+    init_logging(app)
+    init_instrumentation(app)
     jwt = JWTManager(app)
 
     # JWT Error Handlers
@@ -71,17 +102,46 @@ def create_app():
     with app.app_context():
         from . import models
 
+    # Full-text search index sync + `flask reindex-search` (see utils/fulltext.py)
+    from utils.fulltext import init_fulltext
+    init_fulltext(app)
+    # Volunteer profile refresh + `flask rebuild-profiles` (see utils/recommendations.py)
+    from utils.recommendations import init_recommendations
+    init_recommendations(app)
+    # `flask provision-users` bulk onboarding (see utils/provisioning.py)
+    from utils.provisioning import init_provisioning
+    init_provisioning(app)
+
     # simple routes.
     @app.route('/', methods=['GET'])
     def index():
         return jsonify({"message": "VolaPlace API Running"})
     
-    # endpoint health check.
+    # endpoint health check - DB reachability and pool saturation.
     @app.route('/api/health', methods=['GET'])
     def health():
-        return jsonify({"status": "healthy"})
+        reachable, latency_ms, error = check_database(db.engine)
+        pool = pool_status(db.engine)
+
+        if not reachable:
+            status = "unhealthy"
+        elif pool.get('saturation', 0) >= 0.9:
+            status = "degraded"
+        else:
+            status = "healthy"
+
+        database = {"reachable": reachable, "latency_ms": latency_ms, "pool": pool}
+        if error:
+            database["error"] = error
+        replicas = replica_monitor.status(db.engines)
+        if replicas:
+            # Lag in seconds, null when the replica is unreachable
+            database["replicas"] = replicas
+        return jsonify({"status": status, "database": database}), 200 if reachable else 503
 
-    # Register API blueprints
+    # Register API blueprints - eagerly: search, payments and live together
+    # import in ~7ms (python -X importtime), their heavy dependencies
+    # (requests, the full-text hooks) are already lazy or needed at startup
     from routes.search import api_bp
     from routes.admin import admin_bp
     from routes.auth import bp as auth_bp
@@ -91,6 +151,7 @@ def create_app():
     from routes.shifts import bp as shifts_bp
     from routes.attendance import bp as attendance_bp
     from routes.payments import bp as payments_bp
+    from routes.live import bp as live_bp
     
     app.register_blueprint(api_bp)
     app.register_blueprint(admin_bp, url_prefix='/api/admin')  # Admin routes under /api/admin
@@ -101,12 +162,23 @@ def create_app():
     app.register_blueprint(shifts_bp, url_prefix='/api/shifts')
     app.register_blueprint(attendance_bp, url_prefix='/api/attendance')
     app.register_blueprint(payments_bp, url_prefix='/api/payments')
+    app.register_blueprint(live_bp, url_prefix='/api/live')
 
-    # CLI seed command (flask seed)
+    # CLI seed command (flask seed) - reuses this app instead of building a second one
     @app.cli.command("seed")
-    def run_seed():
-        from seed import seed_database
-        seed_database()
+    @click.option('--scale', help='Generate a synthetic dataset instead, e.g. orgs:1000,projects:20k,shifts:2M,roster:10M')
+    @click.option('--random-seed', default=42, show_default=True, help='Seed for the synthetic data generator')
+    @click.option('--batch-size', default=5000, show_default=True, help='Rows per bulk insert batch')
+    def run_seed(scale, random_seed, batch_size):
+        from seed import seed_database, seed_at_scale, parse_scale
+        if not scale:
+            seed_database(app)
+            return
+        try:
+            counts = parse_scale(scale)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--scale')
+        seed_at_scale(app, counts, random_seed=random_seed, batch_size=batch_size)
 
     return app
 
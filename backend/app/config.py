@@ -1,6 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from .replicas import RoutingSession
 
-db = SQLAlchemy()
-migrate = Migrate()
+# RoutingSession sends reads to replicas when DATABASE_REPLICA_URLS is set
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
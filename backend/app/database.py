@@ -0,0 +1,143 @@
+"""
+Database engine configuration for VolaPlace.
+Pool sizing, recycling, pre-ping and statement timeouts come from the
+environment so they can be matched to the gunicorn worker count (every
+worker has its own pool: total connections = workers * (size + overflow)).
+
+DB_PGBOUNCER=true switches to a PgBouncer-friendly mode: no client-side
+pool (PgBouncer does the pooling) and the statement timeout is applied per
+transaction with SET LOCAL, since PgBouncer drops startup parameters.
+"""
+import os
+import time
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from app.config import db
+from utils.metrics import registry
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def pgbouncer_mode():
+    return _env_bool('DB_PGBOUNCER', False)
+
+
+def statement_timeout_ms():
+    return _env_int('DB_STATEMENT_TIMEOUT_MS', 0)
+
+
+def engine_options(uri):
+    """Build SQLALCHEMY_ENGINE_OPTIONS for `uri` from the DB_* environment variables"""
+    if uri.startswith('sqlite'):
+        # SQLite has no server and picks its own pool class
+        return {}
+
+    options = {'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True)}
+
+    if pgbouncer_mode():
+        options['poolclass'] = NullPool
+        return options
+
+    options.update(
+        pool_size=_env_int('DB_POOL_SIZE', 5),
+        max_overflow=_env_int('DB_MAX_OVERFLOW', 10),
+        pool_timeout=_env_int('DB_POOL_TIMEOUT', 30),
+        # Recycle before server/load-balancer idle timeouts close the socket
+        pool_recycle=_env_int('DB_POOL_RECYCLE', 1800)
+    )
+
+    timeout = statement_timeout_ms()
+    if timeout and uri.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={timeout}'}
+    return options
+
+
+def _set_local_statement_timeout(session, transaction, connection):
+    # PgBouncer mode: startup options are ignored, so set the timeout per transaction
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql(f'SET LOCAL statement_timeout = {statement_timeout_ms()}')
+
+
+# Pool metrics
+CONNECTIONS_OPENED = registry.counter(
+    'volaplace_db_connections_opened_total', 'New DB connections opened by the pool')
+CONNECTIONS_INVALIDATED = registry.counter(
+    'volaplace_db_connections_invalidated_total', 'Pooled connections discarded as broken (e.g. after a failover)')
+
+# Engine of the most recently created app, read by the pool gauges at scrape time
+_engine = None
+
+
+def _pool_gauge(key):
+    return lambda: pool_status(_engine).get(key, 0) if _engine is not None else 0
+
+
+registry.gauge('volaplace_db_pool_size', 'Configured pool size', callback=_pool_gauge('size'))
+registry.gauge('volaplace_db_pool_checked_out', 'Connections currently in use', callback=_pool_gauge('checked_out'))
+registry.gauge('volaplace_db_pool_overflow', 'Overflow connections open', callback=_pool_gauge('overflow'))
+registry.gauge('volaplace_db_pool_saturation', 'Checked-out connections / capacity', callback=_pool_gauge('saturation'))
+
+
+def pool_status(engine):
+    """Current pool usage; saturation is checked-out connections over the pool's capacity"""
+    pool = engine.pool
+    if not hasattr(pool, 'checkedout'):
+        return {'pool': type(pool).__name__}
+
+    size = pool.size()
+    checked_out = pool.checkedout()
+    capacity = size + max(pool._max_overflow, 0)
+    return {
+        'pool': type(pool).__name__,
+        'size': size,
+        'checked_out': checked_out,
+        'checked_in': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        'capacity': capacity,
+        'saturation': round(checked_out / capacity, 3) if capacity else 0.0
+    }
+
+
+def check_database(engine):
+    """Run SELECT 1 - returns (reachable, latency_ms, error)"""
+    started = time.perf_counter()
+    try:
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+        return True, round((time.perf_counter() - started) * 1000, 1), None
+    except Exception as e:
+        return False, round((time.perf_counter() - started) * 1000, 1), str(e).splitlines()[0]
+
+
+def init_database(app):
+    """Attach pool metrics and, in PgBouncer mode, the per-transaction timeout"""
+    global _engine
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        CONNECTIONS_OPENED.inc()
+
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        CONNECTIONS_INVALIDATED.inc()
+
+    _engine = engine
+
+    if pgbouncer_mode() and statement_timeout_ms() and not event.contains(Session, 'after_begin', _set_local_statement_timeout):
+        event.listen(Session, 'after_begin', _set_local_statement_timeout)
+
+    app.extensions['db_engine'] = engine
+    return engine
@@ -0,0 +1,40 @@
+"""
+orjson-backed JSON provider for Flask.
+Used automatically when orjson is installed. Keys are sorted and dates go
+through Flask's default(), so ASCII-only responses are byte-for-byte what
+Flask's default provider produces. The one intended difference: non-ASCII
+text is sent as raw UTF-8 ("Nyeri Café") rather than ASCII escapes
+("Nyeri Caf\\u00e9"), which decodes to the same value but changes those
+responses' bytes - and so their ETags - when switching providers.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    # Dates/datetimes go through Flask's default() so the format is unchanged
+    option = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.option
+        if self._app.debug:
+            option |= orjson.OPT_INDENT_2
+        body = orjson.dumps(obj, default=self.default, option=option) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def init_json_provider(app):
+    """Switch the app to orjson unless it's missing or JSON_PROVIDER=default"""
+    if orjson is not None and app.config.get('JSON_PROVIDER', 'orjson') != 'default':
+        app.json = OrjsonProvider(app)
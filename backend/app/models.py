@@ -1,10 +1,11 @@
-from sqlalchemy_serializer import SerializerMixin
 from datetime import datetime
+from sqlalchemy.orm import validates
 from werkzeug.security import generate_password_hash, check_password_hash
 from .config import db
+from utils.validators import normalize_email
 
 # user table.
-class User(db.Model, SerializerMixin):
+class User(db.Model):
     __tablename__ = 'users'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -22,16 +23,19 @@ class User(db.Model, SerializerMixin):
     organization = db.relationship('Organization', back_populates='user', uselist=False, cascade="all, delete-orphan")
     volunteer_shifts = db.relationship('ShiftRoster', back_populates='volunteer', cascade="all, delete-orphan")
     transactions = db.relationship('TransactionLog', back_populates='volunteer', cascade="all, delete-orphan")
+    waitlist_entries = db.relationship('ShiftWaitlist', back_populates='volunteer', cascade="all, delete-orphan")
     
     # track who updated the rules (no cascade delete here to prevent deleting rules accidentally)
     rules_updated = db.relationship('GlobalRules', back_populates='admin')
 
-    serialize_rules = (
-        '-password_hash', 
-        '-organization', 
-        '-volunteer_shifts', 
-        '-transactions'
-    )
+    @validates('email')
+    def _normalize_email(self, key, email):
+        return normalize_email(email)
+
+    @classmethod
+    def by_email(cls, email):
+        """Case-insensitive lookup - a single probe of uq_users_email_lower"""
+        return cls.query.filter(db.func.lower(cls.email) == normalize_email(email)).first()
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -51,9 +55,12 @@ class User(db.Model, SerializerMixin):
             "profile_complete": self.profile_completed,
             "created_at": self.created_at
         }
+
+# one account per email whatever its case - login and duplicate checks filter on lower(email)
+db.Index('uq_users_email_lower', db.func.lower(User.email), unique=True)
     
 # orgnization table.
-class Organization(db.Model, SerializerMixin):
+class Organization(db.Model):
     __tablename__ = 'organizations'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -65,11 +72,13 @@ class Organization(db.Model, SerializerMixin):
     user = db.relationship('User', back_populates='organization')
     projects = db.relationship('Project', back_populates='organization', cascade='all, delete-orphan')
 
-    serialize_rules = ('-user', '-projects.organization')
-
 # project table.
-class Project(db.Model, SerializerMixin):
+class Project(db.Model):
     __tablename__ = 'projects'
+    __table_args__ = (
+        # bounding-box prefilter for distance search
+        db.Index('ix_projects_lat_lon', 'lat', 'lon'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     org_id = db.Column(db.Integer, db.ForeignKey('organizations.id', ondelete='CASCADE'), nullable=False)
@@ -78,17 +87,22 @@ class Project(db.Model, SerializerMixin):
     lat = db.Column(db.Float, nullable=False)
     lon = db.Column(db.Float, nullable=False)
     geofence_radius = db.Column(db.Integer, default=20) # in meters
+    geofence_polygon = db.Column(db.Text) # encoded polyline (utils/polygon.py), falls back to radius when empty
     address = db.Column(db.String(200))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     organization = db.relationship('Organization', back_populates='projects')
     shifts = db.relationship('Shift', back_populates='project', cascade='all, delete-orphan')
 
-    serialize_rules = ('-organization', '-shifts.project')
-
 # shift table
-class Shift(db.Model, SerializerMixin): 
+class Shift(db.Model): 
     __tablename__ = 'shifts'
+    __table_args__ = (
+        # time-window search: date range first, then time of day
+        db.Index('ix_shifts_date_start_time', 'date', 'start_time'),
+        # shifts of one project (distance search, org shift lists) by date
+        db.Index('ix_shifts_project_id_date', 'project_id', 'date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
@@ -98,6 +112,8 @@ class Shift(db.Model, SerializerMixin):
     start_time = db.Column(db.Time, nullable=False)
     end_time = db.Column(db.Time, nullable=False)
     max_volunteers = db.Column(db.Integer)
+    # max_volunteers minus active roster rows, maintained by utils/seats.py (NULL = no limit)
+    open_seats = db.Column(db.Integer, default=lambda context: context.get_current_parameters().get('max_volunteers'))
     status = db.Column(db.String(20), default='pending') # pending, active, completed
     
     # Funding fields for pre-funded wallet model
@@ -107,8 +123,7 @@ class Shift(db.Model, SerializerMixin):
 
     project = db.relationship('Project', back_populates='shifts')
     roster = db.relationship('ShiftRoster', back_populates='shift', cascade='all, delete-orphan')
-
-    serialize_rules = ('-project.organization', '-project.shifts', '-roster')
+    waitlist = db.relationship('ShiftWaitlist', back_populates='shift', cascade='all, delete-orphan', order_by='ShiftWaitlist.id')
 
     def to_dict(self):
         return {
@@ -134,8 +149,14 @@ class Shift(db.Model, SerializerMixin):
         }
 
 # shift roaster table.
-class ShiftRoster(db.Model, SerializerMixin):
+class ShiftRoster(db.Model):
     __tablename__ = 'shifts_roster'
+    __table_args__ = (
+        # roster of a shift / one volunteer's entry on it
+        db.Index('ix_shifts_roster_shift_id_volunteer_id', 'shift_id', 'volunteer_id'),
+        # one volunteer's shifts (conflict checks, profiles)
+        db.Index('ix_shifts_roster_volunteer_id', 'volunteer_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     shift_id = db.Column(db.Integer, db.ForeignKey('shifts.id', ondelete='CASCADE'), nullable=False)
@@ -143,7 +164,7 @@ class ShiftRoster(db.Model, SerializerMixin):
     check_in_time = db.Column(db.DateTime)
     check_out_time = db.Column(db.DateTime)
     beneficiaries_served = db.Column(db.Integer, default=0)
-    status = db.Column(db.String(20), default='scheduled') # scheduled, checked_in, completed, cancelled
+    status = db.Column(db.String(20), default='registered') # registered, checked_in, completed, cancelled
     
     # Payment tracking
     payout_amount = db.Column(db.Float, default=0.0)
@@ -156,10 +177,72 @@ class ShiftRoster(db.Model, SerializerMixin):
     # connect roster to the payment log
     payment_record = db.relationship('TransactionLog', back_populates='shift_roster', uselist=False)
 
-    serialize_rules = ('-shift', '-volunteer')
+# volunteers waiting for a place on a full shift - promoted in id (join) order by utils/waitlist.py
+class ShiftWaitlist(db.Model):
+    __tablename__ = 'shift_waitlist'
+    __table_args__ = (
+        # one place in the queue per volunteer; also the shift's queue lookup
+        db.UniqueConstraint('shift_id', 'volunteer_id', name='uq_shift_waitlist_shift_volunteer'),
+        db.Index('ix_shift_waitlist_volunteer_id', 'volunteer_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    shift_id = db.Column(db.Integer, db.ForeignKey('shifts.id', ondelete='CASCADE'), nullable=False)
+    volunteer_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    shift = db.relationship('Shift', back_populates='waitlist')
+    volunteer = db.relationship('User', back_populates='waitlist_entries')
+
+# offline attendance events synced in batches - keyed by the client's event id so retries are idempotent
+class AttendanceSyncEvent(db.Model):
+    __tablename__ = 'attendance_sync_events'
+    __table_args__ = (
+        db.UniqueConstraint('volunteer_id', 'client_event_id', name='uq_sync_events_volunteer_client_event'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    volunteer_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    client_event_id = db.Column(db.String(64), nullable=False)
+    shift_id = db.Column(db.Integer, db.ForeignKey('shifts.id', ondelete='CASCADE'))
+    event_type = db.Column(db.String(20), nullable=False) # check_in, check_out
+    event_time = db.Column(db.DateTime)
+    status = db.Column(db.String(20), nullable=False) # applied, rejected
+    error = db.Column(db.String(200))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# full-text search documents - one per shift, project and organization (indexed and kept in sync by utils/fulltext.py)
+class SearchDocument(db.Model):
+    __tablename__ = 'search_documents'
+    __table_args__ = (
+        db.UniqueConstraint('entity_type', 'entity_id', name='uq_search_documents_entity'),
+        db.Index('ix_search_documents_project_id', 'project_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity_type = db.Column(db.String(20), nullable=False) # shift, project, organization
+    entity_id = db.Column(db.Integer, nullable=False)
+    project_id = db.Column(db.Integer) # location for geo filtering (NULL for organizations)
+    title = db.Column(db.Text) # weighted highest
+    context = db.Column(db.Text) # project/organization names and address
+    body = db.Column(db.Text) # descriptions
+
+# recommendation features per volunteer with attendance history (recomputed by utils/recommendations.py)
+class VolunteerProfile(db.Model):
+    __tablename__ = 'volunteer_profiles'
+
+    volunteer_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    shifts_attended = db.Column(db.Integer, nullable=False, default=0)
+    home_lat = db.Column(db.Float) # centroid of the attended project sites
+    home_lon = db.Column(db.Float)
+    start_minutes_mean = db.Column(db.Float) # usual start time, minutes after midnight
+    start_minutes_std = db.Column(db.Float)
+    top_projects = db.Column(db.JSON) # [[project_id, times attended], ...] most attended first
+    top_organizations = db.Column(db.JSON) # [[org_id, times attended], ...]
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 # rules table
-class GlobalRules(db.Model, SerializerMixin):
+class GlobalRules(db.Model):
     __tablename__ = 'global_rules'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -170,7 +253,7 @@ class GlobalRules(db.Model, SerializerMixin):
     admin = db.relationship('User', back_populates='rules_updated')
 
 # transaction logs - ready for payment.
-class TransactionLog(db.Model, SerializerMixin):
+class TransactionLog(db.Model):
     __tablename__ = 'transaction_log'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -183,5 +266,4 @@ class TransactionLog(db.Model, SerializerMixin):
     volunteer = db.relationship('User', back_populates='transactions')
     shift_roster = db.relationship('ShiftRoster', back_populates='payment_record')
 
-    serialize_rules = ('-volunteer', '-shift_roster')
 
@@ -0,0 +1,209 @@
+"""
+Read-replica routing for VolaPlace.
+When DATABASE_REPLICA_URLS is set, SELECTs issued while serving GET/HEAD
+requests go to a replica; everything else uses the primary. The primary is
+used instead when:
+  - the session has already written in this request (its later reads stay
+    on the primary, inside the same transaction)
+  - the user made a write in the last REPLICA_READ_YOUR_WRITES_SECONDS, so
+    they always see their own changes
+  - the query locks rows (SELECT ... FOR UPDATE)
+  - every replica lags more than REPLICA_MAX_LAG_SECONDS or is unreachable
+  - the view is decorated with @primary_only
+
+The read-your-writes marker lives in the shared cache (utils/cache.py), so
+routing needs CACHE_URL=redis://...: with the in-process fallback each
+worker would only see its own markers and a user's next read could land on
+a worker that sends it to a stale replica. Without a shared cache replica
+routing stays off (a warning is logged) and every read uses the primary.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from flask import g, request, has_request_context
+from flask_jwt_extended import decode_token, get_jwt_identity
+from flask_sqlalchemy.session import Session as BaseSession
+from sqlalchemy import event, text
+from sqlalchemy.sql import Select, TextClause
+from sqlalchemy.sql.dml import UpdateBase
+from utils.cache import cache, MemoryCache, MISS
+from utils.metrics import registry
+
+logger = logging.getLogger('volaplace.db')
+
+REPLICA_PREFIX = 'replica_'
+LAG_CHECK_SECONDS = 5
+
+ROUTED_READS = registry.counter(
+    'volaplace_db_routed_reads_total', 'Replica-eligible reads by where they ran', ['target'])
+
+# Postgres standby lag; 0 when the replica has replayed everything it received
+LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def replica_urls():
+    return [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+
+
+def replica_binds(engine_options):
+    """SQLALCHEMY_BINDS entries (replica_0, replica_1, ...) for the configured replica URLs"""
+    binds = {}
+    for i, url in enumerate(replica_urls()):
+        if url.startswith('postgres://'):
+            url = url.replace('postgres://', 'postgresql://', 1)
+        binds[f'{REPLICA_PREFIX}{i}'] = {'url': url, **engine_options(url)}
+    return binds
+
+
+class ReplicaMonitor:
+    """Caches each replica's lag for a few seconds so routing doesn't query it every time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lag = {}  # bind key -> (checked_at, lag seconds or None if unreachable)
+
+    def lag(self, key, engine):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._lag.get(key)
+            if entry is not None and now - entry[0] < LAG_CHECK_SECONDS:
+                return entry[1]
+            # Claim the check so concurrent requests keep using the old value
+            self._lag[key] = (now, entry[1] if entry else 0.0)
+
+        try:
+            with engine.connect() as conn:
+                value = float(conn.execute(LAG_SQL).scalar() or 0) if engine.dialect.name == 'postgresql' else 0.0
+        except Exception:
+            value = None
+
+        with self._lock:
+            self._lag[key] = (time.monotonic(), value)
+        return value
+
+    def status(self, engines):
+        return {
+            key: self.lag(key, engine)
+            for key, engine in engines.items() if isinstance(key, str) and key.startswith(REPLICA_PREFIX)
+        }
+
+
+monitor = ReplicaMonitor()
+
+
+def _max_lag():
+    return float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 5))
+
+
+def _ryw_seconds():
+    return int(os.environ.get('REPLICA_READ_YOUR_WRITES_SECONDS', 10))
+
+
+def choose_replica(engines):
+    """A random replica within the lag limit, or None to use the primary"""
+    max_lag = _max_lag()
+    healthy = []
+    for key, lag in monitor.status(engines).items():
+        if lag is not None and lag <= max_lag:
+            healthy.append(engines[key])
+    return random.choice(healthy) if healthy else None
+
+
+def _is_read(clause):
+    if isinstance(clause, Select):
+        return clause._for_update_arg is None
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().lower().startswith(('select', 'with'))
+    return False
+
+
+class RoutingSession(BaseSession):
+    """Flask-SQLAlchemy session that sends eligible reads to a replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and clause is not None:
+            if isinstance(clause, UpdateBase):
+                self.info['db_wrote'] = True
+            elif (
+                has_request_context() and g.get('db_read_replica')
+                and not self.info.get('db_wrote') and not self._flushing and _is_read(clause)
+            ):
+                replica = choose_replica(self._db.engines)
+                ROUTED_READS.inc(target='replica' if replica is not None else 'primary_fallback')
+                if replica is not None:
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _mark_flush_write(session, flush_context, instances):
+    if session.new or session.dirty or session.deleted:
+        session.info['db_wrote'] = True
+
+
+def _ryw_key(user_id):
+    return f'replica:recent_write:{user_id}'
+
+
+def _current_user_id():
+    # Only set once @jwt_required() has verified a token for this request
+    try:
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_user_write(session):
+    if session.info.get('db_wrote') and has_request_context():
+        user_id = _current_user_id()
+        if user_id is not None:
+            cache.set(_ryw_key(user_id), True, _ryw_seconds())
+
+
+def primary_only(fn):
+    """Keep a GET view on the primary (e.g. right after an external callback updates data)"""
+    fn._primary_only = True
+    return fn
+
+
+def init_replicas(app):
+    """Decide per request whether reads may go to a replica (call after init_cache)"""
+    if not any(key.startswith(REPLICA_PREFIX) for key in app.config.get('SQLALCHEMY_BINDS', {}) or {}):
+        return app
+    if isinstance(cache.backend, MemoryCache):
+        # Read-your-writes markers would be per worker - see the module docstring
+        logger.warning('DATABASE_REPLICA_URLS is set but CACHE_URL is not a shared cache - '
+                       'reads stay on the primary')
+        return app
+
+    @app.before_request
+    def route_reads():
+        g.db_read_replica = False
+        if request.method not in ('GET', 'HEAD'):
+            return
+        view = app.view_functions.get(request.endpoint)
+        if view is None or getattr(view, '_primary_only', False):
+            return
+
+        # Read-your-writes: users who just wrote read from the primary
+        auth = request.headers.get('Authorization', '')
+        if auth.startswith('Bearer '):
+            try:
+                user_id = decode_token(auth[7:])['sub']
+            except Exception:
+                user_id = None
+            if user_id is not None and cache.get(_ryw_key(user_id)) is not MISS:
+                return
+
+        g.db_read_replica = True
+
+    return app
@@ -0,0 +1,393 @@
+"""
+API benchmark suite for the hot paths.
+
+Runs each scenario through the Flask test client against a generated
+dataset (seed.seed_at_scale) and records latency percentiles and the number
+of SQL statements per request (utils.query_counter). Response caches are
+cleared before every request so the database path is what gets measured
+(--warm-cache keeps them).
+
+Scenarios:
+    search             GET  /api/shifts?lat=..&log=..     (public search)
+    shift_list         GET  shifts.get_shifts              (org admin)
+    shift_list_volunteer GET shifts.get_shifts             (volunteer, with their roster rows)
+    text_search        GET  /api/search?q=..               (full-text, public)
+    recommended        GET  /api/shifts/recommended        (volunteer)
+    register           POST /api/shifts/<id>/register
+    checkin            POST /api/shifts/<id>/checkin
+    checkout           POST /api/shifts/<id>/checkout
+    checkout_payout    POST /api/payments/checkout-complete
+    approve_payment    POST /api/admin/approve-payment/<roster_id>
+    pending_payments   GET  /api/admin/pending-payments
+    dashboard_stats    GET  /api/admin/dashboard-stats
+
+register/checkin/checkout/checkout_payout use fresh benchmark volunteers
+created for the run; approve_payment consumes pending payouts from the
+dataset, so regenerate (--scale) now and then for comparable numbers.
+
+Usage (from backend/):
+    # SQLite - the dataset is generated on the first run and reused afterwards
+    python benchmarks/bench_api.py --scale orgs:100,projects:2k,shifts:100k,roster:500k
+    python benchmarks/bench_api.py --iterations 100 --compare latest
+
+    # Local Postgres
+    DATABASE_URL=postgresql://localhost/volaplace_bench python benchmarks/bench_api.py --scale shifts:2M,roster:10M
+
+Results are written to benchmarks/results/<dialect>-<timestamp>.json.
+--compare <file|latest> flags scenarios whose p95 grew by more than
+--max-regression (default 20%) or that now run more queries, and exits 1.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(BACKEND_DIR, 'benchmarks', 'bench.db')}"
+sys.path.insert(0, BACKEND_DIR)
+
+SCENARIOS = (
+    'search', 'shift_list', 'shift_list_volunteer', 'text_search', 'recommended', 'register', 'checkin', 'checkout',
+    'checkout_payout', 'approve_payment', 'pending_payments', 'dashboard_stats'
+)
+PERCENTILES = (50, 90, 95, 99)
+TEXT_QUERIES = ('tree', 'beach+clean', 'food+nairobi', 'blood', 'teach', 'mombasa')
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies_ms, queries, errors):
+    latencies_ms = sorted(latencies_ms)
+    result = {'requests': len(latencies_ms), 'errors': errors}
+    if latencies_ms:
+        result.update({f'p{pct}_ms': round(percentile(latencies_ms, pct), 2) for pct in PERCENTILES})
+        result.update(
+            mean_ms=round(statistics.fmean(latencies_ms), 2),
+            min_ms=round(latencies_ms[0], 2),
+            max_ms=round(latencies_ms[-1], 2),
+            queries_median=statistics.median(queries),
+            queries_max=max(queries)
+        )
+    return result
+
+
+class Bench:
+    def __init__(self, app, iterations, warmup, warm_cache):
+        from app.config import db
+        from utils.cache import cache
+        self.app = app
+        self.db = db
+        self.cache = cache
+        self.iterations = iterations
+        self.warmup = warmup
+        self.warm_cache = warm_cache
+        self.client = app.test_client()
+
+    def token(self, user_id, role):
+        from flask_jwt_extended import create_access_token
+        with self.app.app_context():
+            return create_access_token(identity=str(user_id), additional_claims={'role': role})
+
+    def _call(self, method, path, token=None, json_body=None, endpoint=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        if endpoint is None:
+            return self.client.open(path, method=method, headers=headers, json=json_body).status_code
+        # Views whose URL is shadowed by another blueprint (GET /api/shifts) are dispatched directly
+        with self.app.test_request_context(path, method=method, headers=headers, json=json_body):
+            response = self.app.preprocess_request()
+            if response is None:
+                response = self.app.make_response(self.app.view_functions[endpoint]())
+            response = self.app.process_response(self.app.make_response(response))
+            return response.status_code
+
+    def run(self, requests):
+        """requests: iterable of (method, path, token, json_body, endpoint) - one per iteration"""
+        from utils.query_counter import count_queries
+        latencies, queries, errors = [], [], 0
+        for i, (method, path, token, body, endpoint) in enumerate(requests):
+            if not self.warm_cache:
+                self.cache.clear()
+            with self.app.app_context():
+                engine = self.db.engine
+            with count_queries(engine) as counter:
+                started = time.perf_counter()
+                status = self._call(method, path, token, body, endpoint)
+                elapsed = (time.perf_counter() - started) * 1000
+            if i < self.warmup:
+                continue
+            latencies.append(elapsed)
+            queries.append(counter.count)
+            if status >= 400:
+                errors += 1
+        return summarize(latencies, queries, errors)
+
+
+def dataset_counts(db):
+    from sqlalchemy import text
+    counts = {}
+    for table in ('organizations', 'projects', 'shifts', 'shifts_roster', 'transaction_log', 'users'):
+        counts[table] = db.session.execute(text(f'SELECT COUNT(*) FROM {table}')).scalar()
+    return counts
+
+
+def prepare_dataset(app, scale, random_seed):
+    from sqlalchemy import inspect
+    from app.config import db
+    from seed import seed_at_scale, parse_scale, DEFAULT_SCALE
+    with app.app_context():
+        has_schema = inspect(db.engine).has_table('shifts')
+        if not has_schema:
+            db.create_all()
+        has_data = has_schema and db.session.execute(db.select(db.func.count()).select_from(db.metadata.tables['shifts'])).scalar()
+    if scale or not has_data:
+        counts = parse_scale(scale) if scale else dict(DEFAULT_SCALE, volunteers=max(DEFAULT_SCALE['roster'] // 50, 100))
+        seed_at_scale(app, counts, random_seed=random_seed)
+
+
+def create_bench_volunteers(app, count):
+    """Volunteers with no history, so registration never hits conflict or daily limits"""
+    from werkzeug.security import generate_password_hash
+    from app.config import db
+    from app.models import User
+    stamp = int(time.time())
+    password_hash = generate_password_hash('bench')
+    with app.app_context():
+        base = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+        users = [
+            User(name=f'Bench Volunteer {i}', email=f'bench{stamp}-{i}@volaplace.com', role='volunteer',
+                 phone=f'25479{(base + i) % 10_000_000:07d}', mpesa_phone=f'25479{(base + i) % 10_000_000:07d}',
+                 password_hash=password_hash, profile_completed=True)
+            for i in range(count)
+        ]
+        db.session.add_all(users)
+        db.session.commit()
+        return [u.id for u in users]
+
+
+def open_shifts(app, count, exclude=()):
+    """Upcoming funded shifts with free places, on distinct dates-times so nobody conflicts"""
+    from app.config import db
+    from app.models import Shift, ShiftRoster
+    with app.app_context():
+        signed_up = db.session.query(ShiftRoster.shift_id, db.func.count().label('n'))\
+            .group_by(ShiftRoster.shift_id).subquery()
+        rows = db.session.query(Shift.id)\
+            .outerjoin(signed_up, signed_up.c.shift_id == Shift.id)\
+            .filter(Shift.status == 'upcoming', Shift.is_funded == True, Shift.funded_amount > 0,
+                    db.func.coalesce(signed_up.c.n, 0) < Shift.max_volunteers, Shift.id.notin_(exclude or [0]))\
+            .order_by(Shift.id).limit(count).all()
+        return [r.id for r in rows]
+
+
+def checked_in_rosters(app, volunteer_ids, shift_ids):
+    """Give each volunteer a checked-in roster row an hour old (setup for checkout_payout)"""
+    from app.config import db
+    from app.models import ShiftRoster
+    with app.app_context():
+        check_in = datetime.utcnow() - timedelta(hours=1)
+        db.session.add_all([
+            ShiftRoster(shift_id=shift_id, volunteer_id=volunteer_id, status='checked_in', check_in_time=check_in)
+            for volunteer_id, shift_id in zip(volunteer_ids, shift_ids)
+        ])
+        db.session.commit()
+
+
+def pending_payouts(app, count):
+    from app.config import db
+    from app.models import Shift, ShiftRoster
+    with app.app_context():
+        rows = db.session.query(ShiftRoster.id).join(Shift, Shift.id == ShiftRoster.shift_id)\
+            .filter(ShiftRoster.status == 'pending_payment', ShiftRoster.is_paid == False,
+                    Shift.is_funded == True, Shift.funded_amount >= ShiftRoster.payout_amount)\
+            .order_by(ShiftRoster.id).limit(count).all()
+        return [r.id for r in rows]
+
+
+def pick_users(app):
+    from app.config import db
+    from app.models import User, Organization, Project, ShiftRoster
+    with app.app_context():
+        admin = db.session.query(User.id).filter(User.role == 'admin').order_by(User.id).first()
+        # The org admin with the most projects - the heaviest shift list
+        org_admin = db.session.query(Organization.user_id).join(Project, Project.org_id == Organization.id)\
+            .group_by(Organization.user_id).order_by(db.func.count(Project.id).desc()).first()
+        volunteer = db.session.query(ShiftRoster.volunteer_id).order_by(ShiftRoster.id.desc()).first()
+        return admin.id, org_admin.user_id, volunteer.volunteer_id
+
+
+def run_suite(app, args):
+    bench = Bench(app, args.iterations, args.warmup, args.warm_cache)
+    n = args.iterations + args.warmup
+    selected = args.scenarios.split(',') if args.scenarios else list(SCENARIOS)
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    admin_id, org_admin_id, volunteer_id = pick_users(app)
+    admin, org_admin, volunteer = bench.token(admin_id, 'admin'), bench.token(org_admin_id, 'org_admin'), bench.token(volunteer_id, 'volunteer')
+
+    # Fresh volunteers for the write paths: one set for register/checkin/checkout, one for checkout-complete
+    flow_volunteers = create_bench_volunteers(app, n) if {'register', 'checkin', 'checkout'} & set(selected) else []
+    flow_shifts = open_shifts(app, len(flow_volunteers))
+    flow = [(bench.token(v, 'volunteer'), s) for v, s in zip(flow_volunteers, flow_shifts)]
+
+    payout = []
+    if 'checkout_payout' in selected:
+        payout_volunteers = create_bench_volunteers(app, n)
+        payout_shifts = open_shifts(app, n, exclude=flow_shifts)
+        checked_in_rosters(app, payout_volunteers, payout_shifts)
+        payout = [(bench.token(v, 'volunteer'), s) for v, s in zip(payout_volunteers, payout_shifts)]
+
+    requests = {
+        'search': lambda: [('GET', f'/api/shifts?lat={-1.28 + i * 0.001:.4f}&log=36.82', None, None, None) for i in range(n)],
+        'shift_list': lambda: [('GET', '/api/shifts', org_admin, None, 'shifts.get_shifts')] * n,
+        'shift_list_volunteer': lambda: [('GET', '/api/shifts', volunteer, None, 'shifts.get_shifts')] * n,
+        'text_search': lambda: [
+            ('GET', f'/api/search?q={TEXT_QUERIES[i % len(TEXT_QUERIES)]}', None, None, None) for i in range(n)
+        ],
+        'recommended': lambda: [('GET', '/api/shifts/recommended', volunteer, None, None)] * n,
+        'register': lambda: [('POST', f'/api/shifts/{s}/register', t, {}, None) for t, s in flow],
+        'checkin': lambda: [('POST', f'/api/shifts/{s}/checkin', t, {}, None) for t, s in flow],
+        'checkout': lambda: [('POST', f'/api/shifts/{s}/checkout', t, {'beneficiaries_served': 12}, None) for t, s in flow],
+        'checkout_payout': lambda: [
+            ('POST', '/api/payments/checkout-complete', t, {'shift_id': s, 'beneficiaries_served': 12}, None) for t, s in payout
+        ],
+        'approve_payment': lambda: [
+            ('POST', f'/api/admin/approve-payment/{r}', admin, None, None) for r in pending_payouts(app, n)
+        ],
+        'pending_payments': lambda: [('GET', '/api/admin/pending-payments', admin, None, None)] * n,
+        'dashboard_stats': lambda: [('GET', '/api/admin/dashboard-stats', admin, None, None)] * n,
+    }
+
+    results = {}
+    for name in SCENARIOS:
+        if name not in selected:
+            continue
+        batch = requests[name]()
+        if len(batch) < n:
+            print(f'  {name:<22} only {len(batch)} targets available (wanted {n})')
+        results[name] = bench.run(batch)
+        print_row(name, results[name])
+    return results
+
+
+def print_row(name, result):
+    if not result['requests']:
+        print(f'  {name:<22} skipped (no data)')
+        return
+    print(f"  {name:<22} p50 {result['p50_ms']:8.1f}ms  p95 {result['p95_ms']:8.1f}ms  p99 {result['p99_ms']:8.1f}ms  "
+          f"queries {result['queries_median']:>4}  errors {result['errors']}")
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latest_result(dialect, exclude=None):
+    paths = [p for p in sorted(glob.glob(os.path.join(RESULTS_DIR, f'{dialect}-*.json'))) if p != exclude]
+    return paths[-1] if paths else None
+
+
+def compare(current, baseline, max_regression, min_delta_ms=1.0):
+    """Regressions between two result files: p95 slower by more than max_regression, or more queries"""
+    regressions = []
+    print(f"Compared with {baseline['meta'].get('git_revision')} ({baseline['meta'].get('timestamp')}):")
+    for name, result in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if not before or not before.get('requests') or not result.get('requests'):
+            continue
+        p95, old_p95 = result['p95_ms'], before['p95_ms']
+        change = (p95 - old_p95) / old_p95 if old_p95 else 0.0
+        flags = []
+        if change > max_regression and p95 - old_p95 > min_delta_ms:
+            flags.append(f'p95 +{change:.0%}')
+        if result['queries_median'] > before['queries_median']:
+            flags.append(f"queries {before['queries_median']} -> {result['queries_median']}")
+        if result['errors'] > before['errors']:
+            flags.append(f"errors {before['errors']} -> {result['errors']}")
+        print(f"  {name:<22} p95 {old_p95:8.1f} -> {p95:8.1f}ms ({change:+.0%})  {'REGRESSION: ' + ', '.join(flags) if flags else 'ok'}")
+        if flags:
+            regressions.append((name, flags))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URL))
+    parser.add_argument('--scale', help='(re)generate the dataset first, e.g. orgs:100,projects:2k,shifts:100k,roster:500k')
+    parser.add_argument('--random-seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--scenarios', help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--warm-cache', action='store_true', help='keep response caches between requests')
+    parser.add_argument('--output', help='result file (default benchmarks/results/<dialect>-<timestamp>.json)')
+    parser.add_argument('--compare', help="baseline result file, or 'latest' for the previous run on this dialect")
+    parser.add_argument('--max-regression', type=float, default=0.2, help='allowed p95 growth (default 0.2 = 20%%)')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('SLOW_REQUEST_MS', '600000')
+    from app import create_app
+    from app.config import db
+
+    app = create_app()
+    prepare_dataset(app, args.scale, args.random_seed)
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        counts = dataset_counts(db)
+
+    print(f"{dialect}: " + ', '.join(f'{k} {v:,}' for k, v in counts.items()) +
+          f" - {args.iterations} iterations (+{args.warmup} warm-up)")
+    scenarios = run_suite(app, args)
+
+    result = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'git_revision': git_revision(),
+            'dialect': dialect,
+            'dataset': counts,
+            'iterations': args.iterations,
+            'warmup': args.warmup,
+            'warm_cache': args.warm_cache,
+            'python': platform.python_version(),
+            'machine': platform.node()
+        },
+        'scenarios': scenarios
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{dialect}-{datetime.utcnow():%Y%m%d-%H%M%S}.json")
+    baseline_path = latest_result(dialect, exclude=output) if args.compare == 'latest' else args.compare
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f'Results written to {os.path.relpath(output)}')
+
+    if args.compare:
+        if not baseline_path:
+            print('No earlier result to compare with')
+            return
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Serialization benchmark for the shift list payload.
+
+Builds an in-memory SQLite database with 10k shifts and compares:
+  - orm:     ORM objects + Shift.to_dict() + stdlib json (the old path)
+  - schema:  column tuples + Schema.dump() + stdlib json
+  - orjson:  column tuples + Schema.dump() + orjson (skipped if not installed)
+
+Usage (from backend/):
+    python benchmarks/bench_serialization.py [--shifts 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, time as dt_time, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+from app import create_app
+from app.config import db
+from app.models import User, Organization, Project, Shift
+from routes.search import SEARCH_SCHEMA
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def populate(count):
+    admin = User(name='Bench Admin', email='bench@volaplace.com', role='org_admin', phone='254700000099')
+    admin.set_password('bench')
+    db.session.add(admin)
+    db.session.flush()
+
+    org = Organization(name='Bench Org', user_id=admin.id)
+    db.session.add(org)
+    db.session.flush()
+
+    projects = [
+        Project(org_id=org.id, name=f'Site {i}', lat=-1.28 + i * 0.001, lon=36.82 + i * 0.001, geofence_radius=100)
+        for i in range(50)
+    ]
+    db.session.add_all(projects)
+    db.session.flush()
+
+    start = date.today()
+    db.session.execute(Shift.__table__.insert(), [{
+        'project_id': projects[i % len(projects)].id,
+        'title': f'Shift {i}',
+        'description': 'Food distribution and community outreach',
+        'date': start + timedelta(days=i % 90),
+        'start_time': dt_time(8 + i % 8, 0),
+        'end_time': dt_time(12 + i % 8, 0),
+        'max_volunteers': 10,
+        'status': 'upcoming',
+        'is_funded': i % 3 == 0,
+        'funded_amount': 1500.0 if i % 3 == 0 else 0.0
+    } for i in range(count)])
+    db.session.commit()
+
+
+def orm_path():
+    db.session.expunge_all()
+    return json.dumps([shift.to_dict() for shift in Shift.query.all()], sort_keys=True)
+
+
+def rows():
+    return db.session.query(*SEARCH_SCHEMA.columns).outerjoin(Project, Project.id == Shift.project_id).all()
+
+
+def schema_path():
+    return json.dumps(SEARCH_SCHEMA.dump(rows()), sort_keys=True)
+
+
+def orjson_path():
+    return orjson.dumps(SEARCH_SCHEMA.dump(rows()), option=orjson.OPT_SORT_KEYS)
+
+
+def measure(fn, repeat):
+    fn()  # warm up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shifts', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        populate(args.shifts)
+
+        # Both paths must produce the same document
+        assert json.loads(orm_path()) == json.loads(schema_path())
+
+        paths = [('orm', orm_path), ('schema', schema_path)]
+        if orjson is not None:
+            paths.append(('orjson', orjson_path))
+
+        baseline = None
+        print(f'{args.shifts} shifts, best of {args.repeat}')
+        for name, fn in paths:
+            best = measure(fn, args.repeat)
+            baseline = baseline or best
+            print(f'  {name:<8} {best * 1000:8.1f} ms  {args.shifts / best:10.0f} shifts/s  {baseline / best:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Startup-time benchmark for create_app().
+
+Runs `python -X importtime` in a fresh interpreter, reports the slowest
+top-level imports (cumulative) and the wall time of importing the app
+package and building the app, averaged over several cold starts.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py [--runs 5] [--top 15] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TIMED_START = """
+import time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+built = time.perf_counter()
+print(f'{(imported - started) * 1000:.1f} {(built - imported) * 1000:.1f}')
+"""
+
+
+def _env():
+    return dict(os.environ, DATABASE_URL=os.environ.get('DATABASE_URL', 'sqlite://'), LOG_LEVEL='WARNING')
+
+
+def import_profile():
+    """(module, self_us, cumulative_us, depth) for every import create_app triggers"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'from app import create_app; create_app()'],
+        cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def cold_starts(runs):
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, '-c', TIMED_START],
+            cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True, check=True
+        ).stdout.split()
+        timings.append((float(out[-2]), float(out[-1])))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    rows = import_profile()
+    # Depth 1 = packages imported directly by the app (or by the interpreter's own startup)
+    top_level = sorted((r for r in rows if r[3] == 1), key=lambda r: r[2], reverse=True)[:args.top]
+    total_us = sum(r[2] for r in rows if r[3] == 1)
+
+    timings = cold_starts(args.runs)
+    import_ms = statistics.median(t[0] for t in timings)
+    build_ms = statistics.median(t[1] for t in timings)
+
+    print(f'Imports triggered by create_app: {len(rows)} modules, {total_us / 1000:.1f}ms')
+    for name, _, cumulative_us, _ in top_level:
+        print(f'  {cumulative_us / 1000:8.1f}ms  {name}')
+    print(f'Cold start (median of {args.runs}): import {import_ms:.1f}ms + create_app {build_ms:.1f}ms '
+          f'= {import_ms + build_ms:.1f}ms')
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'modules': len(rows),
+                'import_total_ms': total_us / 1000,
+                'top_imports': [{'module': r[0], 'cumulative_ms': r[2] / 1000} for r in top_level],
+                'cold_start_import_ms': import_ms,
+                'cold_start_create_app_ms': build_ms
+            }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
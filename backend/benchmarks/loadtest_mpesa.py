@@ -0,0 +1,200 @@
+"""
+Load test for the M-Pesa funding path under slow upstream latency.
+
+Starts a local Daraja stub that answers STK Push after --latency seconds,
+then runs the app under gunicorn once per worker class and fires concurrent
+POST /api/payments/fund-shift requests at it. With sync workers each
+process waits on one upstream call at a time; gthread/gevent overlap them.
+
+Usage (from backend/, needs gunicorn; gevent only if installed):
+    python benchmarks/loadtest_mpesa.py [--latency 0.3] [--requests 200]
+        [--concurrency 32] [--workers 1] [--modes sync,gthread,gevent]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+JWT_SECRET = 'loadtest-secret'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_stub(latency):
+    """Minimal Daraja: OAuth token and STK Push with a fixed delay"""
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, body):
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            self._send({'access_token': 'stub-token', 'expires_in': '3599'})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(latency)
+            self._send({
+                'ResponseCode': '0',
+                'CheckoutRequestID': f'ws_CO_{time.time_ns()}',
+                'MerchantRequestID': 'stub',
+                'CustomerMessage': 'Success. Request accepted for processing'
+            })
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', free_port()), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def prepare_database(path):
+    """Create the schema and one org admin with a shift; returns a JWT for them"""
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    os.environ['JWT_SECRET_KEY'] = JWT_SECRET
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from app.config import db
+    from app.models import User, Organization, Project, Shift
+    from datetime import date, time as dt_time, timedelta
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        admin = User(name='Load Admin', email='load@volaplace.com', role='org_admin', phone='254700000100')
+        admin.set_password('load')
+        db.session.add(admin)
+        db.session.flush()
+        org = Organization(name='Load Org', user_id=admin.id)
+        db.session.add(org)
+        db.session.flush()
+        project = Project(org_id=org.id, name='Load Site', lat=-1.28, lon=36.82)
+        db.session.add(project)
+        db.session.flush()
+        shift = Shift(project_id=project.id, title='Load Shift', date=date.today() + timedelta(days=1),
+                      start_time=dt_time(9), end_time=dt_time(13), max_volunteers=10, status='upcoming')
+        db.session.add(shift)
+        db.session.commit()
+        return create_access_token(identity=str(admin.id), additional_claims={'role': 'org_admin'}), shift.id
+
+
+def start_server(mode, workers, port, env):
+    env = dict(env, PORT=str(port), WEB_CONCURRENCY=str(workers), GUNICORN_WORKER_CLASS=mode)
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', os.devnull, 'run:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/health', timeout=1)
+            return proc
+        except Exception:
+            if proc.poll() is not None:
+                raise RuntimeError(f'gunicorn ({mode}) exited: {proc.stderr.read().decode()[-2000:]}')
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f'gunicorn ({mode}) did not start')
+
+
+def fund_once(url, token, shift_id):
+    body = json.dumps({'shift_id': shift_id, 'amount': 100}).encode()
+    req = urllib.request.Request(url, data=body, method='POST', headers={
+        'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'
+    })
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=120) as res:
+            ok = res.status == 200
+    except urllib.error.HTTPError:
+        ok = False
+    return ok, time.perf_counter() - started
+
+
+def run_load(port, token, shift_id, total, concurrency):
+    url = f'http://127.0.0.1:{port}/api/payments/fund-shift'
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: fund_once(url, token, shift_id), range(total)))
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency for ok, latency in results if ok)
+    errors = sum(1 for ok, _ in results if not ok)
+    return {
+        'throughput': total / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else None,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else None,
+        'errors': errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.3, help='stub STK Push delay in seconds')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--modes', default='sync,gthread,gevent')
+    args = parser.parse_args()
+
+    stub = start_stub(args.latency)
+    stub_url = f'http://127.0.0.1:{stub.server_address[1]}'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'loadtest.db')
+        token, shift_id = prepare_database(db_path)
+        env = dict(
+            os.environ,
+            DATABASE_URL=f'sqlite:///{db_path}',
+            JWT_SECRET_KEY=JWT_SECRET,
+            MPESA_BASE_URL=stub_url,
+            MPESA_CONSUMER_KEY='stub',
+            MPESA_CONSUMER_SECRET='stub',
+            LOG_LEVEL='WARNING'
+        )
+
+        print(f'{args.requests} fund-shift requests, concurrency {args.concurrency}, '
+              f'{args.workers} worker(s), upstream latency {args.latency * 1000:.0f}ms')
+        for mode in args.modes.split(','):
+            if mode == 'gevent':
+                try:
+                    import gevent  # noqa: F401
+                except ImportError:
+                    print(f'  {mode:<8} skipped (pip install gevent)')
+                    continue
+            port = free_port()
+            proc = start_server(mode, args.workers, port, env)
+            try:
+                result = run_load(port, token, shift_id, args.requests, args.concurrency)
+            finally:
+                proc.terminate()
+                proc.wait()
+            print(f'  {mode:<8} {result["throughput"]:7.1f} req/s  p50 {result["p50_ms"] or 0:7.0f}ms  '
+                  f'p95 {result["p95_ms"] or 0:7.0f}ms  errors {result["errors"]}')
+
+    stub.shutdown()
+
+
+if __name__ == '__main__':
+    main()
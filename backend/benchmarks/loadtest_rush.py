@@ -0,0 +1,320 @@
+"""
+Shift-start rush load test.
+
+Simulates the minute before a shift starts: hundreds of volunteers hit the
+same endpoints at once against a local gunicorn server. Every volunteer
+double-taps (sends each request twice concurrently), the way flaky mobile
+networks and impatient users do. Scenarios:
+
+    register  POST /api/shifts/<id>/register on one shift with --seats places
+              (the rest join its waitlist)
+    cancel    POST /api/shifts/<id>/cancel by everyone holding a place on a full
+              shift with a waitlist - each freed place is handed on
+    checkin   POST /api/attendance/check-in for a shift everyone is registered for
+    payout    POST /api/payments/checkout-complete on a shift whose budget
+              covers only part of the payouts
+
+For each one it reports throughput, status codes, error rate (5xx and
+connection failures), latency percentiles and integrity violations read back
+from the database afterwards:
+
+    overbooked         more active (not cancelled) roster rows than max_volunteers
+    duplicate_roster   several active roster rows for one volunteer on one shift
+    lost_updates       successful responses that left no matching row
+    double_promotion   volunteers both on the roster and still waitlisted
+    stranded_seats     open places left while volunteers are still waiting
+    seat_drift         shifts.open_seats disagreeing with the roster
+    double_payouts     more than one transaction_log row for a roster entry
+    overdrawn          KES paid out beyond what the shift was funded with
+
+Usage (from backend/, needs gunicorn):
+    python benchmarks/loadtest_rush.py [--volunteers 300] [--seats 50]
+        [--ramp 1.0] [--mode gthread] [--workers 2] [--scenarios register,checkin,payout]
+        [--database-url postgresql://localhost/volaplace_load] [--json out.json]
+
+Without --database-url a throwaway SQLite file is used. With Postgres the
+schema is created if missing and the fixture rows are added next to
+existing data (integrity checks only look at the fixture's shifts).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, datetime, time as dt_time, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.loadtest_mpesa import free_port, start_server  # noqa: E402
+
+JWT_SECRET = 'loadtest-rush-secret-at-least-32-bytes'
+SITE = (-1.2864, 36.8172)
+SCENARIOS = ('register', 'cancel', 'checkin', 'payout')
+
+
+# ---------------------------------------------------------------------------
+# Fixture
+# ---------------------------------------------------------------------------
+
+def prepare(volunteers, seats):
+    """Create one org, a shift per scenario and the volunteers; returns ids and tokens"""
+    from flask_jwt_extended import create_access_token
+    from werkzeug.security import generate_password_hash
+    from app import create_app
+    from app.config import db
+    from app.models import User, Organization, Project, Shift, ShiftRoster, ShiftWaitlist
+
+    app = create_app()
+    stamp = int(time.time()) % 100_000
+    with app.app_context():
+        db.create_all()
+        password_hash = generate_password_hash('rush')
+
+        admin = User(name='Rush Admin', email=f'rush-admin-{stamp}@volaplace.com', role='org_admin',
+                     phone=f'2547{stamp:05d}000', password_hash=password_hash)
+        db.session.add(admin)
+        db.session.flush()
+        org = Organization(name=f'Rush Org {stamp}', user_id=admin.id)
+        db.session.add(org)
+        db.session.flush()
+        project = Project(org_id=org.id, name='Rush Site', lat=SITE[0], lon=SITE[1], geofence_radius=200)
+        db.session.add(project)
+        db.session.flush()
+
+        now = datetime.utcnow()
+        soon = (now + timedelta(minutes=5)).time().replace(second=0, microsecond=0)
+        started = (now - timedelta(hours=1)).time().replace(second=0, microsecond=0)
+
+        def shift(title, shift_date, start, max_volunteers, budget):
+            s = Shift(project_id=project.id, title=title, date=shift_date, start_time=start,
+                      end_time=dt_time(23, 59), max_volunteers=max_volunteers, status='upcoming',
+                      is_funded=True, funded_amount=budget, funding_transaction_id=f'rush-{stamp}-{title}')
+            db.session.add(s)
+            return s
+
+        # register: tomorrow so the daily limit and time conflicts don't interfere
+        register = shift('register', date.today() + timedelta(days=1), soon, seats, 100_000.0)
+        cancel = shift('cancel', date.today() + timedelta(days=2), soon, seats, 100_000.0)
+        checkin = shift('checkin', now.date(), soon, volunteers, 100_000.0)
+        # payout: ~1h at 150/h each, but only funded for about two thirds of the volunteers
+        payout_budget = round(volunteers * 150.0 * 2 / 3, 2)
+        payout = shift('payout', now.date(), started, volunteers, payout_budget)
+
+        users = [
+            User(name=f'Rush Volunteer {i}', email=f'rush-{stamp}-{i}@volaplace.com', role='volunteer',
+                 phone=f'2548{stamp:05d}{i:03d}'[:15], mpesa_phone=f'2548{stamp:05d}{i:03d}'[:15],
+                 password_hash=password_hash, profile_completed=True)
+            for i in range(volunteers)
+        ]
+        db.session.add_all(users)
+        db.session.flush()
+
+        # cancel: the first `seats` volunteers hold the places, everyone else is queued
+        cancel.open_seats = 0
+        for i, user in enumerate(users):
+            if i < seats:
+                db.session.add(ShiftRoster(shift_id=cancel.id, volunteer_id=user.id, status='registered'))
+            else:
+                db.session.add(ShiftWaitlist(shift_id=cancel.id, volunteer_id=user.id))
+                db.session.flush()  # ids in queue order
+
+        # checkin/payout: everyone is already on the roster
+        checkin.open_seats = payout.open_seats = 0
+        check_in_time = now - timedelta(hours=1)
+        for user in users:
+            db.session.add(ShiftRoster(shift_id=checkin.id, volunteer_id=user.id, status='registered'))
+            db.session.add(ShiftRoster(shift_id=payout.id, volunteer_id=user.id, status='checked_in',
+                                       check_in_time=check_in_time))
+        db.session.commit()
+
+        tokens = [create_access_token(identity=str(u.id), additional_claims={'role': 'volunteer'}) for u in users]
+        return app, {
+            'shifts': {'register': register.id, 'cancel': cancel.id, 'checkin': checkin.id, 'payout': payout.id},
+            'seats': seats,
+            'payout_budget': payout_budget,
+            'volunteer_ids': [u.id for u in users],
+            'tokens': tokens
+        }
+
+
+# ---------------------------------------------------------------------------
+# Minimal asyncio HTTP client (stdlib only, one connection per request)
+# ---------------------------------------------------------------------------
+
+async def post_json(port, path, token, body, timeout):
+    payload = json.dumps(body).encode()
+    request = (
+        f'POST {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nAuthorization: Bearer {token}\r\n'
+        f'Content-Type: application/json\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n'
+    ).encode() + payload
+
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+        try:
+            writer.write(request)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), timeout)
+        finally:
+            writer.close()
+        status = int(response.split(b' ', 2)[1])
+    except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+        status = 0  # connection refused/reset, timeout or garbage
+    return status, time.perf_counter() - started
+
+
+async def rush(port, calls, ramp, timeout):
+    """calls: (path, token, body) - each fired twice at a random moment within `ramp` seconds"""
+    async def volunteer(path, token, body):
+        await asyncio.sleep(random.uniform(0, ramp))
+        return await asyncio.gather(*(post_json(port, path, token, body, timeout) for _ in range(2)))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(volunteer(*call) for call in calls))
+    elapsed = time.perf_counter() - started
+    return [r for pair in results for r in pair], elapsed
+
+
+def summarize(results, elapsed):
+    latencies = sorted(latency * 1000 for _, latency in results)
+    statuses = Counter(status for status, _ in results)
+    errors = sum(n for status, n in statuses.items() if status == 0 or status >= 500)
+
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, max(0, round(p / 100 * len(latencies)) - 1))], 1)
+
+    return {
+        'requests': len(results),
+        'throughput': round(len(results) / elapsed, 1),
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+        'error_rate': round(errors / len(results), 4) if results else 0.0,
+        'p50_ms': pct(50),
+        'p95_ms': pct(95),
+        'p99_ms': pct(99),
+        'mean_ms': round(statistics.fmean(latencies), 1)
+    }
+
+
+# ---------------------------------------------------------------------------
+# Integrity checks
+# ---------------------------------------------------------------------------
+
+def check_integrity(app, name, fixture, results):
+    from app.config import db
+    from app.models import Shift, ShiftRoster, ShiftWaitlist, TransactionLog
+
+    shift_id = fixture['shifts'][name]
+    successes = sum(1 for status, _ in results if 200 <= status < 300)
+    with app.app_context():
+        db.session.expire_all()
+        shift = db.session.get(Shift, shift_id)
+        rows = db.session.query(ShiftRoster.volunteer_id, ShiftRoster.id, ShiftRoster.check_in_time,
+                                ShiftRoster.is_paid, ShiftRoster.payout_amount, ShiftRoster.status)\
+            .filter(ShiftRoster.shift_id == shift_id).all()
+        active = [r for r in rows if r.status != 'cancelled']
+        waiting = {w for (w,) in db.session.query(ShiftWaitlist.volunteer_id).filter(ShiftWaitlist.shift_id == shift_id)}
+        per_volunteer = Counter(r.volunteer_id for r in active)
+        open_seats = (shift.max_volunteers or 0) - len(active)
+        violations = {
+            'overbooked': max(-open_seats, 0),
+            'duplicate_roster': sum(n - 1 for n in per_volunteer.values() if n > 1),
+            'double_promotion': len(waiting & set(per_volunteer)),
+            'stranded_seats': min(max(open_seats, 0), len(waiting)),
+            'seat_drift': abs((shift.open_seats or 0) - open_seats) if shift.max_volunteers is not None else 0
+        }
+
+        if name == 'register':
+            # every volunteer with a 2xx either holds a place or a spot in the queue (results come in pairs per volunteer)
+            answered = {v for i, v in enumerate(fixture['volunteer_ids'])
+                        if any(200 <= status < 300 for status, _ in results[2 * i:2 * i + 2])}
+            violations['lost_updates'] = len(answered - set(per_volunteer) - waiting)
+        elif name == 'cancel':
+            violations['lost_updates'] = max(successes - sum(1 for r in rows if r.status == 'cancelled'), 0)
+        elif name == 'checkin':
+            violations['lost_updates'] = max(successes - sum(1 for r in rows if r.check_in_time), 0)
+        elif name == 'payout':
+            payments = db.session.query(TransactionLog.shift_roster_id, TransactionLog.amount)\
+                .filter(TransactionLog.shift_roster_id.in_([r.id for r in rows])).all()
+            per_roster = Counter(p.shift_roster_id for p in payments)
+            violations.update(
+                double_payouts=sum(n - 1 for n in per_roster.values() if n > 1),
+                lost_updates=max(successes - len(payments), 0),
+                # KES paid out beyond what the shift was funded with
+                overdrawn=round(max(sum(p.amount for p in payments) - fixture['payout_budget'], 0.0), 2)
+            )
+    return successes, violations
+
+
+# ---------------------------------------------------------------------------
+
+def calls_for(name, fixture):
+    tokens = fixture['tokens']
+    shift_id = fixture['shifts'][name]
+    if name == 'register':
+        return [(f'/api/shifts/{shift_id}/register', t, {}) for t in tokens]
+    if name == 'cancel':
+        return [(f'/api/shifts/{shift_id}/cancel', t, {}) for t in tokens[:fixture['seats']]]
+    if name == 'checkin':
+        body = {'shift_id': shift_id, 'latitude': SITE[0], 'longitude': SITE[1]}
+        return [('/api/attendance/check-in', t, body) for t in tokens]
+    return [('/api/payments/checkout-complete', t, {'shift_id': shift_id, 'beneficiaries_served': 5}) for t in tokens]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--volunteers', type=int, default=300)
+    parser.add_argument('--seats', type=int, default=50, help='max_volunteers of the register shift')
+    parser.add_argument('--ramp', type=float, default=1.0, help='seconds over which the rush arrives')
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--mode', default='gthread', help='gunicorn worker class')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--database-url', help='default: a temporary SQLite file')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmp, 'rush.db')}"
+        os.environ.update(DATABASE_URL=database_url, JWT_SECRET_KEY=JWT_SECRET, LOG_LEVEL='WARNING')
+        app, fixture = prepare(args.volunteers, args.seats)
+
+        port = free_port()
+        env = dict(os.environ, SLOW_REQUEST_MS='600000')
+        proc = start_server(args.mode, args.workers, port, env)
+        print(f'{args.volunteers} volunteers x 2 requests within {args.ramp}s, gunicorn {args.mode} x {args.workers}, '
+              f"{app.config['SQLALCHEMY_DATABASE_URI'].split(':')[0]}")
+
+        report = {}
+        try:
+            for name in args.scenarios.split(','):
+                if name not in SCENARIOS:
+                    raise SystemExit(f'Unknown scenario {name}')
+                results, elapsed = asyncio.run(rush(port, calls_for(name, fixture), args.ramp, args.timeout))
+                summary = summarize(results, elapsed)
+                summary['successes'], summary['violations'] = check_integrity(app, name, fixture, results)
+                report[name] = summary
+
+                bad = {k: v for k, v in summary['violations'].items() if v}
+                print(f"  {name:<9} {summary['throughput']:7.1f} req/s  p50 {summary['p50_ms']:7.1f}ms  "
+                      f"p99 {summary['p99_ms']:7.1f}ms  errors {summary['error_rate']:.1%}  "
+                      f"statuses {summary['statuses']}")
+                print(f"  {'':<9} integrity: {'ok' if not bad else 'VIOLATIONS ' + json.dumps(bad)}")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': vars(args), 'scenarios': report}, f, indent=2)
+    if any(v for s in report.values() for v in s['violations'].values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,7 @@ def create_admin():
         print("🔑 Creating Admin Account...")
         
         # Check if admin already exists
-        existing = User.query.filter_by(email='admin@volaplace.com').first()
+        existing = User.by_email('admin@volaplace.com')
         if existing:
             print(f"⚠️  Admin already exists!")
             print(f"📧 Email: admin@volaplace.com")
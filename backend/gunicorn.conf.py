@@ -0,0 +1,84 @@
+"""
+Gunicorn settings for VolaPlace (used by the Procfile: gunicorn -c gunicorn.conf.py run:app).
+
+Most endpoints spend their time waiting on Postgres or M-Pesa, so the default
+is threaded workers: each process serves GUNICORN_THREADS requests at once
+instead of one. GUNICORN_WORKER_CLASS=gevent (needs `pip install gevent`,
+plus `psycogreen` for Postgres) switches to greenlets for thousands of
+concurrent slow upstream calls; GUNICORN_WORKER_CLASS=sync restores the old
+one-request-per-process behaviour.
+
+Environment:
+    PORT                   port to bind (default 5000)
+    WEB_CONCURRENCY        worker processes (default 2)
+    GUNICORN_WORKER_CLASS  gthread (default), gevent or sync
+    GUNICORN_THREADS       threads per gthread worker (default 8)
+    GUNICORN_CONNECTIONS   concurrent greenlets per gevent worker (default 500)
+    GUNICORN_TIMEOUT       seconds before a silent worker is restarted (default 60)
+    GUNICORN_PRELOAD       import the app once in the master before forking
+                           (default true, except with gevent)
+"""
+import logging
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+# Kept small by default - concurrency comes from threads, and every worker has its own DB pool
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+# gunicorn silently turns sync into gthread when threads > 1, so only set it for gthread
+threads = int(os.environ.get('GUNICORN_THREADS', 8)) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_CONNECTIONS', 500))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+# Restart workers now and then so slow leaks can't build up
+max_requests = 2000
+max_requests_jitter = 200
+
+# Workers fork from a master that already imported and configured the app, so
+# startup cost is paid once and the loaded modules are shared copy-on-write.
+# gevent must monkey-patch before the app is imported, so it doesn't preload.
+preload_app = os.environ.get(
+    'GUNICORN_PRELOAD', 'false' if worker_class == 'gevent' else 'true'
+).lower() in ('1', 'true', 'yes', 'on')
+
+accesslog = '-'
+errorlog = '-'
+
+
+def _concurrency():
+    if worker_class == 'gthread':
+        return threads
+    if worker_class == 'gevent':
+        return worker_connections
+    return 1
+
+
+def on_starting(server):
+    # Each concurrent request may hold a DB connection; warn if the pool is smaller
+    capacity = int(os.environ.get('DB_POOL_SIZE', 5)) + int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    if os.environ.get('DB_PGBOUNCER', '').lower() not in ('1', 'true', 'yes', 'on') and _concurrency() > capacity:
+        server.log.warning(
+            'Each worker can run %d requests at once but its DB pool holds %d connections; '
+            'requests will queue on DB_POOL_TIMEOUT. Raise DB_POOL_SIZE/DB_MAX_OVERFLOW or use DB_PGBOUNCER.',
+            _concurrency(), capacity
+        )
+
+
+def post_fork(server, worker):
+    if preload_app:
+        # Pooled connections opened in the master must not be shared across
+        # processes - drop them (without closing the parent's sockets)
+        from app.config import db
+        with server.app.wsgi().app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+    if worker_class == 'gevent':
+        # Make psycopg2 cooperative so a slow query doesn't block every greenlet
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            logging.getLogger('volaplace').warning('psycogreen not installed - Postgres calls will block the gevent worker')
@@ -0,0 +1,112 @@
+"""
+Request instrumentation middleware for VolaPlace.
+Counts the SQL statements each request runs and the time spent in the
+database (SQLAlchemy cursor events), measures total latency, and reports
+them three ways:
+  - a Server-Timing header on every response (visible in browser devtools)
+  - Prometheus metrics at GET /metrics (needs METRICS_TOKEN outside
+    debug/testing)
+  - a warning log line for requests slower than SLOW_REQUEST_MS - with the
+    path only, since query strings can carry tokens (?jwt= on the live streams)
+"""
+import logging
+import os
+import time
+from flask import g, request, has_request_context, Response, jsonify
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.metrics import registry
+
+logger = logging.getLogger('volaplace.requests')
+
+REQUESTS = registry.counter(
+    'volaplace_http_requests_total', 'HTTP requests served', ['method', 'endpoint', 'status'])
+LATENCY = registry.histogram(
+    'volaplace_http_request_duration_seconds', 'Total request latency', ['method', 'endpoint'])
+DB_TIME = registry.histogram(
+    'volaplace_db_time_seconds', 'Time spent in SQL per request', ['endpoint'])
+DB_QUERIES = registry.histogram(
+    'volaplace_db_queries_per_request', 'SQL statements per request', ['endpoint'],
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 250))
+SLOW_REQUESTS = registry.counter(
+    'volaplace_slow_requests_total', 'Requests slower than SLOW_REQUEST_MS', ['endpoint'])
+
+
+# SQL timing - listeners on the Engine class cover every engine the app creates
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_start'].pop()
+    if has_request_context() and 'request_started' in g:
+        g.db_queries += 1
+        g.db_time += time.perf_counter() - started
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute - drop its start time
+    if context.connection is not None and context.connection.info.get('query_start'):
+        context.connection.info['query_start'].pop()
+
+
+def _endpoint():
+    # The route pattern keeps label cardinality bounded (no raw ids in paths)
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+def init_instrumentation(app):
+    """Register the timing hooks and the /metrics endpoint on `app`"""
+    slow_ms = float(app.config.get('SLOW_REQUEST_MS') or os.environ.get('SLOW_REQUEST_MS', 500))
+    metrics_token = app.config.get('METRICS_TOKEN') or os.environ.get('METRICS_TOKEN')
+    if not metrics_token and not app.debug:
+        logger.warning('METRICS_TOKEN is not set - GET /metrics is disabled outside debug/testing')
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+        g.db_queries = 0
+        g.db_time = 0.0
+
+    @app.after_request
+    def record_timing(response):
+        if 'request_started' not in g:
+            return response
+
+        total = time.perf_counter() - g.request_started
+        endpoint = _endpoint()
+
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={g.db_time * 1000:.1f};desc="{g.db_queries} queries", app;dur={total * 1000:.1f}'
+        )
+
+        if endpoint != '/metrics':
+            REQUESTS.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+            LATENCY.observe(total, method=request.method, endpoint=endpoint)
+            DB_TIME.observe(g.db_time, endpoint=endpoint)
+            DB_QUERIES.observe(g.db_queries, endpoint=endpoint)
+
+        if total * 1000 >= slow_ms:
+            SLOW_REQUESTS.inc(endpoint=endpoint)
+            logger.warning(
+                'Slow request %s %s -> %s in %.1fms (%d queries, %.1fms in db)',
+                request.method, request.path, response.status_code,
+                total * 1000, g.db_queries, g.db_time * 1000
+            )
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        # Shared secret for scrapers; without one only local debug/test runs are served
+        if not metrics_token:
+            if not (app.debug or app.testing):
+                return jsonify({"error": "Metrics are disabled - set METRICS_TOKEN"}), 403
+        elif request.headers.get('Authorization') != f'Bearer {metrics_token}':
+            return jsonify({"error": "Authorization required"}), 401
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+    return app
@@ -0,0 +1,26 @@
+"""add geofence_polygon to projects
+
+Revision ID: 4919238b2053
+Revises: 51d57b202ede
+Create Date: 2026-10-19 10:03:17.204611
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4919238b2053'
+down_revision = '51d57b202ede'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('geofence_polygon', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_column('geofence_polygon')
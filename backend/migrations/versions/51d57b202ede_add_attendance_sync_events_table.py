@@ -0,0 +1,38 @@
+"""add attendance_sync_events table for offline check-in sync
+
+Revision ID: 51d57b202ede
+Revises: 799316497651
+Create Date: 2026-10-19 09:12:41.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '51d57b202ede'
+down_revision = '799316497651'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('attendance_sync_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('volunteer_id', sa.Integer(), nullable=False),
+    sa.Column('client_event_id', sa.String(length=64), nullable=False),
+    sa.Column('shift_id', sa.Integer(), nullable=True),
+    sa.Column('event_type', sa.String(length=20), nullable=False),
+    sa.Column('event_time', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('error', sa.String(length=200), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['shift_id'], ['shifts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['volunteer_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('volunteer_id', 'client_event_id', name='uq_sync_events_volunteer_client_event')
+    )
+
+
+def downgrade():
+    op.drop_table('attendance_sync_events')
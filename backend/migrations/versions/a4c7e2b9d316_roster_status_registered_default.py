@@ -0,0 +1,28 @@
+"""roster status: 'scheduled' rows become 'registered'
+
+Revision ID: a4c7e2b9d316
+Revises: f3b9d2e7a150
+Create Date: 2026-10-20 11:04:52.118230
+
+Roster rows created without a status used to get 'scheduled', which none of
+the sign-up checks know (only registered / checked_in count as booked).
+They already hold a seat, so open_seats needs no recount. The downgrade
+leaves them 'registered' - they can't be told apart from real sign-ups.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c7e2b9d316'
+down_revision = 'f3b9d2e7a150'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("UPDATE shifts_roster SET status = 'registered' WHERE status = 'scheduled'")
+
+
+def downgrade():
+    pass
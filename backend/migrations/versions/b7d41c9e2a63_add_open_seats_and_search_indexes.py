@@ -0,0 +1,52 @@
+"""add open_seats to shifts and search indexes
+
+Revision ID: b7d41c9e2a63
+Revises: 4919238b2053
+Create Date: 2026-10-19 17:05:42.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41c9e2a63'
+down_revision = '4919238b2053'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('shifts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('open_seats', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_shifts_date_start_time', ['date', 'start_time'], unique=False)
+        batch_op.create_index('ix_shifts_project_id_date', ['project_id', 'date'], unique=False)
+
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.create_index('ix_projects_lat_lon', ['lat', 'lon'], unique=False)
+
+    with op.batch_alter_table('shifts_roster', schema=None) as batch_op:
+        batch_op.create_index('ix_shifts_roster_shift_id_volunteer_id', ['shift_id', 'volunteer_id'], unique=False)
+
+    # Backfill from the roster; cancelled sign-ups don't hold a seat
+    op.execute("""
+        UPDATE shifts SET open_seats = max_volunteers - (
+            SELECT COUNT(*) FROM shifts_roster
+            WHERE shifts_roster.shift_id = shifts.id
+              AND COALESCE(shifts_roster.status, '') <> 'cancelled'
+        )
+        WHERE max_volunteers IS NOT NULL
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('shifts_roster', schema=None) as batch_op:
+        batch_op.drop_index('ix_shifts_roster_shift_id_volunteer_id')
+
+    with op.batch_alter_table('projects', schema=None) as batch_op:
+        batch_op.drop_index('ix_projects_lat_lon')
+
+    with op.batch_alter_table('shifts', schema=None) as batch_op:
+        batch_op.drop_index('ix_shifts_project_id_date')
+        batch_op.drop_index('ix_shifts_date_start_time')
+        batch_op.drop_column('open_seats')
@@ -0,0 +1,72 @@
+"""add search_documents for full-text search
+
+Revision ID: c5e8a2f1d374
+Revises: b7d41c9e2a63
+Create Date: 2026-10-19 19:12:08.514736
+
+"""
+from alembic import op
+import sqlalchemy as sa
+# the tsvector column / FTS5 table and its triggers, shared with utils/fulltext.py
+from utils.fulltext_ddl import DDL
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8a2f1d374'
+down_revision = 'b7d41c9e2a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('search_documents',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity_type', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=True),
+    sa.Column('title', sa.Text(), nullable=True),
+    sa.Column('context', sa.Text(), nullable=True),
+    sa.Column('body', sa.Text(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('entity_type', 'entity_id', name='uq_search_documents_entity')
+    )
+    with op.batch_alter_table('search_documents', schema=None) as batch_op:
+        batch_op.create_index('ix_search_documents_project_id', ['project_id'], unique=False)
+
+    dialect = op.get_bind().dialect.name
+    for statement in DDL.get(dialect, []):
+        op.execute(statement)
+
+    # Backfill - the triggers / generated column index the rows as they go in
+    op.execute("""
+        INSERT INTO search_documents (entity_type, entity_id, project_id, title, context, body)
+        SELECT 'shift', shifts.id, shifts.project_id, shifts.title,
+               COALESCE(projects.name, '') || ' ' || COALESCE(organizations.name, '') || ' ' || COALESCE(projects.address, ''),
+               COALESCE(shifts.description, '')
+        FROM shifts
+        LEFT OUTER JOIN projects ON projects.id = shifts.project_id
+        LEFT OUTER JOIN organizations ON organizations.id = projects.org_id
+    """)
+    op.execute("""
+        INSERT INTO search_documents (entity_type, entity_id, project_id, title, context, body)
+        SELECT 'project', projects.id, projects.id, projects.name,
+               COALESCE(organizations.name, '') || ' ' || COALESCE(projects.address, ''),
+               COALESCE(projects.description, '')
+        FROM projects
+        LEFT OUTER JOIN organizations ON organizations.id = projects.org_id
+    """)
+    op.execute("""
+        INSERT INTO search_documents (entity_type, entity_id, project_id, title, context, body)
+        SELECT 'organization', organizations.id, NULL, organizations.name, '', COALESCE(organizations.description, '')
+        FROM organizations
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS search_documents_fts')
+
+    with op.batch_alter_table('search_documents', schema=None) as batch_op:
+        batch_op.drop_index('ix_search_documents_project_id')
+
+    op.drop_table('search_documents')
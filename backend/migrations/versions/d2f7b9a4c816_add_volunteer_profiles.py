@@ -0,0 +1,43 @@
+"""add volunteer_profiles for recommendations and a roster volunteer_id index
+
+Revision ID: d2f7b9a4c816
+Revises: c5e8a2f1d374
+Create Date: 2026-10-19 21:40:27.903145
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f7b9a4c816'
+down_revision = 'c5e8a2f1d374'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('volunteer_profiles',
+    sa.Column('volunteer_id', sa.Integer(), nullable=False),
+    sa.Column('shifts_attended', sa.Integer(), nullable=False),
+    sa.Column('home_lat', sa.Float(), nullable=True),
+    sa.Column('home_lon', sa.Float(), nullable=True),
+    sa.Column('start_minutes_mean', sa.Float(), nullable=True),
+    sa.Column('start_minutes_std', sa.Float(), nullable=True),
+    sa.Column('top_projects', sa.JSON(), nullable=True),
+    sa.Column('top_organizations', sa.JSON(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['volunteer_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('volunteer_id')
+    )
+    with op.batch_alter_table('shifts_roster', schema=None) as batch_op:
+        batch_op.create_index('ix_shifts_roster_volunteer_id', ['volunteer_id'], unique=False)
+
+    # Profiles are filled by `flask rebuild-profiles` (recommendations fall back to distance until then)
+
+
+def downgrade():
+    with op.batch_alter_table('shifts_roster', schema=None) as batch_op:
+        batch_op.drop_index('ix_shifts_roster_volunteer_id')
+
+    op.drop_table('volunteer_profiles')
@@ -0,0 +1,38 @@
+"""add shift_waitlist
+
+Revision ID: e8a3c6d1f052
+Revises: d2f7b9a4c816
+Create Date: 2026-10-19 23:18:44.271590
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a3c6d1f052'
+down_revision = 'd2f7b9a4c816'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('shift_waitlist',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('shift_id', sa.Integer(), nullable=False),
+    sa.Column('volunteer_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['shift_id'], ['shifts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['volunteer_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('shift_id', 'volunteer_id', name='uq_shift_waitlist_shift_volunteer')
+    )
+    with op.batch_alter_table('shift_waitlist', schema=None) as batch_op:
+        batch_op.create_index('ix_shift_waitlist_volunteer_id', ['volunteer_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('shift_waitlist', schema=None) as batch_op:
+        batch_op.drop_index('ix_shift_waitlist_volunteer_id')
+
+    op.drop_table('shift_waitlist')
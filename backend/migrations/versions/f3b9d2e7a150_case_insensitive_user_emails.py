@@ -0,0 +1,145 @@
+"""case-insensitive user emails: merge case-duplicate accounts, lower-case emails, unique lower(email) index
+
+Revision ID: f3b9d2e7a150
+Revises: e8a3c6d1f052
+Create Date: 2026-10-20 09:12:37.604418
+
+Accounts whose emails differ only in case (or surrounding spaces) are merged
+into one: the account that owns an organization, otherwise the oldest. The
+others' shifts, payouts, waitlist places, sync events and rule edits move to
+it before they are deleted. Groups that can't be merged without a choice -
+accounts with different roles, more than one organization owner, or live
+sign-ups (or payouts) on the same shift from two accounts - stop the upgrade
+with a list to resolve by hand; nothing is merged until there are none.
+Cancelled, unpaid sign-ups duplicated by the other account are dropped.
+Merges are not undone by the downgrade.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9d2e7a150'
+down_revision = 'e8a3c6d1f052'
+branch_labels = None
+depends_on = None
+
+
+def _is_live(row):
+    """A sign-up that holds a place, was attended or was paid - never dropped"""
+    return row.status != 'cancelled' or row.check_in_time is not None or row.payouts > 0
+
+
+def _roster_rows(bind, volunteer_ids):
+    """The accounts' roster rows with their payout counts, by shift"""
+    rows = bind.execute(sa.text(
+        "SELECT shifts_roster.id, shifts_roster.shift_id, shifts_roster.volunteer_id, shifts_roster.status, "
+        "shifts_roster.check_in_time, COUNT(transaction_log.id) AS payouts "
+        "FROM shifts_roster LEFT JOIN transaction_log ON transaction_log.shift_roster_id = shifts_roster.id "
+        "WHERE shifts_roster.volunteer_id IN :ids "
+        "GROUP BY shifts_roster.id, shifts_roster.shift_id, shifts_roster.volunteer_id, shifts_roster.status, "
+        "shifts_roster.check_in_time ORDER BY shifts_roster.shift_id, shifts_roster.id"
+    ).bindparams(sa.bindparam('ids', expanding=True)), {'ids': list(volunteer_ids)}).all()
+    by_shift = {}
+    for row in rows:
+        by_shift.setdefault(row.shift_id, []).append(row)
+    return by_shift
+
+
+def _conflicts(bind, email, group):
+    """Why this group can't be merged automatically - empty if it can"""
+    conflicts = []
+    roles = sorted({account.role for account in group})
+    if len(roles) > 1:
+        conflicts.append(f'{email}: accounts have different roles ({", ".join(roles)})')
+    if sum(account.org_id is not None for account in group) > 1:
+        conflicts.append(f'{email}: more than one account owns an organization')
+    for shift_id, entries in _roster_rows(bind, [account.id for account in group]).items():
+        # one shifts_roster row per volunteer and shift, one payout per roster row
+        if len({row.volunteer_id for row in entries}) > 1 and sum(_is_live(row) for row in entries) > 1:
+            conflicts.append(f'{email}: accounts {", ".join(str(row.volunteer_id) for row in entries)} '
+                             f'each have a sign-up or payout on shift {shift_id}')
+    return conflicts
+
+
+def _merge_roster(bind, survivor, duplicate):
+    """Move the duplicate's roster rows, dropping cancelled unpaid sign-ups the survivor also has"""
+    for entries in _roster_rows(bind, [survivor, duplicate]).values():
+        if len({row.volunteer_id for row in entries}) < 2:
+            continue
+        # _conflicts() let through at most one live row per shift
+        keep = max(entries, key=lambda r: (_is_live(r), r.volunteer_id == survivor))
+        for row in entries:
+            if row.id != keep.id:
+                bind.execute(sa.text("DELETE FROM shifts_roster WHERE id = :row"), {'row': row.id})
+    bind.execute(sa.text("UPDATE shifts_roster SET volunteer_id = :survivor WHERE volunteer_id = :duplicate"),
+                 {'survivor': survivor, 'duplicate': duplicate})
+
+
+def _merge_account(bind, survivor, duplicate):
+    params = {'survivor': survivor, 'duplicate': duplicate}
+    _merge_roster(bind, survivor, duplicate)
+
+    # one waitlist place per shift, and none where the merged account now holds a place
+    bind.execute(sa.text("""
+        DELETE FROM shift_waitlist WHERE volunteer_id = :duplicate AND shift_id IN (
+            SELECT shift_id FROM shift_waitlist WHERE volunteer_id = :survivor
+        )
+    """), params)
+    bind.execute(sa.text("UPDATE shift_waitlist SET volunteer_id = :survivor WHERE volunteer_id = :duplicate"), params)
+    bind.execute(sa.text("""
+        DELETE FROM shift_waitlist WHERE volunteer_id = :survivor AND shift_id IN (
+            SELECT shift_id FROM shifts_roster
+            WHERE volunteer_id = :survivor AND COALESCE(status, '') <> 'cancelled'
+        )
+    """), params)
+
+    bind.execute(sa.text("""
+        DELETE FROM attendance_sync_events WHERE volunteer_id = :duplicate AND client_event_id IN (
+            SELECT client_event_id FROM attendance_sync_events WHERE volunteer_id = :survivor
+        )
+    """), params)
+    bind.execute(sa.text("UPDATE attendance_sync_events SET volunteer_id = :survivor WHERE volunteer_id = :duplicate"), params)
+
+    bind.execute(sa.text("UPDATE transaction_log SET volunteer_id = :survivor WHERE volunteer_id = :duplicate"), params)
+    bind.execute(sa.text("UPDATE global_rules SET updated_by = :survivor WHERE updated_by = :duplicate"), params)
+    bind.execute(sa.text("UPDATE organizations SET user_id = :survivor WHERE user_id = :duplicate"), params)
+    # the survivor's own profile stays; it is recomputed on their next check-out (or flask rebuild-profiles)
+    bind.execute(sa.text("DELETE FROM volunteer_profiles WHERE volunteer_id = :duplicate"), params)
+    bind.execute(sa.text("DELETE FROM users WHERE id = :duplicate"), params)
+
+
+def upgrade():
+    bind = op.get_bind()
+    accounts = bind.execute(sa.text("""
+        SELECT users.id, users.role, lower(trim(users.email)) AS email_key, organizations.id AS org_id
+        FROM users LEFT JOIN organizations ON organizations.user_id = users.id
+        WHERE lower(trim(users.email)) IN (
+            SELECT lower(trim(email)) FROM users GROUP BY lower(trim(email)) HAVING COUNT(*) > 1
+        )
+        ORDER BY email_key, users.id
+    """)).all()
+
+    groups = {}
+    for account in accounts:
+        groups.setdefault(account.email_key, []).append(account)
+
+    conflicts = [conflict for email, group in groups.items() for conflict in _conflicts(bind, email, group)]
+    if conflicts:
+        raise RuntimeError(
+            'Some emails belong to several accounts that can\'t be merged automatically - '
+            'change or merge them by hand first:\n  ' + '\n  '.join(conflicts)
+        )
+
+    for group in groups.values():
+        survivor = next((a for a in group if a.org_id is not None), group[0])
+        for account in group:
+            if account.id != survivor.id:
+                _merge_account(bind, survivor.id, account.id)
+
+    op.execute("UPDATE users SET email = lower(trim(email)) WHERE email <> lower(trim(email))")
+    op.create_index('uq_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_users_email_lower', table_name='users')
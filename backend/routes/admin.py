@@ -1,17 +1,45 @@
+import math
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import text
 from app.config import db
-from app.models import User, GlobalRules, TransactionLog, Organization, Project, Shift
+from app.models import User, GlobalRules, TransactionLog, Organization, Project, Shift, ShiftRoster
+from utils.events import publish_roster_event
+from utils.rules import get_payout_rates
+from utils.serializers import Schema, Field, iso, as_float, fallback
 
 admin_bp = Blueprint('admin', __name__)
 
+TRANSACTION_SCHEMA = Schema(
+    Field("id", TransactionLog.id),
+    Field("volunteer_id", TransactionLog.volunteer_id),
+    Field("volunteer_name", User.name, fallback("Unknown")),
+    Field("amount", TransactionLog.amount, as_float),
+    Field("status", TransactionLog.status),
+    Field("phone", TransactionLog.phone)
+)
+
+PENDING_PAYMENT_SCHEMA = Schema(
+    Field('id', ShiftRoster.id),
+    Field('volunteer_id', User.id),
+    Field('volunteer_name', User.name),
+    Field('volunteer_phone', User.phone),
+    Field('shift_id', Shift.id),
+    Field('shift_title', Shift.title),
+    Field('check_in_time', ShiftRoster.check_in_time, iso),
+    Field('check_out_time', ShiftRoster.check_out_time, iso),
+    Field('beneficiaries_served', ShiftRoster.beneficiaries_served),
+    Field('payout_amount', ShiftRoster.payout_amount),
+    Field('shift_funded_amount', Shift.funded_amount)
+)
+
 def admin_required():
     """Decorator to check if user is admin"""
     try:
         user_id = int(get_jwt_identity())  # Convert string to int
-        user = User.query.get(user_id)
-        if not user or user.role != 'admin':
+        # Only the role is needed - don't load the whole user row
+        role = db.session.query(User.role).filter(User.id == user_id).scalar()
+        if role != 'admin':
             return jsonify({"error": "Admin access required"}), 403
         return None
     except Exception as e:
@@ -118,6 +146,7 @@ def update_global_rules():
     rules.updated_by = user_id
     
     db.session.commit()
+    get_payout_rates.invalidate()
     
     return jsonify({
         "message": "Global rules updated successfully",
@@ -140,29 +169,26 @@ def get_all_transactions():
     per_page = request.args.get('per_page', 50, type=int)
     status = request.args.get('status')  # Optional filter
     
-    query = TransactionLog.query.order_by(TransactionLog.id.desc())
+    # Same defaults as Flask-SQLAlchemy's paginate(error_out=False)
+    page = page if page > 0 else 1
+    per_page = per_page if per_page > 0 else 20
     
-    if status:
-        query = query.filter_by(status=status)
+    query = db.session.query(*TRANSACTION_SCHEMA.columns
+    ).outerjoin(User, User.id == TransactionLog.volunteer_id)
     
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    if status:
+        query = query.filter(TransactionLog.status == status)
     
-    transactions = [{
-        "id": t.id,
-        "volunteer_id": t.volunteer_id,
-        "volunteer_name": t.volunteer.name if t.volunteer else "Unknown",
-        "amount": float(t.amount),
-        "status": t.status,
-        "phone": t.phone
-    } for t in pagination.items]
+    total = query.order_by(None).count()
+    rows = query.order_by(TransactionLog.id.desc()).limit(per_page).offset((page - 1) * per_page).all()
     
     return jsonify({
-        "transactions": transactions,
+        "transactions": TRANSACTION_SCHEMA.dump(rows),
         "pagination": {
-            "page": pagination.page,
-            "per_page": pagination.per_page,
-            "total": pagination.total,
-            "pages": pagination.pages
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "pages": math.ceil(total / per_page)
         }
     }), 200
 
@@ -175,34 +201,16 @@ def get_pending_payments():
     if error_response:
         return error_response
     
-    from app.models import ShiftRoster, Shift
-    
-    # Get all shift roster entries with pending_payment status
-    pending = ShiftRoster.query.filter_by(
-        status='pending_payment',
-        is_paid=False
-    ).all()
-    
-    payments = []
-    for entry in pending:
-        volunteer = User.query.get(entry.volunteer_id)
-        shift = Shift.query.get(entry.shift_id)
-        
-        if volunteer and shift:
-            payments.append({
-                'id': entry.id,
-                'volunteer_id': volunteer.id,
-                'volunteer_name': volunteer.name,
-                'volunteer_phone': volunteer.phone,
-                'shift_id': shift.id,
-                'shift_title': shift.title,
-                'check_in_time': entry.check_in_time.isoformat() if entry.check_in_time else None,
-                'check_out_time': entry.check_out_time.isoformat() if entry.check_out_time else None,
-                'beneficiaries_served': entry.beneficiaries_served,
-                'payout_amount': entry.payout_amount,
-                'shift_funded_amount': shift.funded_amount if hasattr(shift, 'funded_amount') else 0
-            })
+    # Volunteer and shift joined in - one query instead of two lookups per entry
+    rows = db.session.query(*PENDING_PAYMENT_SCHEMA.columns
+    ).join(User, User.id == ShiftRoster.volunteer_id
+    ).join(Shift, Shift.id == ShiftRoster.shift_id
+    ).filter(
+        ShiftRoster.status == 'pending_payment',
+        ShiftRoster.is_paid == False
+    ).order_by(ShiftRoster.id).all()
     
+    payments = PENDING_PAYMENT_SCHEMA.dump(rows)
     return jsonify({
         'pending_payments': payments,
         'total': len(payments)
@@ -266,6 +274,7 @@ def approve_payment(roster_id):
     db.session.add(transaction)
     
     db.session.commit()
+    publish_roster_event(shift.id, 'payout', volunteer.id, amount=payout_amount, roster_id=roster_entry.id)
     
     return jsonify({
         'message': 'Payment approved successfully',
@@ -2,41 +2,36 @@
 Attendance routes for VolaPlace - Check-in/Check-out with geofencing
 """
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
 from app import db
-from app.models import ShiftRoster, Shift, Project, User
-from datetime import datetime
-import math
+from app.models import ShiftRoster, Organization, AttendanceSyncEvent
+from utils.geofence import get_shift_geometry, get_shift_geometries, is_inside, outside_message
+from utils.polygon import prepare_polygon
+from utils.geo import calculate_distances
+from utils.events import publish_roster_event
+from utils.recommendations import refresh_profiles
+from utils.seats import INACTIVE_ROSTER_STATUSES
+from utils.attendance_report import attendance_rows, attendance_stats, serialize_row
+from datetime import datetime, timezone
 
 bp = Blueprint('attendance', __name__)
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """
-    Calculate distance between two coordinates in meters using Haversine formula
-    """
-    R = 6371000  # Earth's radius in meters
-    
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lon2 - lon1)
-    
-    a = math.sin(delta_phi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    
-    distance = R * c
-    return distance
+# Upper bound on events accepted in one offline sync request
+MAX_SYNC_EVENTS = 1000
 
 @bp.route('/check-in', methods=['POST'])
 @jwt_required()
 def check_in():
     """
-    Check in to a shift with geofence validation
+    Check in to a shift with geofence validation.
+    Fast path: role comes from the JWT claims, geometry from the cache and the
+    roster row is checked and updated in a single UPDATE ... RETURNING.
     """
     user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
     
-    if user.role != 'volunteer':
+    if get_jwt().get('role') != 'volunteer':
         return jsonify({'error': 'Only volunteers can check in'}), 403
     
     data = request.get_json()
@@ -49,57 +44,60 @@ def check_in():
     user_lat = float(data['latitude'])
     user_lon = float(data['longitude'])
     
-    # Get shift and project
-    shift = Shift.query.get(shift_id)
-    if not shift:
+    # Get cached shift/project geometry
+    geometry = get_shift_geometry(shift_id)
+    if not geometry:
         return jsonify({'error': 'Shift not found'}), 404
     
-    project = Project.query.get(shift.project_id)
-    if not project:
-        return jsonify({'error': 'Project not found'}), 404
-    
     # Calculate distance from project location
-    distance = calculate_distance(user_lat, user_lon, project.lat, project.lon)
+    distance = calculate_distances([(user_lat, user_lon, geometry.lat, geometry.lon)])[0]
     
-    # Check geofence (project.geofence_radius is in meters)
-    if distance > project.geofence_radius:
+    # Check geofence (polygon if the project has one, else radius in meters)
+    if not is_inside(geometry, user_lat, user_lon, distance):
         return jsonify({
             'error': 'You are outside the geofence area',
             'distance': round(distance, 2),
-            'required': project.geofence_radius,
-            'message': f'You need to be within {project.geofence_radius}m of the project location'
+            'required': geometry.radius,
+            'message': outside_message(geometry)
         }), 403
     
-    # Check if volunteer is registered for this shift
-    roster_entry = ShiftRoster.query.filter_by(
-        shift_id=shift_id,
-        volunteer_id=user_id
+    # Perform check-in only if registered and not yet checked in
+    result = db.session.execute(
+        update(ShiftRoster)
+        .where(
+            ShiftRoster.shift_id == shift_id,
+            ShiftRoster.volunteer_id == user_id,
+            ShiftRoster.check_in_time.is_(None),
+            func.coalesce(ShiftRoster.status, '').notin_(INACTIVE_ROSTER_STATUSES)
+        )
+        .values(check_in_time=datetime.utcnow(), status='checked_in')
+        .returning(ShiftRoster.check_in_time)
+        .execution_options(synchronize_session=False)
     ).first()
     
-    if not roster_entry:
-        return jsonify({'error': 'You are not registered for this shift'}), 403
-    
-    # Check if already checked in
-    if roster_entry.check_in_time:
+    if not result:
+        db.session.rollback()
+        existing = _roster_times(shift_id, user_id)
+        if not existing or not existing.check_in_time:
+            # never registered, or cancelled
+            return jsonify({'error': 'You are not registered for this shift'}), 403
         return jsonify({
             'error': 'Already checked in',
-            'check_in_time': roster_entry.check_in_time.isoformat()
+            'check_in_time': existing.check_in_time.isoformat()
         }), 400
     
-    # Perform check-in
-    roster_entry.check_in_time = datetime.utcnow()
-    roster_entry.status = 'checked_in'
     db.session.commit()
+    publish_roster_event(shift_id, 'check_in', user_id, check_in_time=result.check_in_time.isoformat())
     
     return jsonify({
         'message': 'Checked in successfully',
-        'check_in_time': roster_entry.check_in_time.isoformat(),
+        'check_in_time': result.check_in_time.isoformat(),
         'distance_from_site': round(distance, 2),
         'shift': {
-            'id': shift.id,
-            'title': shift.title,
-            'project_name': project.name,
-            'address': project.address
+            'id': geometry.shift_id,
+            'title': geometry.shift_title,
+            'project_name': geometry.project_name,
+            'address': geometry.address
         }
     }), 200
 
@@ -107,12 +105,11 @@ def check_in():
 @jwt_required()
 def check_out():
     """
-    Check out from a shift
+    Check out from a shift (same single round-trip fast path as check-in)
     """
     user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
     
-    if user.role != 'volunteer':
+    if get_jwt().get('role') != 'volunteer':
         return jsonify({'error': 'Only volunteers can check out'}), 403
     
     data = request.get_json()
@@ -125,110 +122,362 @@ def check_out():
     user_lat = float(data['latitude'])
     user_lon = float(data['longitude'])
     
-    # Get shift and project
-    shift = Shift.query.get(shift_id)
-    if not shift:
+    # Get cached shift/project geometry
+    geometry = get_shift_geometry(shift_id)
+    if not geometry:
         return jsonify({'error': 'Shift not found'}), 404
     
-    project = Project.query.get(shift.project_id)
-    
     # Calculate distance
-    distance = calculate_distance(user_lat, user_lon, project.lat, project.lon)
+    distance = calculate_distances([(user_lat, user_lon, geometry.lat, geometry.lon)])[0]
     
     # Check geofence
-    if distance > project.geofence_radius:
+    if not is_inside(geometry, user_lat, user_lon, distance):
         return jsonify({
             'error': 'You are outside the geofence area',
             'distance': round(distance, 2),
-            'required': project.geofence_radius
+            'required': geometry.radius
         }), 403
     
-    # Get roster entry
-    roster_entry = ShiftRoster.query.filter_by(
-        shift_id=shift_id,
-        volunteer_id=user_id
-    ).first()
-    
-    if not roster_entry:
-        return jsonify({'error': 'You are not registered for this shift'}), 403
+    values = {'check_out_time': datetime.utcnow(), 'status': 'completed'}
     
-    # Check if checked in
-    if not roster_entry.check_in_time:
-        return jsonify({'error': 'You have not checked in yet'}), 400
+    # Update beneficiaries if provided
+    if 'beneficiaries_served' in data:
+        values['beneficiaries_served'] = int(data['beneficiaries_served'])
+    
+    # Perform check-out only if checked in and not yet checked out
+    result = db.session.execute(
+        update(ShiftRoster)
+        .where(
+            ShiftRoster.shift_id == shift_id,
+            ShiftRoster.volunteer_id == user_id,
+            ShiftRoster.check_in_time.isnot(None),
+            ShiftRoster.check_out_time.is_(None)
+        )
+        .values(**values)
+        .returning(ShiftRoster.check_in_time, ShiftRoster.check_out_time, ShiftRoster.beneficiaries_served)
+        .execution_options(synchronize_session=False)
+    ).first()
     
-    # Check if already checked out
-    if roster_entry.check_out_time:
+    if not result:
+        db.session.rollback()
+        existing = _roster_times(shift_id, user_id)
+        if not existing:
+            return jsonify({'error': 'You are not registered for this shift'}), 403
+        if not existing.check_in_time:
+            return jsonify({'error': 'You have not checked in yet'}), 400
         return jsonify({
             'error': 'Already checked out',
-            'check_out_time': roster_entry.check_out_time.isoformat()
+            'check_out_time': existing.check_out_time.isoformat()
         }), 400
     
-    # Perform check-out
-    roster_entry.check_out_time = datetime.utcnow()
-    roster_entry.status = 'completed'
-    
-    # Update beneficiaries if provided
-    if 'beneficiaries_served' in data:
-        roster_entry.beneficiaries_served = int(data['beneficiaries_served'])
-    
+    # the UPDATEs bypassed the ORM - the attended shift goes into the
+    # volunteer's profile here rather than on the check-in fast path
+    refresh_profiles(db.session.connection(), [user_id])
     db.session.commit()
+    publish_roster_event(
+        shift_id, 'check_out', user_id,
+        check_out_time=result.check_out_time.isoformat(),
+        beneficiaries_served=result.beneficiaries_served
+    )
     
     # Calculate hours worked
-    time_diff = roster_entry.check_out_time - roster_entry.check_in_time
+    time_diff = result.check_out_time - result.check_in_time
     hours_worked = time_diff.total_seconds() / 3600
     
     return jsonify({
         'message': 'Checked out successfully',
-        'check_out_time': roster_entry.check_out_time.isoformat(),
+        'check_out_time': result.check_out_time.isoformat(),
         'hours_worked': round(hours_worked, 2),
-        'beneficiaries_served': roster_entry.beneficiaries_served,
+        'beneficiaries_served': result.beneficiaries_served,
         'payment_eligible': True,
         'shift': {
-            'id': shift.id,
-            'title': shift.title
+            'id': geometry.shift_id,
+            'title': geometry.shift_title
         }
     }), 200
 
-@bp.route('/shift/<int:shift_id>', methods=['GET'])
+def _roster_times(shift_id, user_id):
+    """Load check-in/out times to explain why a conditional update matched nothing"""
+    return db.session.query(
+        ShiftRoster.check_in_time, ShiftRoster.check_out_time
+    ).filter_by(shift_id=shift_id, volunteer_id=user_id).first()
+
+def _parse_event_time(value):
+    """Parse an ISO-8601 client timestamp into naive UTC (how the roster stores times)"""
+    event_time = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if event_time.tzinfo:
+        event_time = event_time.astimezone(timezone.utc).replace(tzinfo=None)
+    return event_time
+
+@bp.route('/sync', methods=['POST'])
 @jwt_required()
-def get_shift_attendance(shift_id):
+def sync_events():
     """
-    Get attendance records for a specific shift (org admins only)
+    Apply a batch of check-in/check-out events queued offline by a volunteer's phone.
+    Expected JSON: {
+        "events": [{
+            "client_event_id": "uuid", "type": "check_in" | "check_out",
+            "shift_id": 1, "latitude": -1.26, "longitude": 36.8,
+            "timestamp": "2026-01-20T08:01:00Z", "beneficiaries_served": 4
+        }]
+    }
+    Events are deduplicated by client_event_id, geofences are validated for the
+    whole batch at once and everything is applied in a single transaction.
     """
     user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
     
-    if user.role not in ['org_admin', 'admin']:
-        return jsonify({'error': 'Unauthorized'}), 403
+    if get_jwt().get('role') != 'volunteer':
+        return jsonify({'error': 'Only volunteers can sync attendance'}), 403
+    
+    data = request.get_json() or {}
+    events = data.get('events')
+    
+    if not isinstance(events, list) or not events:
+        return jsonify({'error': 'events must be a non-empty list'}), 400
     
-    # Get all roster entries for the shift
-    roster_entries = ShiftRoster.query.filter_by(shift_id=shift_id).all()
+    if len(events) > MAX_SYNC_EVENTS:
+        return jsonify({'error': f'Too many events (max {MAX_SYNC_EVENTS} per sync)'}), 400
     
-    attendance = []
-    for entry in roster_entries:
-        volunteer = User.query.get(entry.volunteer_id)
+    results = [None] * len(events)
+    parsed = []
+    seen_ids = set()
+    now = datetime.utcnow()
+    
+    # Validate event shape and drop repeats within the batch
+    for index, event in enumerate(events):
+        client_event_id = str(event.get('client_event_id') or '')[:64] if isinstance(event, dict) else ''
+        
+        if not client_event_id:
+            results[index] = {'client_event_id': None, 'status': 'rejected', 'error': 'client_event_id is required'}
+            continue
         
-        hours_worked = None
-        if entry.check_in_time and entry.check_out_time:
-            time_diff = entry.check_out_time - entry.check_in_time
-            hours_worked = round(time_diff.total_seconds() / 3600, 2)
+        if client_event_id in seen_ids:
+            results[index] = {'client_event_id': client_event_id, 'status': 'duplicate'}
+            continue
+        seen_ids.add(client_event_id)
         
-        attendance.append({
-            'volunteer_id': entry.volunteer_id,
-            'volunteer_name': volunteer.name,
-            'status': entry.status,
-            'check_in_time': entry.check_in_time.isoformat() if entry.check_in_time else None,
-            'check_out_time': entry.check_out_time.isoformat() if entry.check_out_time else None,
-            'hours_worked': hours_worked,
-            'beneficiaries_served': entry.beneficiaries_served
-        })
+        try:
+            if event.get('type') not in ('check_in', 'check_out'):
+                raise ValueError('type must be check_in or check_out')
+            parsed.append({
+                'index': index,
+                'client_event_id': client_event_id,
+                'type': event['type'],
+                'shift_id': int(event['shift_id']),
+                'lat': float(event['latitude']),
+                'lon': float(event['longitude']),
+                # Never trust a clock that claims the future
+                'time': min(_parse_event_time(event['timestamp']), now),
+                'beneficiaries_served': int(event.get('beneficiaries_served', 0) or 0)
+            })
+        except (KeyError, TypeError, ValueError) as e:
+            results[index] = {'client_event_id': client_event_id, 'status': 'rejected', 'error': f'Invalid event: {e}'}
+    
+    # Events already applied by an earlier (possibly interrupted) sync
+    if parsed:
+        previous = {
+            row.client_event_id: row for row in db.session.query(
+                AttendanceSyncEvent.client_event_id, AttendanceSyncEvent.status, AttendanceSyncEvent.error
+            ).filter(
+                AttendanceSyncEvent.volunteer_id == user_id,
+                AttendanceSyncEvent.client_event_id.in_([e['client_event_id'] for e in parsed])
+            )
+        }
+        fresh = []
+        for e in parsed:
+            row = previous.get(e['client_event_id'])
+            if row:
+                results[e['index']] = {
+                    'client_event_id': row.client_event_id,
+                    'status': 'duplicate',
+                    'original_status': row.status,
+                    'error': row.error
+                }
+            else:
+                fresh.append(e)
+        parsed = fresh
+    
+    # Geofence validation for the whole batch in one pass
+    geometries = get_shift_geometries([e['shift_id'] for e in parsed])
+    located = [e for e in parsed if e['shift_id'] in geometries]
+    distances = calculate_distances([
+        (e['lat'], e['lon'], geometries[e['shift_id']].lat, geometries[e['shift_id']].lon)
+        for e in located
+    ])
+    for e, distance in zip(located, distances):
+        e['distance'] = distance
+        e['inside'] = distance <= geometries[e['shift_id']].radius
+    
+    # Polygon fences are tested per shift with the bulk containment check
+    by_shift = {}
+    for e in located:
+        if geometries[e['shift_id']].polygon:
+            by_shift.setdefault(e['shift_id'], []).append(e)
+    for shift_id, shift_events in by_shift.items():
+        fence = prepare_polygon(geometries[shift_id].polygon)
+        for e, inside in zip(shift_events, fence.contains_many([(e['lat'], e['lon']) for e in shift_events])):
+            e['inside'] = inside
+    
+    # Lock this volunteer's roster rows for every shift in the batch
+    roster = {
+        entry.shift_id: entry for entry in ShiftRoster.query.filter(
+            ShiftRoster.volunteer_id == user_id,
+            ShiftRoster.shift_id.in_(list(geometries))
+        ).with_for_update()
+    } if geometries else {}
+    
+    # Apply in the order things happened on site
+    log = []
+    for e in sorted(parsed, key=lambda e: e['time']):
+        error = None
+        geometry = geometries.get(e['shift_id'])
+        entry = roster.get(e['shift_id'])
+        
+        if not geometry:
+            error = 'Shift not found'
+        elif not e['inside']:
+            error = f'Outside the geofence area ({round(e["distance"], 2)}m from site)'
+        elif not entry or entry.status in INACTIVE_ROSTER_STATUSES:
+            error = 'You are not registered for this shift'
+        elif e['type'] == 'check_in':
+            if entry.check_in_time:
+                error = 'Already checked in'
+            else:
+                entry.check_in_time = e['time']
+                entry.status = 'checked_in'
+        else:
+            if not entry.check_in_time:
+                error = 'You have not checked in yet'
+            elif entry.check_out_time:
+                error = 'Already checked out'
+            elif e['time'] < entry.check_in_time:
+                error = 'Check-out time is before check-in time'
+            else:
+                entry.check_out_time = e['time']
+                entry.status = 'completed'
+                if e['beneficiaries_served']:
+                    entry.beneficiaries_served = e['beneficiaries_served']
+        
+        status = 'rejected' if error else 'applied'
+        results[e['index']] = {'client_event_id': e['client_event_id'], 'status': status, 'error': error}
+        log.append(AttendanceSyncEvent(
+            volunteer_id=user_id,
+            client_event_id=e['client_event_id'],
+            shift_id=e['shift_id'] if geometry else None,
+            event_type=e['type'],
+            event_time=e['time'],
+            status=status,
+            error=error
+        ))
+    
+    db.session.add_all(log)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another sync of the same events won the race - the client can safely retry
+        db.session.rollback()
+        return jsonify({'error': 'These events are already being synced, please retry'}), 409
+    
+    for entry in log:
+        if entry.status == 'applied':
+            publish_roster_event(
+                entry.shift_id, entry.event_type, user_id,
+                event_time=entry.event_time.isoformat(), offline=True
+            )
+    
+    return jsonify({
+        'results': results,
+        'applied': sum(1 for r in results if r['status'] == 'applied'),
+        'rejected': sum(1 for r in results if r['status'] == 'rejected'),
+        'duplicates': sum(1 for r in results if r['status'] == 'duplicate')
+    }), 200
+
+@bp.route('/shift/<int:shift_id>', methods=['GET'])
+@jwt_required()
+def get_shift_attendance(shift_id):
+    """
+    Get attendance records for a specific shift (org admins only)
+    """
+    if get_jwt().get('role') not in ['org_admin', 'admin']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    # Rows with volunteer names and hours from one joined query, counts from one aggregate
+    rows = attendance_rows(shift_id=shift_id)
+    stats = attendance_stats(shift_id=shift_id).get(shift_id)
     
     return jsonify({
         'shift_id': shift_id,
-        'total_volunteers': len(attendance),
-        'checked_in': len([a for a in attendance if a['status'] in ['checked_in', 'completed']]),
-        'completed': len([a for a in attendance if a['status'] == 'completed']),
-        'attendance': attendance
+        'total_volunteers': stats.total_volunteers if stats else 0,
+        'checked_in': int(stats.checked_in or 0) if stats else 0,
+        'completed': int(stats.completed or 0) if stats else 0,
+        'attendance': [serialize_row(row) for row in rows]
+    }), 200
+
+@bp.route('/report', methods=['GET'])
+@jwt_required()
+def get_attendance_report():
+    """
+    Attendance report across many shifts (org admins see their own organization only).
+    Query params: project_id, start_date, end_date (YYYY-MM-DD), include_rows (default true).
+    """
+    user_id = int(get_jwt_identity())
+    role = get_jwt().get('role')
+    
+    if role not in ['org_admin', 'admin']:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    project_id = request.args.get('project_id', type=int)
+    include_rows = request.args.get('include_rows', 'true').lower() != 'false'
+    
+    try:
+        start_date = datetime.strptime(request.args['start_date'], '%Y-%m-%d').date() if request.args.get('start_date') else None
+        end_date = datetime.strptime(request.args['end_date'], '%Y-%m-%d').date() if request.args.get('end_date') else None
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+    
+    if project_id is None and start_date is None and end_date is None:
+        return jsonify({'error': 'Provide project_id and/or a start_date/end_date range'}), 400
+    
+    scope = {'project_id': project_id, 'start_date': start_date, 'end_date': end_date}
+    if role == 'org_admin':
+        org_id = db.session.query(Organization.id).filter(Organization.user_id == user_id).scalar()
+        if not org_id:
+            return jsonify({'error': 'Organization not found'}), 404
+        scope['org_id'] = org_id
+    
+    stats = attendance_stats(**scope)
+    rows_by_shift = {}
+    if include_rows:
+        for row in attendance_rows(**scope):
+            rows_by_shift.setdefault(row.shift_id, []).append(serialize_row(row))
+    
+    shifts = []
+    for shift_id, stat in stats.items():
+        shift_report = {
+            'shift_id': shift_id,
+            'title': stat.title,
+            'date': stat.date.isoformat() if stat.date else None,
+            'project_id': stat.project_id,
+            'total_volunteers': stat.total_volunteers,
+            'checked_in': int(stat.checked_in or 0),
+            'completed': int(stat.completed or 0),
+            'hours_worked': round(stat.hours_worked or 0, 2),
+            'beneficiaries_served': int(stat.beneficiaries_served or 0)
+        }
+        if include_rows:
+            shift_report['attendance'] = rows_by_shift.get(shift_id, [])
+        shifts.append(shift_report)
+    
+    return jsonify({
+        'shifts': shifts,
+        'totals': {
+            'shifts': len(shifts),
+            'total_volunteers': sum(s['total_volunteers'] for s in shifts),
+            'checked_in': sum(s['checked_in'] for s in shifts),
+            'completed': sum(s['completed'] for s in shifts),
+            'hours_worked': round(sum(s['hours_worked'] for s in shifts), 2),
+            'beneficiaries_served': sum(s['beneficiaries_served'] for s in shifts)
+        }
     }), 200
 
 @bp.route('/test', methods=['GET'])
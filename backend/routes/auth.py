@@ -3,10 +3,13 @@ Auth routes for VolaPlace.
 Handles user registration, login, and profile management.
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, get_jwt
 from app.models import User
 from app.config import db
 from utils.conflict_validation import validate_phone_unique
+from utils.provisioning import (
+    MAX_BULK_USERS, VALID_ROLES, ProvisioningConflict, parse_csv, parse_records, provision_users
+)
 import re
 
 bp = Blueprint('auth', __name__)
@@ -41,8 +44,8 @@ def register():
         if not re.match(r'^254\d{9}$', data['phone']):
             return jsonify({"error": "Invalid phone format. Use 254XXXXXXXXX (e.g., 254712345678)"}), 400
         
-        # Prevent duplicate registrations
-        if User.query.filter_by(email=data['email']).first():
+        # Prevent duplicate registrations (emails are case-insensitive)
+        if User.by_email(data['email']):
             return jsonify({"error": "Email already registered"}), 409
         
         # Use validation utility for phone uniqueness
@@ -80,6 +83,57 @@ def register():
         return jsonify({"error": f"Registration failed: {str(e)}"}), 500
 
 
+@bp.route('/register/bulk', methods=['POST'])
+@jwt_required()
+def bulk_register():
+    """
+    Provision many users at once, e.g. a partner's volunteer spreadsheet.
+    Expected: a CSV (multipart `file` or a text/csv body) with columns
+    name, email, phone, password[, role, mpesa_phone], or JSON {
+        "users": [{"name": ..., "email": ..., "phone": ..., "password": ...}],
+        "role": "volunteer",   # for rows without one
+        "dry_run": false
+    }
+    Organization admins can only create volunteers. Returns a result per row.
+    """
+    try:
+        role = get_jwt().get('role')
+        if role not in ['org_admin', 'admin']:
+            return jsonify({"error": "Only admins can provision users"}), 403
+        allowed_roles = VALID_ROLES if role == 'admin' else ('volunteer',)
+        
+        data = request.get_json(silent=True) or {}
+        default_role = request.args.get('role') or data.get('role') or 'volunteer'
+        dry_run = request.args.get('dry_run', '').lower() in ('1', 'true') or data.get('dry_run') is True
+        try:
+            if 'file' in request.files:
+                rows = parse_csv(request.files['file'].read().decode('utf-8-sig'), default_role)
+            elif request.mimetype == 'text/csv':
+                rows = parse_csv(request.get_data(as_text=True), default_role)
+            else:
+                rows = parse_records(data.get('users'), default_role)
+        except (ValueError, UnicodeDecodeError) as e:
+            return jsonify({"error": str(e)}), 400
+        if len(rows) > MAX_BULK_USERS:
+            return jsonify({"error": f"At most {MAX_BULK_USERS} users per request - use `flask provision-users` for larger files"}), 400
+        
+        try:
+            summary, results = provision_users(rows, allowed_roles=allowed_roles, dry_run=dry_run)
+        except ProvisioningConflict as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 409
+        
+        if dry_run:
+            db.session.rollback()
+        else:
+            db.session.commit()
+        return jsonify({**summary, "results": results}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": f"Bulk registration failed: {str(e)}"}), 500
+
+
 @bp.route('/login', methods=['POST'])
 def login():
     """
@@ -97,7 +151,7 @@ def login():
             return jsonify({"error": "Email and password are required"}), 400
         
         # Verify user exists and password matches
-        user = User.query.filter_by(email=data['email']).first()
+        user = User.by_email(data['email'])
         
         if not user or not user.check_password(data['password']):
             return jsonify({"error": "Invalid email or password"}), 401
@@ -0,0 +1,141 @@
+"""
+Live roster streams for VolaPlace dashboards (Server-Sent Events).
+One open connection per dashboard replaces polling the shift and attendance lists.
+EventSource can't set headers, so the JWT may also be passed as ?jwt=<token>.
+
+Each open stream holds a worker thread (gthread) for up to STREAM_MAX_SECONDS,
+so a threaded worker only lets half its threads stream and answers the rest
+with 503 - run many dashboards on GUNICORN_WORKER_CLASS=gevent, or route
+/api/live to a separate gevent process. LIVE_MAX_STREAMS overrides the limit.
+"""
+import json
+import os
+import time
+from flask import Blueprint, Response, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from app.config import db
+from app.models import Organization, ShiftRoster
+from utils.events import broker
+from utils.geofence import get_shift_geometry
+from utils.seats import INACTIVE_ROSTER_STATUSES
+
+bp = Blueprint('live', __name__)
+
+HEARTBEAT_SECONDS = 15
+# Streams end after this long and EventSource reconnects, so a worker is never held forever
+STREAM_MAX_SECONDS = 300
+
+
+def _max_streams():
+    """Streams one process may hold open - gthread keeps half its threads for ordinary requests"""
+    if os.environ.get('LIVE_MAX_STREAMS'):
+        return int(os.environ['LIVE_MAX_STREAMS'])
+    worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+    if worker_class == 'gevent':
+        return int(os.environ.get('GUNICORN_CONNECTIONS', 500)) // 2
+    if worker_class == 'gthread':
+        return max(int(os.environ.get('GUNICORN_THREADS', 8)) // 2, 1)
+    # a sync worker would be taken over by its first stream
+    return 0
+
+
+MAX_STREAMS = _max_streams()
+
+
+def _format_sse(event, event_id=None, data=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data, default=str)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def _stream(subscription, snapshot=None):
+    """Yield SSE frames for a subscription until the stream times out or the client leaves"""
+    try:
+        yield 'retry: 3000\n\n'
+        if snapshot is not None:
+            yield _format_sse('snapshot', data=snapshot)
+        
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        while time.monotonic() < deadline:
+            event = subscription.get(timeout=HEARTBEAT_SECONDS)
+            if subscription.overflowed:
+                # We dropped deltas - tell the client to refetch instead of drifting
+                subscription.overflowed = False
+                yield _format_sse('resync', data={'reason': 'events dropped'})
+            if event is None:
+                yield ': keepalive\n\n'
+                continue
+            yield _format_sse(event['type'], event_id=event['id'], data=event)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def _streams_full():
+    # every open stream holds one subscription
+    return broker.subscriber_count() >= MAX_STREAMS
+
+
+def _busy():
+    return jsonify({'error': 'Too many live streams open on this server - retry shortly'}), 503, {'Retry-After': '30'}
+
+
+def _sse_response(generator):
+    return Response(generator, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # disable proxy buffering (nginx/Render)
+    })
+
+
+def _can_watch_org(org_id):
+    claims = get_jwt()
+    if claims.get('role') == 'admin':
+        return True
+    if claims.get('role') != 'org_admin':
+        return False
+    owner_id = db.session.query(Organization.user_id).filter(Organization.id == org_id).scalar()
+    return owner_id == int(get_jwt_identity())
+
+
+@bp.route('/shifts/<int:shift_id>/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_shift(shift_id):
+    """Stream roster changes (register, check_in, check_out, payout) for one shift"""
+    geometry = get_shift_geometry(shift_id)
+    if not geometry:
+        return jsonify({'error': 'Shift not found'}), 404
+    
+    if not _can_watch_org(geometry.org_id):
+        return jsonify({'error': 'Unauthorized'}), 403
+    if _streams_full():
+        return _busy()
+    
+    # Subscribe before taking the snapshot so nothing falls in between
+    subscription = broker.subscribe(f'shift:{shift_id}')
+    
+    counts = dict(db.session.query(
+        ShiftRoster.status, db.func.count(ShiftRoster.id)
+    ).filter(ShiftRoster.shift_id == shift_id).group_by(ShiftRoster.status).all())
+    
+    snapshot = {
+        'shift_id': shift_id,
+        # cancelled sign-ups are listed in status_counts but aren't volunteers on the shift
+        'total_volunteers': sum(n for status, n in counts.items() if status not in INACTIVE_ROSTER_STATUSES),
+        'status_counts': counts
+    }
+    return _sse_response(_stream(subscription, snapshot))
+
+
+@bp.route('/organizations/<int:org_id>/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_organization(org_id):
+    """Stream roster changes for every shift of an organization"""
+    if not _can_watch_org(org_id):
+        return jsonify({'error': 'Unauthorized'}), 403
+    if _streams_full():
+        return _busy()
+    
+    subscription = broker.subscribe(f'org:{org_id}')
+    return _sse_response(_stream(subscription))
@@ -2,32 +2,32 @@
 Organizations routes for VolaPlace.
 """
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.models import Organization, Project, User
 from app.config import db
+from utils.response_cache import cached_response, owner_scope
 
 bp = Blueprint('organizations', __name__)
 
 @bp.route('', methods=['GET'])
 @jwt_required()
+@cached_response('organizations', scope=owner_scope)
 def get_organizations():
     """Get all organizations or user's organization"""
     try:
         user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
         
-        if user.role == 'admin':
-            # Admin can see all organizations
-            orgs = Organization.query.all()
-        else:
+        query = db.session.query(Organization.id, Organization.name, Organization.user_id)
+        if get_jwt().get('role') != 'admin':
             # Org admin sees only their organization
-            orgs = Organization.query.filter_by(user_id=user_id).all()
+            query = query.filter(Organization.user_id == user_id)
+        # Admin can see all organizations
         
         return jsonify([{
             'id': org.id,
             'name': org.name,
             'user_id': org.user_id
-        } for org in orgs]), 200
+        } for org in query.order_by(Organization.id)]), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
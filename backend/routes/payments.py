@@ -6,14 +6,19 @@ Flow:
 1. Organization Admin funds shifts via STK Push (money INTO the platform)
 2. Volunteers checkout and receive payment from funded shifts (simulated transfer)
 """
+import logging
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app import db
-from app.models import TransactionLog, ShiftRoster, Shift, User, GlobalRules, Organization, Project
+from app.models import TransactionLog, ShiftRoster, Shift, User, Organization, Project
+from app.replicas import primary_only
 from utils.mpesa import mpesa
+from utils.events import publish_roster_event
+from utils.rules import get_payout_rates
 from datetime import datetime
 
 bp = Blueprint('payments', __name__)
+logger = logging.getLogger('volaplace.payments')
 
 
 # ============================================
@@ -66,12 +71,18 @@ def fund_shift():
     if not phone:
         return jsonify({'error': 'No phone number configured for M-Pesa. Please update your profile with a valid phone number.'}), 400
     
+    shift_title = shift.title
+    
+    # End the read transaction so the pooled DB connection isn't held while
+    # we wait on Safaricom (threads/greenlets outnumber pool connections)
+    db.session.commit()
+    
     # Initiate M-Pesa STK Push to the ADMIN (not volunteer!)
     result = mpesa.stk_push(
         phone_number=phone,
         amount=int(amount),
         account_reference=f"FUND-SHIFT-{shift_id}",
-        transaction_desc=f"Fund shift: {shift.title}"
+        transaction_desc=f"Fund shift: {shift_title}"
     )
     
     if result['success']:
@@ -201,9 +212,7 @@ def checkout_complete():
     time_diff = roster.check_out_time - roster.check_in_time
     hours_worked = time_diff.total_seconds() / 3600
     
-    rules = GlobalRules.query.first()
-    base_rate = rules.base_hourly_rate if rules else 100.0
-    bonus_per_beneficiary = rules.bonus_per_beneficiary if rules else 10.0
+    base_rate, bonus_per_beneficiary = get_payout_rates()
     
     base_payment = hours_worked * base_rate
     beneficiary_bonus = beneficiaries_served * bonus_per_beneficiary
@@ -236,6 +245,13 @@ def checkout_complete():
     db.session.add(transaction)
     
     db.session.commit()
+    publish_roster_event(
+        shift_id, 'check_out', user_id,
+        check_out_time=roster.check_out_time.isoformat(),
+        beneficiaries_served=beneficiaries_served,
+        status=roster.status
+    )
+    publish_roster_event(shift_id, 'payout', user_id, amount=total_amount)
     
     return jsonify({
         'message': 'Checkout successful! Payment processed from organization funds.',
@@ -265,9 +281,7 @@ def calculate_payment():
     beneficiaries = data.get('beneficiaries', 0)
     
     # Get payment rules
-    rules = GlobalRules.query.first()
-    base_rate = rules.base_hourly_rate if rules else 100.0
-    bonus_per_beneficiary = rules.bonus_per_beneficiary if rules else 10.0
+    base_rate, bonus_per_beneficiary = get_payout_rates()
     
     base_payment = float(hours) * base_rate
     beneficiary_bonus = int(beneficiaries) * bonus_per_beneficiary
@@ -306,26 +320,29 @@ def mpesa_callback():
     """
     data = request.get_json()
     
-    print("M-Pesa Callback Received:", data)
-    
     result = data.get('Body', {}).get('stkCallback', {})
     result_code = result.get('ResultCode')
     checkout_request_id = result.get('CheckoutRequestID')
     
+    # Full payload (includes the payer's phone number) only at debug level
+    logger.debug('M-Pesa callback payload', extra={'payload': data})
+    
     if result_code == 0:
         # Payment successful - find and update the shift
-        print(f"✅ Funding successful: {checkout_request_id}")
+        logger.info('Funding successful', extra={'checkout_request_id': checkout_request_id})
         
         # Find shift by funding_transaction_id
         shift = Shift.query.filter_by(funding_transaction_id=checkout_request_id).first()
         if shift:
             shift.is_funded = True
             db.session.commit()
-            print(f"✅ Shift {shift.id} marked as funded")
+            logger.info('Shift marked as funded', extra={'shift_id': shift.id, 'checkout_request_id': checkout_request_id})
     else:
         # Payment failed
         result_desc = result.get('ResultDesc')
-        print(f"❌ Funding failed: {result_desc}")
+        logger.warning('Funding failed: %s', result_desc, extra={
+            'checkout_request_id': checkout_request_id, 'result_code': result_code
+        })
     
     return jsonify({'message': 'Callback received'}), 200
 
@@ -336,11 +353,12 @@ def mpesa_callback():
 
 @bp.route('/shift/<int:shift_id>/status', methods=['GET'])
 @jwt_required()
+@primary_only  # polled right after the M-Pesa callback marks the shift funded
 def get_shift_funding_status(shift_id):
     """
     Get funding status for a specific shift
     """
-    shift = Shift.query.get(shift_id)
+    shift = db.session.query(Shift.title, Shift.is_funded, Shift.funded_amount).filter(Shift.id == shift_id).first()
     if not shift:
         return jsonify({'error': 'Shift not found'}), 404
     
@@ -366,31 +384,40 @@ def get_pending_payments():
     Get pending/completed payments for current user
     """
     user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-    
-    if user.role == 'volunteer':
-        # Get volunteer's payments
-        rosters = ShiftRoster.query.filter_by(volunteer_id=user_id).all()
+    role = get_jwt().get('role')
+    
+    if role == 'volunteer':
+        # Get volunteer's payments - shift title joined in, unpaid entries filtered in SQL
+        rosters = db.session.query(
+            ShiftRoster.shift_id, Shift.title, ShiftRoster.payout_amount,
+            ShiftRoster.is_paid, ShiftRoster.paid_at, ShiftRoster.status
+        ).outerjoin(Shift, Shift.id == ShiftRoster.shift_id
+        ).filter(
+            ShiftRoster.volunteer_id == user_id,
+            ShiftRoster.payout_amount > 0
+        ).order_by(ShiftRoster.id).all()
         
         return jsonify({
             'payments': [{
                 'shift_id': r.shift_id,
-                'shift_title': r.shift.title if r.shift else 'Unknown',
+                'shift_title': r.title or 'Unknown',
                 'amount': r.payout_amount,
                 'is_paid': r.is_paid,
                 'paid_at': r.paid_at.isoformat() if r.paid_at else None,
                 'status': r.status
-            } for r in rosters if r.payout_amount and r.payout_amount > 0]
+            } for r in rosters]
         }), 200
     
-    elif user.role == 'org_admin':
+    elif role == 'org_admin':
         # Get organization's funded shifts
-        org = Organization.query.filter_by(user_id=user_id).first()
-        if not org:
+        org_id = db.session.query(Organization.id).filter(Organization.user_id == user_id).scalar()
+        if not org_id:
             return jsonify({'error': 'Organization not found'}), 404
         
-        project_ids = [p.id for p in org.projects]
-        shifts = Shift.query.filter(Shift.project_id.in_(project_ids)).all()
+        shifts = db.session.query(
+            Shift.id, Shift.title, Shift.is_funded, Shift.funded_amount, Shift.date
+        ).join(Project, Project.id == Shift.project_id
+        ).filter(Project.org_id == org_id).order_by(Shift.id).all()
         
         return jsonify({
             'shifts': [{
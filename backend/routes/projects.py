@@ -2,45 +2,49 @@
 Projects routes for VolaPlace.
 """
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from app.models import Project, Organization, User
 from app.config import db
+from utils.response_cache import cached_response, org_admin_scope
+from utils.polygon import encode_polyline, decode_polyline, validate_polygon, prepare_polygon
+from utils.geo import calculate_distances
+from utils.serializers import Schema, Field, iso
 
 bp = Blueprint('projects', __name__)
 
+# Upper bound on points tested in one geofence/contains request
+MAX_CONTAINS_POINTS = 10000
+
+PROJECT_LIST_SCHEMA = Schema(
+    Field('id', Project.id),
+    Field('name', Project.name),
+    Field('description', Project.description),
+    Field('lat', Project.lat),
+    Field('lon', Project.lon),
+    Field('address', Project.address),
+    Field('geofence_radius', Project.geofence_radius),
+    Field('geofence_polygon', Project.geofence_polygon),
+    Field('org_id', Project.org_id),
+    Field('created_at', Project.created_at, iso)
+)
+
 @bp.route('', methods=['GET'])
 @jwt_required()
+@cached_response('projects', 'organizations', scope=org_admin_scope)
 def get_projects():
     """Get all projects - filtered by user role"""
     try:
         user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        role = get_jwt().get('role')
         
-        if user.role == 'admin':
-            # Admin can see all projects
-            projects = Project.query.all()
-        elif user.role == 'org_admin':
+        query = db.session.query(*PROJECT_LIST_SCHEMA.columns)
+        if role == 'org_admin':
             # Org admin only sees their organization's projects
-            org = Organization.query.filter_by(user_id=user_id).first()
-            if org:
-                projects = org.projects
-            else:
-                projects = []
-        else:
-            # Volunteers can see all projects (for browsing shifts)
-            projects = Project.query.all()
+            query = query.join(Organization, Organization.id == Project.org_id
+            ).filter(Organization.user_id == user_id)
+        # Admins and volunteers see all projects (volunteers browse for shifts)
             
-        return jsonify([{
-            'id': p.id,
-            'name': p.name,
-            'description': p.description,
-            'lat': p.lat,
-            'lon': p.lon,
-            'address': p.address,
-            'geofence_radius': p.geofence_radius,
-            'org_id': p.org_id,
-            'created_at': p.created_at.isoformat() if p.created_at else None
-        } for p in projects]), 200
+        return jsonify(PROJECT_LIST_SCHEMA.dump(query.order_by(Project.id).all())), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -63,6 +67,14 @@ def create_project():
             if field not in data:
                 return jsonify({'error': f'{field} is required'}), 400
         
+        # Optional polygon fence - list of [lat, lon] points
+        geofence_polygon = None
+        if data.get('geofence_polygon'):
+            points, error_msg = validate_polygon(data['geofence_polygon'])
+            if error_msg:
+                return jsonify({'error': error_msg}), 400
+            geofence_polygon = encode_polyline(points)
+        
         # Get or create organization for this user
         org = Organization.query.filter_by(user_id=user_id).first()
         if not org:
@@ -78,6 +90,7 @@ def create_project():
             lon=float(data['lon']),
             address=data.get('address', ''),
             geofence_radius=data.get('geofence_radius', 100),
+            geofence_polygon=geofence_polygon,
             org_id=org.id
         )
         
@@ -92,6 +105,7 @@ def create_project():
             'lon': project.lon,
             'address': project.address,
             'geofence_radius': project.geofence_radius,
+            'geofence_polygon': project.geofence_polygon,
             'org_id': project.org_id
         }), 201
         
@@ -124,3 +138,97 @@ def delete_project(project_id):
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+
+@bp.route('/<int:project_id>/geofence', methods=['PUT'])
+@jwt_required()
+def update_geofence(project_id):
+    """
+    Set or clear a project's polygon geofence, and/or change its radius.
+    Expected JSON: {"polygon": [[lat, lon], ...], "geofence_radius": 150} -
+    send "polygon": null to fall back to the radius; leave it out to keep it.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        user = User.query.get(user_id)
+        
+        project = Project.query.get(project_id)
+        if not project:
+            return jsonify({'error': 'Project not found'}), 404
+        
+        # Check ownership
+        org = Organization.query.get(project.org_id)
+        if org.user_id != user_id and user.role != 'admin':
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        data = request.get_json() or {}
+        
+        if 'geofence_radius' in data:
+            radius = data['geofence_radius']
+            try:
+                radius = int(radius) if not isinstance(radius, bool) else None
+            except (TypeError, ValueError):
+                radius = None
+            if radius is None or radius <= 0:
+                return jsonify({'error': 'geofence_radius must be a positive number of meters'}), 400
+            project.geofence_radius = radius
+        
+        if 'polygon' in data:
+            if data['polygon'] is None:
+                project.geofence_polygon = None
+            else:
+                points, error_msg = validate_polygon(data['polygon'])
+                if error_msg:
+                    return jsonify({'error': error_msg}), 400
+                project.geofence_polygon = encode_polyline(points)
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Geofence updated successfully',
+            'id': project.id,
+            'geofence_radius': project.geofence_radius,
+            'geofence_polygon': project.geofence_polygon,
+            'points': decode_polyline(project.geofence_polygon) if project.geofence_polygon else None
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/<int:project_id>/geofence/contains', methods=['POST'])
+@jwt_required()
+def geofence_contains(project_id):
+    """
+    Test many points against one project's geofence.
+    Expected JSON: {"points": [[lat, lon], ...]}
+    """
+    project = Project.query.get(project_id)
+    if not project:
+        return jsonify({'error': 'Project not found'}), 404
+    
+    data = request.get_json() or {}
+    points = data.get('points')
+    if not isinstance(points, list):
+        return jsonify({'error': 'points must be a list of [lat, lon] pairs'}), 400
+    if len(points) > MAX_CONTAINS_POINTS:
+        return jsonify({'error': f'At most {MAX_CONTAINS_POINTS} points per request'}), 400
+    
+    try:
+        points = [(float(p[0]), float(p[1])) for p in points]
+    except (TypeError, ValueError, IndexError):
+        return jsonify({'error': 'points must be a list of [lat, lon] pairs'}), 400
+    
+    if project.geofence_polygon:
+        results = prepare_polygon(project.geofence_polygon).contains_many(points)
+        fence = 'polygon'
+    else:
+        distances = calculate_distances([(lat, lon, project.lat, project.lon) for lat, lon in points])
+        results = [distance <= project.geofence_radius for distance in distances]
+        fence = 'radius'
+    
+    return jsonify({
+        'project_id': project.id,
+        'fence': fence,
+        'results': results,
+        'inside': sum(results)
+    }), 200
@@ -1,44 +1,324 @@
+import logging
+import math
+from datetime import date, datetime
 from flask import Blueprint, jsonify, request
-from app.models import Shift
+from sqlalchemy import or_
+from app.models import Shift, Project, Organization, SearchDocument
 from app.config import db
 from utils.geo import calculate_distance
+from utils.sql import day_of_week
+from utils.response_cache import cached_response
+from utils.serializers import Schema, Field, Nested, iso, hhmm, or_false, or_zero
+from utils.fulltext import search_terms, text_match
 
 # create the blueprint
 api_bp = Blueprint('api', __name__)
+logger = logging.getLogger('volaplace.search')
 
-# get shifts  - search logic - http://localhost:5000/api/shifts?lat=-1.26&log=36.8 
+# fraction of search requests that emit a debug line.
+DEBUG_SAMPLE_RATE = 0.01
+
+# filtered searches are paged.
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+DAY_NAMES = {'mon': 1, 'tue': 2, 'wed': 3, 'thu': 4, 'fri': 5, 'sat': 6, 'sun': 7}
+FILTER_PARAMS = ('date_from', 'date_to', 'time_from', 'time_to', 'days', 'radius_km', 'available', 'funded')
+SEARCH_TYPES = ('shift', 'project', 'organization')
+# filters that only make sense for shifts - using one limits a text search to shifts
+SHIFT_FILTER_PARAMS = tuple(p for p in FILTER_PARAMS if p != 'radius_km')
+TEXT_SEARCH_LIMIT = 20
+KM_PER_DEGREE = 6371.0 * math.pi / 180
+
+# same fields as Shift.to_dict(), selected as plain columns.
+SEARCH_SCHEMA = Schema(
+    Field("id", Shift.id),
+    Field("title", Shift.title),
+    Field("description", Shift.description),
+    Field("date", Shift.date, iso),
+    Field("start_time", Shift.start_time, hhmm),
+    Field("end_time", Shift.end_time, hhmm),
+    Field("max_volunteers", Shift.max_volunteers),
+    Field("status", Shift.status),
+    Field("is_funded", Shift.is_funded, or_false),
+    Field("funded_amount", Shift.funded_amount, or_zero),
+    Field("funding_transaction_id", Shift.funding_transaction_id),
+    Field("open_seats", Shift.open_seats),
+    Nested("project",
+        Field("name", Project.name),
+        Field("lat", Project.lat),
+        Field("lon", Project.lon),
+        Field("geofence_radius", Project.geofence_radius),
+        when=Project.id
+    )
+)
+
+# text search hits, hydrated per type after ranking.
+PROJECT_HIT_SCHEMA = Schema(
+    Field("id", Project.id),
+    Field("name", Project.name),
+    Field("description", Project.description),
+    Field("address", Project.address),
+    Field("lat", Project.lat),
+    Field("lon", Project.lon),
+    Nested("organization",
+        Field("id", Organization.id),
+        Field("name", Organization.name),
+        when=Organization.id
+    )
+)
+ORGANIZATION_HIT_SCHEMA = Schema(
+    Field("id", Organization.id),
+    Field("name", Organization.name),
+    Field("description", Organization.description),
+)
+
+def _parse_bool(value, name):
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(f'{name} must be true or false')
+
+
+def _parse_days(value):
+    days = set()
+    for part in filter(None, (p.strip().lower() for p in value.split(','))):
+        day = DAY_NAMES.get(part[:3]) if not part.isdigit() else int(part)
+        if day not in range(1, 8):
+            raise ValueError('days must be names (sat,sun) or ISO numbers 1-7 (Monday = 1)')
+        days.add(day)
+    return days
+
+
+def parse_search_filters(args):
+    """
+    Query-string filters for the shift search. Raises ValueError with a
+    message for the client on bad input.
+      date_from, date_to   YYYY-MM-DD (filtered searches start today by default)
+      time_from, time_to   HH:MM - the shift starts at/after time_from and ends by time_to
+      days                 sat,sun or 6,7
+      radius_km            needs lat & log
+      available            true = seats left (or no limit)
+      funded               true / false
+      limit, offset        paging (limit defaults to 100, max 500)
+    """
+    filters = {}
+    try:
+        for name in ('date_from', 'date_to'):
+            if args.get(name):
+                filters[name] = datetime.strptime(args[name], '%Y-%m-%d').date()
+        for name in ('time_from', 'time_to'):
+            if args.get(name):
+                filters[name] = datetime.strptime(args[name], '%H:%M').time()
+    except ValueError:
+        raise ValueError('Dates must be YYYY-MM-DD and times HH:MM')
+
+    if args.get('days'):
+        filters['days'] = _parse_days(args['days'])
+    if args.get('radius_km'):
+        filters['radius_km'] = args.get('radius_km', type=float)
+        if filters['radius_km'] is None or filters['radius_km'] <= 0:
+            raise ValueError('radius_km must be a positive number')
+    for name in ('available', 'funded'):
+        if args.get(name):
+            filters[name] = _parse_bool(args[name], name)
+
+    if filters:
+        filters.setdefault('date_from', date.today())
+        filters['limit'] = min(max(args.get('limit', DEFAULT_LIMIT, type=int) or DEFAULT_LIMIT, 1), MAX_LIMIT)
+        filters['offset'] = max(args.get('offset', 0, type=int) or 0, 0)
+    return filters
+
+
+def project_distance_sq(lat, lon):
+    """
+    Squared distance in km^2 from (lat, lon) to the joined project, as SQL.
+    Flat-earth around the search point - within a fraction of a percent of the
+    haversine distance at search radii, and plain arithmetic on every dialect,
+    so radius searches can be filtered, ordered and paged in the database.
+    """
+    dy = (Project.lat - lat) * KM_PER_DEGREE
+    dx = (Project.lon - lon) * (KM_PER_DEGREE * math.cos(math.radians(lat)))
+    return dy * dy + dx * dx
+
+
+def apply_search_filters(query, filters, lat=None, lon=None):
+    """Add the filters to a query joined to Project (radius searches need lat/lon)"""
+    if 'date_from' in filters:
+        query = query.filter(Shift.date >= filters['date_from'])
+    if 'date_to' in filters:
+        query = query.filter(Shift.date <= filters['date_to'])
+    if 'time_from' in filters:
+        query = query.filter(Shift.start_time >= filters['time_from'])
+    if 'time_to' in filters:
+        query = query.filter(Shift.end_time <= filters['time_to'])
+    if 'days' in filters:
+        query = query.filter(day_of_week(Shift.date).in_(sorted(filters['days'])))
+    if filters.get('available') is True:
+        query = query.filter(or_(Shift.open_seats.is_(None), Shift.open_seats > 0))
+    elif filters.get('available') is False:
+        query = query.filter(Shift.open_seats <= 0)
+    if filters.get('funded') is True:
+        query = query.filter(Shift.is_funded == True)
+    elif filters.get('funded') is False:
+        query = query.filter(or_(Shift.is_funded == False, Shift.is_funded.is_(None)))
+    if 'radius_km' in filters:
+        # bounding box on the (lat, lon) index, then the circle
+        dlat = filters['radius_km'] / 111.0
+        dlon = filters['radius_km'] / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+        query = query.filter(Project.lat.between(lat - dlat, lat + dlat), Project.lon.between(lon - dlon, lon + dlon))
+        query = query.filter(project_distance_sq(lat, lon) <= filters['radius_km'] ** 2)
+    return query
+
+
+# get shifts  - search logic - http://localhost:5000/api/shifts?lat=-1.26&log=36.8
+# filtered: /api/shifts?lat=-1.26&log=36.8&radius_km=5&days=sat&time_from=06:00&time_to=12:00&available=true
 @api_bp.route('/api/shifts', methods=['GET'])
+@cached_response('shifts', 'projects', scope='public')
 def get_shifts():
     # get user cordinates from query parameters.
     user_lat = request.args.get("lat", type = float)
     user_log = request.args.get("log", type=float)
 
-    # fetch all active shifts.
-    all_shifts = Shift.query.all()
-    shifts_list = []
+    try:
+        filters = parse_search_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if 'radius_km' in filters and (user_lat is None or user_log is None):
+        return jsonify({'error': 'radius_km needs lat and log'}), 400
+
+    # project columns are joined in - no lazy load per shift.
+    # a distance search needs the project, so it can start from the nearby projects instead.
+    query = db.session.query(*SEARCH_SCHEMA.columns)
+    if 'radius_km' in filters:
+        query = query.join(Project, Project.id == Shift.project_id)
+    else:
+        query = query.outerjoin(Project, Project.id == Shift.project_id)
+    if filters:
+        query = apply_search_filters(query, filters, user_lat, user_log)
+        if 'radius_km' in filters:
+            # paged in SQL, closest first
+            query = query.order_by(project_distance_sq(user_lat, user_log), Shift.date, Shift.start_time, Shift.id)
+        else:
+            # paged in SQL, in (date, start_time) index order
+            query = query.order_by(Shift.date, Shift.start_time, Shift.id)
+        query = query.limit(filters['limit']).offset(filters['offset'])
+    shifts_list = SEARCH_SCHEMA.dump(query.all())
 
-    for shift in all_shifts:
-        shift_data = shift.to_dict()
+    for shift_data in shifts_list:
+        project = shift_data['project']
 
-        print(f"shift: {user_lat}, {user_log} | Project: {shift.project.lat if shift.project else 'NO PROJECT'}")
         # if user provided GPS calculate distance to project site 
-        if user_lat is not None and user_log is not None:
-            distance = calculate_distance(user_lat, user_log, shift.project.lat, shift.project.lon)
+        if user_lat is not None and user_log is not None and project:
+            distance = calculate_distance(user_lat, user_log, project['lat'], project['lon'])
             shift_data['distance_km'] = distance
             
             # get given radius else 100 by default.
-            radius = shift.project.geofence_radius or 100
+            radius = project['geofence_radius'] or 100
             shift_data['is_within_radius'] = distance <= radius
         else:
             shift_data['distance_km'] = None
             shift_data['is_within_radius'] = False
 
-        shifts_list.append(shift_data)
-
-    # sort by distances if coordinates were provided.
-    if user_lat is not None and user_log is not None:
+    # sort by distances if coordinates were provided (filtered searches keep their SQL paging order).
+    if user_lat is not None and user_log is not None and not filters:
         # shifts with calculated distance come first - sorted closest first.
         shifts_list.sort( key = lambda x: x['distance_km'] if x['distance_km'] is not None else float('inf') )
+
+    # one sampled line per request instead of a print per shift.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('Shift search', extra={
+            'lat': user_lat, 'lon': user_log, 'shifts': len(shifts_list),
+            'without_project': sum(1 for s in shifts_list if s['project'] is None),
+            'sample_rate': DEBUG_SAMPLE_RATE
+        })
     
     return jsonify(shifts_list), 200
 
+
+def _hydrate(entity_type, ids):
+    """Hit fields per id, one query per type"""
+    if not ids:
+        return {}
+    if entity_type == 'shift':
+        query = db.session.query(*SEARCH_SCHEMA.columns).outerjoin(Project, Project.id == Shift.project_id)\
+            .filter(Shift.id.in_(ids))
+        rows = SEARCH_SCHEMA.dump(query.all())
+    elif entity_type == 'project':
+        query = db.session.query(*PROJECT_HIT_SCHEMA.columns).outerjoin(Organization, Organization.id == Project.org_id)\
+            .filter(Project.id.in_(ids))
+        rows = PROJECT_HIT_SCHEMA.dump(query.all())
+    else:
+        rows = ORGANIZATION_HIT_SCHEMA.dump(
+            db.session.query(*ORGANIZATION_HIT_SCHEMA.columns).filter(Organization.id.in_(ids)).all()
+        )
+    return {row['id']: row for row in rows}
+
+
+def _hit_location(entity_type, data):
+    if entity_type == 'shift':
+        return (data['project']['lat'], data['project']['lon']) if data['project'] else (None, None)
+    if entity_type == 'project':
+        return data['lat'], data['lon']
+    return None, None
+
+
+# full-text search - http://localhost:5000/api/search?q=tree+planting
+# narrowed: /api/search?q=beach&type=shift&lat=-4.04&log=39.67&radius_km=10&days=sat,sun
+@api_bp.route('/api/search', methods=['GET'])
+@cached_response('shifts', 'projects', 'organizations', scope='public')
+def search():
+    text = request.args.get('q', '')
+    if not search_terms(text):
+        return jsonify({'error': 'q is required'}), 400
+
+    types = [t.strip() for t in request.args.get('type', ','.join(SEARCH_TYPES)).split(',') if t.strip()]
+    if not types or any(t not in SEARCH_TYPES for t in types):
+        return jsonify({'error': f'type must be one or more of {", ".join(SEARCH_TYPES)}'}), 400
+
+    user_lat = request.args.get("lat", type=float)
+    user_log = request.args.get("log", type=float)
+    try:
+        filters = parse_search_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if 'radius_km' in filters and (user_lat is None or user_log is None):
+        return jsonify({'error': 'radius_km needs lat and log'}), 400
+
+    shift_filters = any(request.args.get(name) for name in SHIFT_FILTER_PARAMS)
+    if shift_filters:
+        types = [t for t in types if t == 'shift']
+    if 'radius_km' in filters:
+        # organizations have no location
+        types = [t for t in types if t != 'organization']
+    if not types:
+        return jsonify({'error': 'Shift filters only apply to type=shift'}), 400
+    limit = min(max(request.args.get('limit', TEXT_SEARCH_LIMIT, type=int) or TEXT_SEARCH_LIMIT, 1), MAX_LIMIT)
+    offset = max(request.args.get('offset', 0, type=int) or 0, 0)
+
+    # rank the matching documents first, then load only the page being returned
+    query = db.session.query(SearchDocument.entity_type, SearchDocument.entity_id)
+    query, rank = text_match(query, text, db.engine.dialect.name)
+    query = query.add_columns(rank.label('rank')).filter(SearchDocument.entity_type.in_(types))
+    if shift_filters:
+        query = query.join(Shift, Shift.id == SearchDocument.entity_id)
+    if shift_filters or 'radius_km' in filters:
+        query = query.join(Project, Project.id == SearchDocument.project_id)
+        query = apply_search_filters(query, filters if shift_filters else {'radius_km': filters['radius_km']},
+                                     user_lat, user_log)
+    query = query.order_by(rank.desc(), SearchDocument.entity_type, SearchDocument.entity_id).limit(limit).offset(offset)
+    hits = query.all()
+
+    found = {t: _hydrate(t, [h.entity_id for h in hits if h.entity_type == t]) for t in types}
+    results = []
+    for hit in hits:
+        data = found[hit.entity_type].get(hit.entity_id)
+        if data is None:
+            continue
+        result = {'type': hit.entity_type, 'rank': round(float(hit.rank), 4), **data}
+        if user_lat is not None and user_log is not None:
+            lat, lon = _hit_location(hit.entity_type, data)
+            result['distance_km'] = calculate_distance(user_lat, user_log, lat, lon) if lat is not None and lon is not None else None
+        results.append(result)
+
+    return jsonify(results), 200
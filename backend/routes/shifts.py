@@ -2,11 +2,23 @@
 Shifts routes for VolaPlace.
 """
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import Shift, Project, Organization, User
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from sqlalchemy import and_, or_, update
+from sqlalchemy.exc import IntegrityError
+from app.models import Shift, Project, Organization, User, ShiftRoster, ShiftWaitlist
 from app.config import db
-from datetime import datetime, time as dt_time
+from datetime import datetime, time as dt_time, timedelta
 from utils.conflict_validation import validate_shift_time_conflict, validate_volunteer_shift_limit
+from utils.events import publish_roster_event
+from utils.response_cache import cached_response
+from utils.roster_import import RosterImportConflict, import_roster, parse_csv, parse_json
+from utils.rules import get_payout_rates
+from utils.recommendations import recommend_shifts
+from utils.seats import (
+    claim_seat, adjust_open_seats, recounted_open_seats, active_roster_count, lock_volunteer, INACTIVE_ROSTER_STATUSES
+)
+from utils.serializers import Schema, Field, Nested, iso, or_false, or_zero
+from utils.waitlist import promote_waitlisted, waitlist_position, leave_waitlist
 
 bp = Blueprint('shifts', __name__)
 
@@ -72,105 +84,138 @@ def create_shift():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# Columns returned by the shift list, selected straight from the DB (see utils/serializers.py)
+SHIFT_LIST_SCHEMA = Schema(
+    Field('id', Shift.id),
+    Field('title', Shift.title),
+    Field('description', Shift.description),
+    Field('date', Shift.date, iso),
+    Field('shift_date', Shift.date, iso),  # Alias for frontend
+    Field('start_time', Shift.start_time, iso),
+    Field('end_time', Shift.end_time, iso),
+    Field('max_volunteers', Shift.max_volunteers),
+    Field('required_volunteers', Shift.max_volunteers),  # Alias for frontend
+    Field('status', Shift.status),
+    Field('project_id', Shift.project_id),
+    Nested('project',
+        Field('name', Project.name),
+        Field('lat', Project.lat),
+        Field('lon', Project.lon),
+        Field('geofence_radius', Project.geofence_radius),
+        when=Project.id
+    ),
+    # Funding fields - always include them since they exist on the model
+    Field('is_funded', Shift.is_funded, or_false),
+    Field('funded_amount', Shift.funded_amount, or_zero)
+)
+
+SHIFT_DETAIL_SCHEMA = Schema(
+    Field('id', Shift.id),
+    Field('title', Shift.title),
+    Field('description', Shift.description),
+    Field('date', Shift.date, iso),
+    Field('start_time', Shift.start_time, iso),
+    Field('end_time', Shift.end_time, iso),
+    Field('max_volunteers', Shift.max_volunteers),
+    Field('status', Shift.status),
+    Nested('project',
+        Field('id', Project.id),
+        Field('name', Project.name),
+        Field('description', Project.description),
+        Field('lat', Project.lat),
+        Field('lon', Project.lon),
+        Field('geofence_radius', Project.geofence_radius),
+        when=Project.id
+    )
+)
+
 @bp.route('', methods=['GET'])
 @jwt_required()
 def get_shifts():
     """Get all shifts - optionally filtered by project_id"""
     try:
-        from datetime import datetime as dt, timedelta
-        from sqlalchemy.orm import joinedload
-        
         user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        role = get_jwt().get('role')
         
         project_id = request.args.get('project_id', type=int)
         
-        # Start with base query - EAGER LOAD roster to prevent N+1 queries
-        query = Shift.query.options(joinedload(Shift.roster))
+        # Filters shared by the status update and the list query
+        filters = []
         
         # CRITICAL: Filter by specific project_id FIRST if provided
         if project_id:
-            query = query.filter(Shift.project_id == project_id)
+            filters.append(Shift.project_id == project_id)
             
             # Additional security check for org_admin
-            if user.role == 'org_admin':
-                project = Project.query.get(project_id)
-                if project:
-                    org = Organization.query.filter_by(user_id=user_id).first()
-                    if org and project.org_id != org.id:
-                        # Unauthorized - return empty list
-                        return jsonify([]), 200
+            if role == 'org_admin':
+                project_org_id = db.session.query(Project.org_id).filter(Project.id == project_id).scalar()
+                org_id = db.session.query(Organization.id).filter(Organization.user_id == user_id).scalar()
+                if project_org_id and org_id and project_org_id != org_id:
+                    # Unauthorized - return empty list
+                    return jsonify([]), 200
         
         # If no specific project requested, filter by user's organization
-        elif user.role == 'org_admin':
-            org = Organization.query.filter_by(user_id=user_id).first()
-            if org:
-                project_ids = [p.id for p in org.projects]
-                query = query.filter(Shift.project_id.in_(project_ids))
-        
-        shifts = query.order_by(Shift.date.desc()).all()
-        
-        # Auto-update shift status based on current time
-        now = dt.now()
-        for s in shifts:
-            if s.date and s.start_time:
-                # Combine date and time
-                shift_datetime = dt.combine(s.date, s.start_time)
-                # Add 1 minute buffer
-                start_threshold = shift_datetime + timedelta(minutes=1)
-                
-                if s.status == 'upcoming' and now >= start_threshold:
-                    s.status = 'in_progress'
-                    db.session.add(s)
-        
+        elif role == 'org_admin':
+            org_id = db.session.query(Organization.id).filter(Organization.user_id == user_id).scalar()
+            if org_id:
+                filters.append(Shift.project_id.in_(
+                    db.session.query(Project.id).filter(Project.org_id == org_id)
+                ))
+        
+        # Auto-update shift status based on current time (1 minute buffer after start)
+        threshold = datetime.now() - timedelta(minutes=1)
+        db.session.execute(
+            update(Shift)
+            .where(
+                Shift.status == 'upcoming',
+                or_(
+                    Shift.date < threshold.date(),
+                    and_(Shift.date == threshold.date(), Shift.start_time <= threshold.time())
+                ),
+                *filters
+            )
+            .values(status='in_progress')
+            .execution_options(synchronize_session=False)
+        )
         db.session.commit()
         
-        # For volunteers, include their roster entry status
-        result = []
-        for s in shifts:
-            shift_data = {
-                'id': s.id,
-                'title': s.title,
-                'description': s.description,
-                'date': s.date.isoformat() if s.date else None,
-                'shift_date': s.date.isoformat() if s.date else None,  # Alias for frontend
-                'start_time': s.start_time.isoformat() if s.start_time else None,
-                'end_time': s.end_time.isoformat() if s.end_time else None,
-                'max_volunteers': s.max_volunteers,
-                'required_volunteers': s.max_volunteers,  # Alias for frontend
-                'status': s.status,
-                'project_id': s.project_id,
-                'project': {
-                    'name': s.project.name,
-                    'lat': s.project.lat,
-                    'lon': s.project.lon,
-                    'geofence_radius': s.project.geofence_radius
-                } if s.project else None,
-                'volunteers_signed_up': len(s.roster) if s.roster else 0,
-                # Funding fields - always include them since they exist on the model
-                'is_funded': s.is_funded or False,
-                'funded_amount': s.funded_amount or 0.0
-            }
+        # Roster size per shift in one grouped subquery
+        signed_up = db.session.query(
+            ShiftRoster.shift_id, db.func.count(ShiftRoster.id).label('count')
+        ).filter(
+            db.func.coalesce(ShiftRoster.status, '').notin_(INACTIVE_ROSTER_STATUSES)
+        ).group_by(ShiftRoster.shift_id).subquery()
+        
+        columns = SHIFT_LIST_SCHEMA.columns + [signed_up.c.count]
+        query = db.session.query(*columns
+        ).outerjoin(Project, Project.id == Shift.project_id
+        ).outerjoin(signed_up, signed_up.c.shift_id == Shift.id)
+        
+        # For volunteers, join their own roster entry
+        is_volunteer = role == 'volunteer'
+        if is_volunteer:
+            query = query.add_columns(
+                ShiftRoster.id, ShiftRoster.status, ShiftRoster.check_in_time,
+                ShiftRoster.check_out_time, ShiftRoster.payout_amount, ShiftRoster.beneficiaries_served
+            ).outerjoin(ShiftRoster, and_(ShiftRoster.shift_id == Shift.id, ShiftRoster.volunteer_id == user_id))
+        
+        rows = query.filter(*filters).order_by(Shift.date.desc()).all()
+        
+        count_index = len(SHIFT_LIST_SCHEMA.columns)
+        result = SHIFT_LIST_SCHEMA.dump(rows)
+        for shift_data, row in zip(result, rows):
+            shift_data['volunteers_signed_up'] = row[count_index] or 0
             
             # If user is a volunteer, include their roster entry status
-            # FIX: Use preloaded roster instead of new query (prevents N+1)
-            if user.role == 'volunteer':
-                # Find roster entry from already loaded data
-                roster_entry = next(
-                    (entry for entry in s.roster if entry.volunteer_id == user_id),
-                    None
-                )
-                
-                if roster_entry:
-                    shift_data['roster_status'] = roster_entry.status
-                    shift_data['check_in_time'] = roster_entry.check_in_time.isoformat() if roster_entry.check_in_time else None
-                    shift_data['check_out_time'] = roster_entry.check_out_time.isoformat() if roster_entry.check_out_time else None
-                    shift_data['payout_amount'] = roster_entry.payout_amount
-                    shift_data['beneficiaries_served'] = roster_entry.beneficiaries_served
-                    # Override shift status with roster status for volunteer's view
-                    shift_data['status'] = roster_entry.status
-            
-            result.append(shift_data)
+            if is_volunteer and row[count_index + 1] is not None:
+                roster_status, check_in, check_out, payout, beneficiaries = row[count_index + 2:]
+                shift_data['roster_status'] = roster_status
+                shift_data['check_in_time'] = iso(check_in)
+                shift_data['check_out_time'] = iso(check_out)
+                shift_data['payout_amount'] = payout
+                shift_data['beneficiaries_served'] = beneficiaries
+                # Override shift status with roster status for volunteer's view
+                shift_data['status'] = roster_status
         
         return jsonify(result), 200
         
@@ -215,10 +260,18 @@ def update_shift(shift_id):
             shift.end_time = datetime.strptime(data['end_time'], '%H:%M').time()
         if 'required_volunteers' in data:
             shift.max_volunteers = data['required_volunteers']
+            shift.open_seats = recounted_open_seats(shift.max_volunteers)
         if 'status' in data:
             shift.status = data['status']
         
+        # A higher limit (or reopening the shift) seats waitlisted volunteers
+        promoted = []
+        if 'required_volunteers' in data or 'status' in data:
+            promoted = promote_waitlisted(shift)
+        
         db.session.commit()
+        for entry in promoted:
+            publish_roster_event(shift_id, 'register', entry.volunteer_id, status='registered', from_waitlist=True)
         
         return jsonify({
             'message': 'Shift updated successfully',
@@ -263,8 +316,8 @@ def delete_shift(shift_id):
                 'error': f'Cannot delete funded shift. This shift has KES {shift.funded_amount:,.2f} in funding. Please refund first.'
             }), 400
         
-        # Check if shift has volunteers assigned
-        if shift.roster and len(shift.roster) > 0:
+        # Check if shift has volunteers assigned (cancelled sign-ups don't count)
+        if any(entry.status not in INACTIVE_ROSTER_STATUSES for entry in shift.roster):
             return jsonify({'error': 'Cannot delete shift with assigned volunteers'}), 400
         
         db.session.delete(shift)
@@ -302,15 +355,22 @@ def register_for_shift(shift_id):
         if shift.status not in ['upcoming', 'in_progress']:
             return jsonify({'error': 'Can only register for upcoming or in-progress shifts'}), 400
         
+        # One sign-up at a time per volunteer, so a double tap can't pass the checks below twice
+        lock_volunteer(user_id)
+        
         # Check if already registered
         existing = ShiftRoster.query.filter_by(
             shift_id=shift_id, 
             volunteer_id=user_id
         ).first()
         
-        if existing:
+        if existing and existing.status not in INACTIVE_ROSTER_STATUSES:
             return jsonify({'error': 'Already registered for this shift'}), 400
         
+        position = waitlist_position(shift_id, user_id)
+        if position:
+            return jsonify({'error': 'Already on the waitlist for this shift', 'waitlist_position': position}), 400
+        
         # Validate daily shift limit
         is_valid, error_msg = validate_volunteer_shift_limit(user_id, shift.date)
         if not is_valid:
@@ -323,20 +383,40 @@ def register_for_shift(shift_id):
         if not is_valid:
             return jsonify({'error': error_msg}), 400
         
-        # Check if shift is full
-        current_count = ShiftRoster.query.filter_by(shift_id=shift_id).count()
-        if current_count >= shift.max_volunteers:
-            return jsonify({'error': 'Shift is full'}), 400
+        # Take a place - a conditional UPDATE, so concurrent sign-ups can't overbook
+        if not claim_seat(shift_id):
+            db.session.rollback()
+            # Full - queue for the next free place unless the client opted out ({"waitlist": false})
+            if (request.get_json(silent=True) or {}).get('waitlist') is False:
+                return jsonify({'error': 'Shift is full'}), 400
+            db.session.add(ShiftWaitlist(shift_id=shift_id, volunteer_id=user_id))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # a concurrent request already queued this volunteer
+                db.session.rollback()
+            position = waitlist_position(shift_id, user_id)
+            publish_roster_event(shift_id, 'waitlist', user_id, waitlist_position=position)
+            return jsonify({
+                'message': 'Shift is full - you have been added to the waitlist',
+                'waitlisted': True,
+                'waitlist_position': position
+            }), 202
         
-        # Create roster entry
-        roster_entry = ShiftRoster(
-            shift_id=shift_id,
-            volunteer_id=user_id,
-            status='registered'
-        )
+        # Create roster entry (or reactivate a cancelled one)
+        if existing:
+            roster_entry = existing
+            roster_entry.status = 'registered'
+        else:
+            roster_entry = ShiftRoster(
+                shift_id=shift_id,
+                volunteer_id=user_id,
+                status='registered'
+            )
+            db.session.add(roster_entry)
         
-        db.session.add(roster_entry)
         db.session.commit()
+        publish_roster_event(shift_id, 'register', user_id, status='registered')
         
         return jsonify({
             'message': 'Successfully registered for shift',
@@ -348,6 +428,79 @@ def register_for_shift(shift_id):
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/<int:shift_id>/cancel', methods=['POST'])
+@jwt_required()
+def cancel_registration(shift_id):
+    """Cancel a sign-up (or leave the waitlist) - the freed place goes to the next waitlisted volunteer"""
+    try:
+        user_id = int(get_jwt_identity())
+        if get_jwt().get('role') != 'volunteer':
+            return jsonify({'error': 'Only volunteers can cancel registrations'}), 403
+        
+        shift = Shift.query.get(shift_id)
+        if not shift:
+            return jsonify({'error': 'Shift not found'}), 404
+        
+        if leave_waitlist(shift_id, user_id):
+            db.session.commit()
+            publish_roster_event(shift_id, 'waitlist_leave', user_id)
+            return jsonify({'message': 'Removed from the waitlist'}), 200
+        
+        # Only sign-ups not yet checked in - conditional, so a racing check-in or double tap can't cancel twice
+        result = db.session.execute(
+            update(ShiftRoster)
+            .where(
+                ShiftRoster.shift_id == shift_id,
+                ShiftRoster.volunteer_id == user_id,
+                ShiftRoster.status == 'registered',
+                ShiftRoster.check_in_time.is_(None)
+            )
+            .values(status='cancelled')
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.session.rollback()
+            existing = ShiftRoster.query.filter_by(shift_id=shift_id, volunteer_id=user_id).first()
+            if not existing or existing.status in INACTIVE_ROSTER_STATUSES:
+                return jsonify({'error': 'You are not registered for this shift'}), 404
+            return jsonify({'error': 'Cannot cancel after checking in'}), 400
+        
+        # Free the place and hand it on in the same transaction
+        adjust_open_seats(shift_id, result.rowcount)
+        promoted = promote_waitlisted(shift)
+        db.session.commit()
+        
+        publish_roster_event(shift_id, 'cancel', user_id, status='cancelled')
+        for entry in promoted:
+            publish_roster_event(shift_id, 'register', entry.volunteer_id, status='registered', from_waitlist=True)
+        
+        return jsonify({
+            'message': 'Registration cancelled',
+            'promoted_from_waitlist': len(promoted)
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/<int:shift_id>/waitlist', methods=['GET'])
+@jwt_required()
+def get_waitlist(shift_id):
+    """Queue length, plus the caller's own place when they are waitlisted"""
+    try:
+        user_id = int(get_jwt_identity())
+        length = db.session.query(db.func.count(ShiftWaitlist.id)).filter(ShiftWaitlist.shift_id == shift_id).scalar()
+        return jsonify({
+            'shift_id': shift_id,
+            'waitlist_length': length,
+            'your_position': waitlist_position(shift_id, user_id)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/<int:shift_id>/checkin', methods=['POST'])
 @jwt_required()
 def checkin_shift(shift_id):
@@ -372,14 +525,18 @@ def checkin_shift(shift_id):
             volunteer_id=user_id
         ).first()
         
-        if not roster_entry:
-            # Auto-register if not already registered
-            roster_entry = ShiftRoster(
-                shift_id=shift_id,
-                volunteer_id=user_id,
-                status='registered'
-            )
-            db.session.add(roster_entry)
+        if not roster_entry or roster_entry.status in INACTIVE_ROSTER_STATUSES:
+            # Auto-register if not already registered (or after cancelling)
+            if not roster_entry:
+                roster_entry = ShiftRoster(
+                    shift_id=shift_id,
+                    volunteer_id=user_id,
+                    status='registered'
+                )
+                db.session.add(roster_entry)
+            # Walk-ins are let in even when the shift is full, and leave its waitlist
+            adjust_open_seats(shift_id, -1)
+            leave_waitlist(shift_id, user_id)
         
         if roster_entry.check_in_time:
             return jsonify({'error': 'Already checked in'}), 400
@@ -392,6 +549,7 @@ def checkin_shift(shift_id):
             shift.status = 'in_progress'
         
         db.session.commit()
+        publish_roster_event(shift_id, 'check_in', user_id, check_in_time=roster_entry.check_in_time.isoformat())
         
         return jsonify({
             'message': 'Checked in successfully',
@@ -408,7 +566,7 @@ def checkin_shift(shift_id):
 def checkout_shift(shift_id):
     """Check out from a shift - payment comes from pre-funded shift budget"""
     try:
-        from app.models import ShiftRoster, GlobalRules, TransactionLog
+        from app.models import ShiftRoster, TransactionLog
         from datetime import datetime
         
         user_id = int(get_jwt_identity())
@@ -446,9 +604,7 @@ def checkout_shift(shift_id):
         time_diff = roster_entry.check_out_time - roster_entry.check_in_time
         hours_worked = time_diff.total_seconds() / 3600
         
-        rules = GlobalRules.query.first()
-        base_rate = rules.base_hourly_rate if rules else 100.0
-        bonus_per_beneficiary = rules.bonus_per_beneficiary if rules else 10.0
+        base_rate, bonus_per_beneficiary = get_payout_rates()
         
         base_payment = hours_worked * base_rate
         beneficiary_bonus = beneficiaries_served * bonus_per_beneficiary
@@ -469,6 +625,13 @@ def checkout_shift(shift_id):
             payment_message = 'Check-out successful. Payment pending admin approval.'
         
         db.session.commit()
+        publish_roster_event(
+            shift_id, 'check_out', user_id,
+            check_out_time=roster_entry.check_out_time.isoformat(),
+            beneficiaries_served=beneficiaries_served,
+            status=roster_entry.status,
+            payout_amount=total_amount
+        )
         
         return jsonify({
             'message': f'Checked out successfully! {payment_message}',
@@ -485,36 +648,102 @@ def checkout_shift(shift_id):
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/roster-import', methods=['POST'])
+@jwt_required()
+def import_shift_roster():
+    """
+    Bulk-register volunteers on the organization's shifts from a CSV (multipart
+    `file` or a text/csv body) or JSON {"rows": [{shift_id, phone, email}]}.
+    `shift_id` (query or JSON) is the shift for rows without one; `dry_run`
+    only checks. Valid rows are imported, the rest reported per row.
+    """
+    try:
+        user = User.query.get(int(get_jwt_identity()))
+        if user.role not in ['org_admin', 'admin']:
+            return jsonify({'error': 'Only organization admins can import rosters'}), 403
+        
+        data = request.get_json(silent=True) or {}
+        default_shift_id = request.args.get('shift_id', type=int) or data.get('shift_id')
+        dry_run = request.args.get('dry_run', '').lower() in ('1', 'true') or data.get('dry_run') is True
+        try:
+            if default_shift_id is not None:
+                default_shift_id = int(default_shift_id)
+            if 'file' in request.files:
+                rows = parse_csv(request.files['file'].read().decode('utf-8-sig'), default_shift_id)
+            elif request.mimetype == 'text/csv':
+                rows = parse_csv(request.get_data(as_text=True), default_shift_id)
+            else:
+                rows = parse_json(data.get('rows'), default_shift_id)
+        except (TypeError, ValueError, UnicodeDecodeError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        try:
+            report, accepted = import_roster(rows, user, dry_run=dry_run)
+        except RosterImportConflict as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 409
+        
+        if dry_run:
+            db.session.rollback()
+            return jsonify(report), 200
+        
+        db.session.commit()
+        for shift_id, volunteer_ids in accepted.items():
+            publish_roster_event(shift_id, 'roster_import', volunteer_ids=volunteer_ids, status='registered')
+        return jsonify(report), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/recommended', methods=['GET'])
+@jwt_required()
+def get_recommended_shifts():
+    """Open shifts ranked for the signed-in volunteer - optional lat/log override their usual area"""
+    try:
+        user_id = int(get_jwt_identity())
+        if get_jwt().get('role') != 'volunteer':
+            return jsonify({'error': 'Only volunteers can get recommendations'}), 403
+        
+        limit = min(max(request.args.get('limit', 20, type=int) or 20, 1), 50)
+        ranked = recommend_shifts(
+            user_id, request.args.get('lat', type=float), request.args.get('log', type=float), limit=limit
+        )
+        
+        # Load only the returned shifts, in one query
+        rows = db.session.query(*SHIFT_LIST_SCHEMA.columns
+        ).outerjoin(Project, Project.id == Shift.project_id
+        ).filter(Shift.id.in_([r['shift_id'] for r in ranked])).all()
+        shifts = {s['id']: s for s in SHIFT_LIST_SCHEMA.dump(rows)}
+        
+        result = []
+        for r in ranked:
+            if r['shift_id'] in shifts:
+                result.append({**shifts[r['shift_id']], 'score': r['score'], 'distance_km': r['distance_km'], 'reasons': r['reasons']})
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @bp.route('/<int:shift_id>', methods=['GET'])
 @jwt_required()
+@cached_response('shifts', 'projects', 'shifts_roster', scope='authenticated')
 def get_shift_details(shift_id):
     """Get details of a specific shift"""
     try:
-        shift = Shift.query.get(shift_id)
-        if not shift:
-            return jsonify({'error': 'Shift not found'}), 404
+        # Shift and project columns plus the roster size in one query
+        roster_size = active_roster_count(Shift.id)
         
-        project = shift.project
+        row = db.session.query(*SHIFT_DETAIL_SCHEMA.columns, roster_size
+        ).outerjoin(Project, Project.id == Shift.project_id
+        ).filter(Shift.id == shift_id).first()
+        if not row:
+            return jsonify({'error': 'Shift not found'}), 404
         
-        return jsonify({
-            'id': shift.id,
-            'title': shift.title,
-            'description': shift.description,
-            'date': shift.date.isoformat() if shift.date else None,
-            'start_time': shift.start_time.isoformat() if shift.start_time else None,
-            'end_time': shift.end_time.isoformat() if shift.end_time else None,
-            'max_volunteers': shift.max_volunteers,
-            'status': shift.status,
-            'project': {
-                'id': project.id,
-                'name': project.name,
-                'description': project.description,
-                'lat': project.lat,
-                'lon': project.lon,
-                'geofence_radius': project.geofence_radius
-            } if project else None,
-            'volunteers_registered': len(shift.roster) if shift.roster else 0
-        }), 200
+        shift_data = SHIFT_DETAIL_SCHEMA.dump_one(row)
+        shift_data['volunteers_registered'] = row[-1] or 0
+        return jsonify(shift_data), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,9 +1,6 @@
-from dotenv import load_dotenv
 from app import create_app
 
-# Load environment variables from .env file
-load_dotenv()
-
+# .env is loaded by the app package
 app = create_app()
 
 if __name__ == '__main__':
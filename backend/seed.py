@@ -1,23 +1,38 @@
+import csv
+import io
+import random
+from time import perf_counter
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
 from app import create_app
 from app.config import db
-from app.models import User, Organization, Project, Shift, ShiftRoster, GlobalRules, TransactionLog
+from app.models import User, Organization, Project, Shift, ShiftRoster, GlobalRules, TransactionLog, SearchDocument, VolunteerProfile, ShiftWaitlist
 from datetime import datetime, date, time, timedelta
+from utils.rules import get_payout_rates
+from utils.fulltext import rebuild_search_index
+from utils.recommendations import rebuild_profiles
 
-def seed_database():
-    app = create_app()
+def clear_database():
+    # Ordering matters for deletion if foreign key constraints are strict
+    db.session.query(SearchDocument).delete()
+    db.session.query(VolunteerProfile).delete()
+    db.session.query(ShiftWaitlist).delete()
+    db.session.query(TransactionLog).delete()
+    db.session.query(ShiftRoster).delete()
+    db.session.query(Shift).delete()
+    db.session.query(Project).delete()
+    db.session.query(Organization).delete()
+    db.session.query(GlobalRules).delete()
+    db.session.query(User).delete()
+    db.session.commit()
+
+def seed_database(app=None):
+    app = app or create_app()
     print("🌱 Seeding VolaPlace database...")
 
     with app.app_context():
         print("🗑️  Clearing existing data...")
-        # Ordering matters for deletion if foreign key constraints are strict
-        db.session.query(TransactionLog).delete()
-        db.session.query(ShiftRoster).delete()
-        db.session.query(Shift).delete()
-        db.session.query(Project).delete()
-        db.session.query(Organization).delete()
-        db.session.query(GlobalRules).delete()
-        db.session.query(User).delete()
-        db.session.commit()
+        clear_database()
 
         print("📜 Creating global rules...")
         # $150/hr and $12 per beneficiary
@@ -61,6 +76,329 @@ def seed_database():
         print("   Volunteer Mary: mary.smith@volaplace.com / Admin123!")
 
         db.session.commit()
+        get_payout_rates.invalidate()
+
+
+# ---------------------------------------------------------------------------
+# Synthetic large-scale data: flask seed --scale=orgs:1000,projects:20k,shifts:2M,roster:10M
+# ---------------------------------------------------------------------------
+
+DEFAULT_SCALE = {'orgs': 10, 'projects': 200, 'shifts': 20000, 'roster': 100000}
+SCALE_KEYS = ('orgs', 'projects', 'shifts', 'roster', 'volunteers')
+SCALE_SUFFIXES = {'k': 1_000, 'm': 1_000_000}
+
+# (town, lat, lon, share of activity, spread in km)
+TOWNS = [
+    ('Nairobi', -1.2864, 36.8172, 30, 12),
+    ('Mombasa', -4.0435, 39.6682, 10, 8),
+    ('Kisumu', -0.0917, 34.7680, 7, 6),
+    ('Nakuru', -0.3031, 36.0800, 7, 6),
+    ('Eldoret', 0.5143, 35.2698, 6, 5),
+    ('Thika', -1.0333, 37.0693, 4, 4),
+    ('Machakos', -1.5177, 37.2634, 3, 4),
+    ('Nyeri', -0.4201, 36.9476, 3, 3),
+    ('Meru', 0.0463, 37.6559, 3, 4),
+    ('Kakamega', 0.2827, 34.7519, 3, 3),
+    ('Kisii', -0.6817, 34.7667, 3, 3),
+    ('Malindi', -3.2192, 40.1169, 2, 3),
+    ('Garissa', -0.4532, 39.6461, 2, 3),
+    ('Kitale', 1.0157, 35.0062, 2, 3),
+    ('Naivasha', -0.7167, 36.4333, 2, 3),
+    ('Lodwar', 3.1191, 35.5973, 1, 2),
+]
+ACTIVITIES = [
+    'Food Distribution', 'Medical Camp', 'Tree Planting', 'Beach Cleanup', 'Literacy Class',
+    'Blood Drive', 'Elderly Visit', 'Vaccination Support', 'Flood Relief', 'Youth Mentoring'
+]
+ORG_KINDS = ['Community Trust', 'Youth Group', 'Relief Network', 'Women Self-Help Group', 'Foundation']
+FIRST_NAMES = ['Wanjiru', 'Otieno', 'Achieng', 'Kamau', 'Njeri', 'Kiprono', 'Akinyi', 'Mwangi', 'Chebet', 'Omondi', 'Wambui', 'Mutua']
+LAST_NAMES = ['Kariuki', 'Odhiambo', 'Wekesa', 'Njoroge', 'Koech', 'Ouma', 'Mutiso', 'Kiplagat', 'Wafula', 'Maina', 'Onyango', 'Ndungu']
+
+DAYS_BACK = 365  # attendance history
+DAYS_AHEAD = 60  # upcoming shifts
+BASE_RATE = 150.0
+BONUS_PER_BENEFICIARY = 12.0
+
+USER_COLUMNS = ('id', 'name', 'email', 'password_hash', 'role', 'phone', 'mpesa_phone', 'profile_completed', 'created_at')
+ORG_COLUMNS = ('id', 'name', 'user_id', 'created_at')
+PROJECT_COLUMNS = ('id', 'org_id', 'name', 'lat', 'lon', 'geofence_radius', 'address', 'created_at')
+SHIFT_COLUMNS = ('id', 'project_id', 'title', 'date', 'start_time', 'end_time', 'max_volunteers', 'open_seats',
+                 'status', 'is_funded', 'funded_amount', 'funding_transaction_id')
+ROSTER_COLUMNS = ('id', 'shift_id', 'volunteer_id', 'check_in_time', 'check_out_time', 'beneficiaries_served',
+                  'status', 'payout_amount', 'is_paid', 'paid_at')
+TRANSACTION_COLUMNS = ('id', 'volunteer_id', 'shift_roster_id', 'amount', 'status', 'phone')
+
+
+def parse_scale(spec):
+    """'orgs:1000,projects:20k,shifts:2M' -> counts; missing keys use DEFAULT_SCALE"""
+    counts = dict(DEFAULT_SCALE)
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        key, sep, value = part.partition(':')
+        key, value = key.strip().lower(), value.strip().lower()
+        if not sep or key not in SCALE_KEYS:
+            raise ValueError(f"Unknown scale entry '{part}' (expected {', '.join(SCALE_KEYS)} as key:count)")
+        multiplier = SCALE_SUFFIXES.get(value[-1:], 1)
+        try:
+            count = int(float(value[:-1] if multiplier > 1 else value) * multiplier)
+        except ValueError:
+            raise ValueError(f"Invalid count '{value}' for {key}")
+        if count < 0:
+            raise ValueError(f"Count for {key} must not be negative")
+        counts[key] = count
+    # About 50 sign-ups per volunteer over the history window
+    counts.setdefault('volunteers', max(counts['roster'] // 50, 100))
+    if counts['projects'] and not counts['orgs']:
+        raise ValueError('projects need at least one org')
+    if counts['shifts'] and not counts['projects']:
+        raise ValueError('shifts need at least one project')
+    if counts['roster'] and not (counts['shifts'] and counts['volunteers']):
+        raise ValueError('roster needs shifts and volunteers')
+    return counts
+
+
+def bulk_insert(conn, table, columns, rows):
+    """COPY on Postgres (psycopg2), executemany INSERT batches elsewhere"""
+    if not rows:
+        return
+    if conn.dialect.name == 'postgresql':
+        cursor = conn.connection.cursor()
+        if hasattr(cursor, 'copy_expert'):
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)  # None -> empty field -> NULL
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+            return
+    conn.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+
+def _clear_for_bulk_load(conn):
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(
+            'TRUNCATE search_documents, volunteer_profiles, shift_waitlist, transaction_log, attendance_sync_events, shifts_roster, shifts, projects, '
+            'organizations, global_rules, users RESTART IDENTITY CASCADE'
+        ))
+    else:
+        for table in ('search_documents', 'volunteer_profiles', 'shift_waitlist', 'transaction_log', 'attendance_sync_events', 'shifts_roster', 'shifts',
+                      'projects', 'organizations', 'global_rules', 'users'):
+            conn.execute(text(f'DELETE FROM {table}'))
+
+
+def _reset_sequences(conn):
+    # Rows were written with explicit ids, so move the serial sequences past them
+    if conn.dialect.name != 'postgresql':
+        return
+    for table in ('users', 'organizations', 'projects', 'shifts', 'shifts_roster', 'transaction_log'):
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+        ))
+
+
+def _point_near(rng, town):
+    _, lat, lon, _, spread_km = town
+    return round(lat + rng.gauss(0, spread_km / 111.0), 6), round(lon + rng.gauss(0, spread_km / 111.0), 6)
+
+
+def _person(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def _attendance(rng, shift_id, volunteer_id, shift_start, shift_end, funded, now, ids):
+    """Roster row (and a completed payout for paid ones) for one sign-up"""
+    roster_id = next(ids['roster'])
+    if shift_start > now:
+        return (roster_id, shift_id, volunteer_id, None, None, 0, 'registered', 0.0, False, None), None
+    if rng.random() < 0.08:
+        # no-show
+        return (roster_id, shift_id, volunteer_id, None, None, 0, 'registered', 0.0, False, None), None
+
+    check_in = shift_start + timedelta(minutes=rng.randint(-10, 20))
+    if shift_end > now:
+        return (roster_id, shift_id, volunteer_id, check_in, None, 0, 'checked_in', 0.0, False, None), None
+
+    check_out = shift_end + timedelta(minutes=rng.randint(-30, 20))
+    beneficiaries = rng.randint(0, 40)
+    payout = round((check_out - check_in).total_seconds() / 3600 * BASE_RATE + beneficiaries * BONUS_PER_BENEFICIARY, 2)
+    if funded and rng.random() < 0.9:
+        paid_at = min(check_out + timedelta(hours=rng.randint(2, 72)), now)
+        row = (roster_id, shift_id, volunteer_id, check_in, check_out, beneficiaries, 'completed', payout, True, paid_at)
+        payment = (next(ids['transaction']), volunteer_id, roster_id, payout, 'completed', f'25471{volunteer_id:07d}')
+        return row, payment
+    return (roster_id, shift_id, volunteer_id, check_in, check_out, beneficiaries, 'pending_payment', payout, False, None), None
+
+
+def seed_at_scale(app, counts, random_seed=42, batch_size=5000):
+    """
+    Replace the database with a synthetic dataset of the given size (see parse_scale).
+    Rows get explicit ids and are written in batches, each batch in its own transaction.
+    """
+    rng = random.Random(random_seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    today = now.date()
+    started = perf_counter()
+    # Hashing is deliberately slow - every generated account shares one
+    password_hash = generate_password_hash('Admin123!')
+    weights = [town[3] for town in TOWNS]
+
+    print("🌱 Generating VolaPlace dataset: " + ", ".join(f"{key}={counts[key]:,}" for key in SCALE_KEYS))
+
+    with app.app_context():
+        engine = db.engine
+        db.session.remove()
+
+        with engine.begin() as conn:
+            print("🗑️  Clearing existing data...")
+            _clear_for_bulk_load(conn)
+            conn.execute(GlobalRules.__table__.insert(), {
+                'base_hourly_rate': BASE_RATE, 'bonus_per_beneficiary': BONUS_PER_BENEFICIARY
+            })
+
+        # Users: admin, one org admin per org, then volunteers
+        print("👥 Creating users...")
+        org_admin_ids = range(2, counts['orgs'] + 2)
+        volunteer_ids = range(counts['orgs'] + 2, counts['orgs'] + 2 + counts['volunteers'])
+        volunteer_towns = rng.choices(range(len(TOWNS)), weights=weights, k=len(volunteer_ids))
+        pools = [[] for _ in TOWNS]
+        for volunteer_id, town in zip(volunteer_ids, volunteer_towns):
+            pools[town].append(volunteer_id)
+
+        def users():
+            yield (1, 'Administrator', 'admin@volaplace.com', password_hash, 'admin', '254700000001', None, True, now)
+            for user_id in org_admin_ids:
+                yield (user_id, _person(rng), f'org{user_id}@volaplace.com', password_hash, 'org_admin',
+                       f'25472{user_id:07d}', None, True, now - timedelta(days=rng.randint(DAYS_BACK, 2 * DAYS_BACK)))
+            for user_id in volunteer_ids:
+                phone = f'25471{user_id:07d}'
+                yield (user_id, _person(rng), f'volunteer{user_id}@volaplace.com', password_hash, 'volunteer',
+                       phone, phone, True, now - timedelta(days=rng.randint(0, 2 * DAYS_BACK)))
+
+        _write_batched(engine, User.__table__, USER_COLUMNS, users(), batch_size, 'users')
+
+        print("🏢 Creating organizations...")
+        org_towns = rng.choices(range(len(TOWNS)), weights=weights, k=counts['orgs'])
+        _write_batched(engine, Organization.__table__, ORG_COLUMNS, (
+            (org_id, f'{TOWNS[org_towns[org_id - 1]][0]} {rng.choice(ORG_KINDS)} {org_id}', user_id,
+             now - timedelta(days=rng.randint(DAYS_BACK, 2 * DAYS_BACK)))
+            for org_id, user_id in enumerate(org_admin_ids, start=1)
+        ), batch_size, 'organizations')
+
+        print("📍 Creating projects...")
+        # Most projects are in their organization's home town
+        project_towns = [
+            org_towns[rng.randrange(counts['orgs'])] if rng.random() < 0.8 else rng.choices(range(len(TOWNS)), weights=weights)[0]
+            for _ in range(counts['projects'])
+        ]
+
+        def projects():
+            for project_id, town in enumerate(project_towns, start=1):
+                lat, lon = _point_near(rng, TOWNS[town])
+                yield (project_id, rng.randint(1, counts['orgs']), f'{rng.choice(ACTIVITIES)} - {TOWNS[town][0]}',
+                       lat, lon, rng.choice((20, 50, 100, 200)), TOWNS[town][0],
+                       now - timedelta(days=rng.randint(DAYS_BACK, DAYS_BACK + 90)))
+
+        _write_batched(engine, Project.__table__, PROJECT_COLUMNS, projects(), batch_size, 'projects')
+
+        print("📅 Creating shifts and attendance history...")
+        ids = {'roster': iter(range(1, 1 << 62)), 'transaction': iter(range(1, 1 << 62))}
+        mean_signups = counts['roster'] / counts['shifts'] if counts['shifts'] else 0
+        shift_rows, roster_rows, transaction_rows = [], [], []
+        totals = {'shifts': 0, 'roster': 0, 'transactions': 0}
+        report_every = max(counts['shifts'] // 20, batch_size)
+        next_report = report_every
+
+        for shift_id in range(1, counts['shifts'] + 1):
+            project_index = rng.randrange(counts['projects'])
+            shift_date = today + timedelta(days=rng.randint(-DAYS_BACK, DAYS_AHEAD))
+            start_hour = rng.randint(6, 16)
+            end_hour = min(start_hour + rng.randint(2, 8), 22)
+            shift_start = datetime.combine(shift_date, time(start_hour))
+            shift_end = datetime.combine(shift_date, time(end_hour))
+
+            signups = min(int(rng.random() * 2 * mean_signups + 0.5), counts['volunteers'])
+            pool = pools[project_towns[project_index]]
+            volunteers = rng.sample(pool if len(pool) >= signups else volunteer_ids, signups)
+
+            # Funding: older shifts are mostly funded, upcoming ones about half
+            funded = rng.random() < (0.85 if shift_start <= now else 0.5)
+            paid_total = 0.0
+            for volunteer_id in volunteers:
+                roster, payment = _attendance(rng, shift_id, volunteer_id, shift_start, shift_end, funded, now, ids)
+                roster_rows.append(roster)
+                if payment:
+                    transaction_rows.append(payment)
+                    paid_total += payment[3]
+
+            if funded:
+                budget = max(signups, 1) * ((end_hour - start_hour) * BASE_RATE + 20 * BONUS_PER_BENEFICIARY)
+                funded_amount = round(max(budget * rng.uniform(1.0, 1.3) - paid_total, 0.0), 2)
+                funding = (funded_amount > 0, funded_amount, f'ws_CO_{shift_id:012d}')
+            else:
+                funding = (False, 0.0, None)
+
+            if shift_end <= now:
+                status = 'completed'
+            elif shift_start <= now:
+                status = 'in_progress'
+            else:
+                status = 'upcoming'
+
+            max_volunteers = signups + rng.randint(0, max(int(mean_signups // 2), 1))
+            shift_rows.append((
+                shift_id, project_index + 1, ACTIVITIES[rng.randrange(len(ACTIVITIES))], shift_date,
+                time(start_hour), time(end_hour), max_volunteers, max_volunteers - signups,
+                status, *funding
+            ))
+
+            if len(shift_rows) >= batch_size:
+                _flush_shift_batch(engine, shift_rows, roster_rows, transaction_rows, totals)
+                if totals['shifts'] >= next_report:
+                    next_report += report_every
+                    print(f"   {totals['shifts']:,}/{counts['shifts']:,} shifts, {totals['roster']:,} roster entries "
+                          f"({perf_counter() - started:.0f}s)")
+
+        _flush_shift_batch(engine, shift_rows, roster_rows, transaction_rows, totals)
+
+        with engine.begin() as conn:
+            _reset_sequences(conn)
+        # the bulk load bypassed the ORM, so the search documents are written in one pass
+        print("🔎 Building the search index...")
+        with engine.begin() as conn:
+            rebuild_search_index(conn)
+        print("🧭 Building volunteer profiles...")
+        with engine.begin() as conn:
+            rebuild_profiles(conn, batch_size=batch_size)
+
+        get_payout_rates.invalidate()
+        elapsed = perf_counter() - started
+        written = counts['orgs'] + counts['volunteers'] + 1 + counts['orgs'] + counts['projects'] + sum(totals.values())
+        print(f"✅ Wrote {written:,} rows in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s): "
+              f"{totals['shifts']:,} shifts, {totals['roster']:,} roster entries, {totals['transactions']:,} payouts")
+        print("🔐 Every account uses the password Admin123! (admin@volaplace.com, org<N>@volaplace.com, volunteer<N>@volaplace.com)")
+
+
+def _write_batched(engine, table, columns, rows, batch_size, label):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            with engine.begin() as conn:
+                bulk_insert(conn, table, columns, batch)
+            batch = []
+    with engine.begin() as conn:
+        bulk_insert(conn, table, columns, batch)
+
+
+def _flush_shift_batch(engine, shift_rows, roster_rows, transaction_rows, totals):
+    with engine.begin() as conn:
+        bulk_insert(conn, Shift.__table__, SHIFT_COLUMNS, shift_rows)
+        bulk_insert(conn, ShiftRoster.__table__, ROSTER_COLUMNS, roster_rows)
+        bulk_insert(conn, TransactionLog.__table__, TRANSACTION_COLUMNS, transaction_rows)
+    totals['shifts'] += len(shift_rows)
+    totals['roster'] += len(roster_rows)
+    totals['transactions'] += len(transaction_rows)
+    shift_rows.clear()
+    roster_rows.clear()
+    transaction_rows.clear()
+
 
 if __name__ == "__main__":
     seed_database()
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+Attendance reporting queries for VolaPlace.
+Rows and per-shift stats come straight from SQL (one joined query each) so
+reports don't load users one by one or count statuses in Python.
+"""
+from sqlalchemy import case, func
+from app.config import db
+from app.models import ShiftRoster, Shift, Project, User
+from utils.sql import hours_between
+
+CHECKED_IN_STATUSES = ('checked_in', 'completed')
+
+
+def _scoped(query, shift_id=None, project_id=None, org_id=None, start_date=None, end_date=None):
+    """Apply the report scope - a single shift, a project, an org and/or a date range"""
+    if shift_id is not None:
+        query = query.filter(ShiftRoster.shift_id == shift_id)
+    if project_id is not None:
+        query = query.filter(Shift.project_id == project_id)
+    if org_id is not None:
+        query = query.filter(Project.org_id == org_id)
+    if start_date is not None:
+        query = query.filter(Shift.date >= start_date)
+    if end_date is not None:
+        query = query.filter(Shift.date <= end_date)
+    return query
+
+
+def attendance_rows(**scope):
+    """Attendance rows with the volunteer name joined in and hours worked computed in SQL"""
+    query = db.session.query(
+        ShiftRoster.shift_id,
+        ShiftRoster.volunteer_id,
+        User.name.label('volunteer_name'),
+        ShiftRoster.status,
+        ShiftRoster.check_in_time,
+        ShiftRoster.check_out_time,
+        hours_between(ShiftRoster.check_in_time, ShiftRoster.check_out_time).label('hours_worked'),
+        ShiftRoster.beneficiaries_served
+    ).join(User, User.id == ShiftRoster.volunteer_id
+    ).join(Shift, Shift.id == ShiftRoster.shift_id
+    ).join(Project, Project.id == Shift.project_id)
+
+    return _scoped(query, **scope).order_by(ShiftRoster.shift_id, ShiftRoster.id).all()
+
+
+def attendance_stats(**scope):
+    """Per-shift aggregate counts, hours and beneficiaries, keyed by shift_id"""
+    query = db.session.query(
+        Shift.id.label('shift_id'),
+        Shift.title,
+        Shift.date,
+        Shift.project_id,
+        func.count(ShiftRoster.id).label('total_volunteers'),
+        func.sum(case((ShiftRoster.status.in_(CHECKED_IN_STATUSES), 1), else_=0)).label('checked_in'),
+        func.sum(case((ShiftRoster.status == 'completed', 1), else_=0)).label('completed'),
+        func.sum(hours_between(ShiftRoster.check_in_time, ShiftRoster.check_out_time)).label('hours_worked'),
+        func.sum(ShiftRoster.beneficiaries_served).label('beneficiaries_served')
+    ).join(ShiftRoster, ShiftRoster.shift_id == Shift.id
+    ).join(Project, Project.id == Shift.project_id)
+
+    query = _scoped(query, **scope).group_by(Shift.id, Shift.title, Shift.date, Shift.project_id)
+    return {row.shift_id: row for row in query.order_by(Shift.date, Shift.id)}
+
+
+def serialize_row(row):
+    return {
+        'volunteer_id': row.volunteer_id,
+        'volunteer_name': row.volunteer_name,
+        'status': row.status,
+        'check_in_time': row.check_in_time.isoformat() if row.check_in_time else None,
+        'check_out_time': row.check_out_time.isoformat() if row.check_out_time else None,
+        'hours_worked': round(row.hours_worked, 2) if row.hours_worked is not None else None,
+        'beneficiaries_served': row.beneficiaries_served
+    }
@@ -0,0 +1,290 @@
+"""
+Cache subsystem for VolaPlace.
+A bounded in-process LRU/TTL store by default, or any Redis-protocol server
+when CACHE_URL is set (redis://...), so every gunicorn worker shares the same
+cached rules, project geometry and responses.
+
+Usage:
+    from utils.cache import cache, memoize
+
+    @memoize(ttl=300)
+    def expensive(x): ...
+    expensive.invalidate(x)
+"""
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+# Returned by backends for a missing key (None is a valid cached value)
+MISS = object()
+
+
+class MemoryCache:
+    """
+    Thread-safe LRU with per-entry TTL, local to one process. Counters made by
+    incr() (table versions, the geofence generation) are kept apart and never
+    evicted: a counter that fell out and restarted at 0 would bring back
+    entries cached under its earlier values.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires_at or None, value)
+        self._counters = {}
+
+    def _live(self, key, now):
+        if key in self._counters:
+            return self._counters[key]
+        entry = self._data.get(key)
+        if entry is None:
+            return MISS
+        if entry[0] is not None and entry[0] <= now:
+            del self._data[key]
+            return MISS
+        self._data.move_to_end(key)
+        return entry[1]
+
+    def get(self, key):
+        with self._lock:
+            return self._live(key, time.monotonic())
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            return [self._live(key, now) for key in keys]
+
+    def _store(self, key, value, ttl):
+        self._counters.pop(key, None)
+        self._data[key] = (time.monotonic() + ttl if ttl else None, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        """Set only if the key is absent - returns True if it was set"""
+        with self._lock:
+            if self._live(key, time.monotonic()) is not MISS:
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._counters.pop(key, None)
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            value = self._live(key, time.monotonic())
+            self._data.pop(key, None)
+            self._counters[key] = (0 if value is MISS else value) + amount
+            return self._counters[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._counters.clear()
+
+
+class RedisCache:
+    """
+    Adapter for a Redis-protocol server. Pass a URL (needs the `redis`
+    package) or any client object exposing get/set/delete/incrby/mget,
+    e.g. fakeredis for local testing.
+    """
+
+    def __init__(self, url=None, client=None, prefix='volaplace:'):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key):
+        return self.prefix + key
+
+    @staticmethod
+    def _load(raw):
+        if raw is None:
+            return MISS
+        # Counters written by INCRBY come back as plain digits, not pickles
+        if raw.lstrip(b'-').isdigit():
+            return int(raw)
+        return pickle.loads(raw)
+
+    def get(self, key):
+        return self._load(self.client.get(self._key(key)))
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        return [self._load(raw) for raw in self.client.mget([self._key(k) for k in keys])]
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self._key(key), pickle.dumps(value), ex=int(ttl) if ttl else None)
+
+    def add(self, key, value, ttl=None):
+        return bool(self.client.set(self._key(key), pickle.dumps(value), ex=int(ttl) if ttl else None, nx=True))
+
+    def delete(self, key):
+        self.client.delete(self._key(key))
+
+    def incr(self, key, amount=1):
+        # Counters are stored as plain integers so INCRBY works on them
+        return int(self.client.incrby(self._key(key), amount))
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+class Cache:
+    """
+    Facade over the configured backend that records hit/miss metrics and
+    treats backend errors as misses so a cache outage never fails a request.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryCache()
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'errors': 0}
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def get(self, key):
+        try:
+            value = self.backend.get(key)
+        except Exception:
+            self._count('errors')
+            return MISS
+        self._count('misses' if value is MISS else 'hits')
+        return value
+
+    def get_many(self, keys):
+        try:
+            values = self.backend.get_many(list(keys))
+        except Exception:
+            self._count('errors')
+            return [MISS] * len(keys)
+        misses = sum(1 for value in values if value is MISS)
+        self._count('misses', misses)
+        self._count('hits', len(values) - misses)
+        return values
+
+    def set(self, key, value, ttl=None):
+        try:
+            self.backend.set(key, value, ttl)
+            self._count('sets')
+        except Exception:
+            self._count('errors')
+
+    def add(self, key, value, ttl=None):
+        try:
+            return self.backend.add(key, value, ttl)
+        except Exception:
+            self._count('errors')
+            return True
+
+    def delete(self, key):
+        try:
+            self.backend.delete(key)
+        except Exception:
+            self._count('errors')
+
+    def incr(self, key, amount=1):
+        try:
+            return self.backend.incr(key, amount)
+        except Exception:
+            self._count('errors')
+            return None
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['backend'] = type(self.backend).__name__
+        return stats
+
+
+# Singleton instance - init_cache() swaps in the configured backend
+cache = Cache()
+
+
+def init_cache(app):
+    """Configure the cache backend from CACHE_URL (redis://...) or use the in-process LRU"""
+    url = app.config.get('CACHE_URL') or os.environ.get('CACHE_URL')
+    if url and url.startswith(('redis://', 'rediss://', 'unix://')):
+        cache.backend = RedisCache(url=url)
+    else:
+        cache.backend = MemoryCache(max_entries=int(os.environ.get('CACHE_MAX_ENTRIES', 10000)))
+    app.extensions['cache'] = cache
+    return cache
+
+
+# Striped locks so memoized keys don't each keep a lock object alive forever
+_lock_stripes = [threading.Lock() for _ in range(64)]
+
+
+def _local_lock(key):
+    return _lock_stripes[hash(key) % len(_lock_stripes)]
+
+
+def memoize(ttl=300, namespace=None, lock_timeout=10):
+    """
+    Cache a function's result per arguments. Only one caller recomputes an
+    expired value (a per-process lock plus a cache-wide lock key); everyone
+    else waits briefly for it instead of stampeding the database.
+    The wrapped function gets an .invalidate(*args, **kwargs) helper.
+    """
+    def decorator(fn):
+        prefix = f'memo:{namespace or fn.__module__ + "." + fn.__qualname__}:'
+
+        def key_for(*args, **kwargs):
+            return prefix + repr((args, sorted(kwargs.items())))
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = key_for(*args, **kwargs)
+            value = cache.get(key)
+            if value is not MISS:
+                return value
+
+            with _local_lock(key):
+                value = cache.get(key)
+                if value is not MISS:
+                    return value
+
+                if cache.add(key + ':lock', 1, lock_timeout):
+                    try:
+                        value = fn(*args, **kwargs)
+                        cache.set(key, value, ttl)
+                        return value
+                    finally:
+                        cache.delete(key + ':lock')
+
+                # Another worker is computing it - wait for its result
+                deadline = time.monotonic() + lock_timeout
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    value = cache.get(key)
+                    if value is not MISS:
+                        return value
+                return fn(*args, **kwargs)
+
+        wrapper.invalidate = lambda *args, **kwargs: cache.delete(key_for(*args, **kwargs))
+        return wrapper
+    return decorator
@@ -5,6 +5,41 @@ Prevents conflicts and ensures data integrity
 from app.models import User, Shift, ShiftRoster
 from app.config import db
 
+# roster statuses that hold a volunteer's time on the shift's day
+ACTIVE_SIGNUP_STATUSES = ('registered', 'checked_in')
+MAX_SHIFTS_PER_DAY = 3
+
+
+def times_overlap(start_a, end_a, start_b, end_b):
+    """
+    Check if two time ranges on the same day overlap (back-to-back shifts don't)
+    
+    Returns:
+        bool: False when either range is missing a start or end
+    """
+    if not (start_a and end_a and start_b and end_b):
+        return False
+    # Shifts overlap if one starts before the other ends
+    return not (end_a <= start_b or start_a >= end_b)
+
+
+def find_time_conflict(start_time, end_time, booked_shifts):
+    """
+    Find the first booked shift overlapping a time range - no database access
+    
+    Args:
+        start_time: Start time of the new shift
+        end_time: End time of the new shift
+        booked_shifts: Shifts on the same date (anything with start_time and end_time)
+    
+    Returns:
+        The conflicting shift, or None
+    """
+    for booked in booked_shifts:
+        if times_overlap(start_time, end_time, booked.start_time, booked.end_time):
+            return booked
+    return None
+
 
 def validate_phone_unique(phone, exclude_user_id=None):
     """
@@ -48,24 +83,20 @@ def validate_shift_time_conflict(volunteer_id, shift_date, start_time, end_time,
     ).filter(
         ShiftRoster.volunteer_id == volunteer_id,
         Shift.date == shift_date,
-        ShiftRoster.status.in_(['registered', 'checked_in'])
+        ShiftRoster.status.in_(ACTIVE_SIGNUP_STATUSES)
     )
     
     if exclude_shift_id:
         volunteer_shifts = volunteer_shifts.filter(Shift.id != exclude_shift_id)
     
-    volunteer_shifts = volunteer_shifts.all()
-    
     # Check for time overlaps
-    for v_shift in volunteer_shifts:
-        if v_shift.start_time and v_shift.end_time:
-            # Shifts overlap if one starts before the other ends
-            if not (end_time <= v_shift.start_time or start_time >= v_shift.end_time):
-                error_msg = (
-                    f'Time conflict with shift "{v_shift.title}" '
-                    f'({v_shift.start_time.strftime("%H:%M")} - {v_shift.end_time.strftime("%H:%M")})'
-                )
-                return False, error_msg, v_shift
+    v_shift = find_time_conflict(start_time, end_time, volunteer_shifts.all())
+    if v_shift:
+        error_msg = (
+            f'Time conflict with shift "{v_shift.title}" '
+            f'({v_shift.start_time.strftime("%H:%M")} - {v_shift.end_time.strftime("%H:%M")})'
+        )
+        return False, error_msg, v_shift
     
     return True, None, None
 
@@ -90,7 +121,7 @@ def validate_organization_project_limit(user_id, max_projects=10):
     return True, None
 
 
-def validate_volunteer_shift_limit(volunteer_id, shift_date, max_shifts=3):
+def validate_volunteer_shift_limit(volunteer_id, shift_date, max_shifts=MAX_SHIFTS_PER_DAY):
     """
     Check if a volunteer has reached the daily shift limit
     
@@ -108,7 +139,7 @@ def validate_volunteer_shift_limit(volunteer_id, shift_date, max_shifts=3):
     ).filter(
         ShiftRoster.volunteer_id == volunteer_id,
         Shift.date == shift_date,
-        ShiftRoster.status.in_(['registered', 'checked_in'])
+        ShiftRoster.status.in_(ACTIVE_SIGNUP_STATUSES)
     ).count()
     
     if shift_count >= max_shifts:
@@ -0,0 +1,92 @@
+"""
+In-process pub/sub for live roster updates.
+Write paths publish small roster deltas after they commit and the live
+streams in routes/live.py fan them out to connected dashboards.
+"""
+import itertools
+import queue
+import threading
+import time
+from utils.geofence import get_shift_geometry
+
+
+class Subscription:
+    """A subscriber's bounded mailbox for one or more topics"""
+
+    def __init__(self, topics, max_pending):
+        self.topics = tuple(topics)
+        self.queue = queue.Queue(maxsize=max_pending)
+        # Set when the subscriber fell behind and events were dropped
+        self.overflowed = False
+
+    def get(self, timeout):
+        """Next event or None after timeout seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    """Topic based fan-out. Publishing never blocks on a slow subscriber."""
+
+    def __init__(self, max_pending=200):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscribers = {}  # topic -> set of Subscription
+        self._ids = itertools.count(1)
+
+    def subscribe(self, *topics):
+        subscription = Subscription(topics, self.max_pending)
+        with self._lock:
+            for topic in topics:
+                self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def publish(self, topic, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(topic, ()))
+        if not subscribers:
+            return 0
+        event = dict(event, id=next(self._ids), topic=topic)
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                subscription.overflowed = True
+        return len(subscribers)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+
+# Singleton instance
+broker = EventBroker()
+
+
+def publish_roster_event(shift_id, event_type, volunteer_id=None, **data):
+    """
+    Publish a roster delta (register, check_in, check_out, payout, ...) to the
+    shift's topic and its organization's topic. Call after the change is committed.
+    """
+    # Nobody is watching - skip the geometry lookup entirely
+    if not broker.subscriber_count():
+        return
+
+    event = {'type': event_type, 'shift_id': shift_id, 'volunteer_id': volunteer_id, 'at': time.time()}
+    event.update(data)
+    broker.publish(f'shift:{shift_id}', event)
+
+    geometry = get_shift_geometry(shift_id)
+    if geometry:
+        broker.publish(f'org:{geometry.org_id}', event)
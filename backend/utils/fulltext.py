@@ -0,0 +1,191 @@
+"""
+Full-text search over shifts, projects and organizations.
+Every searchable row has a search_documents row (title / context / body) and
+the database does the indexing:
+  - Postgres: a generated, weighted tsvector column (title A, context B,
+    body C) with a GIN index, ranked with ts_rank
+  - SQLite:   an external-content FTS5 table kept in step by triggers,
+    ranked with bm25
+Documents are rewritten in the same transaction as the change that affects
+them (after_flush), including the shifts and projects that embed a renamed
+project's or organization's name. Bulk loads call rebuild_search_index().
+"""
+import re
+import click
+from sqlalchemy import delete, event, func, inspect, literal, literal_column, null, select, table, column
+from sqlalchemy.orm import Session
+from app.models import SearchDocument, Shift, Project, Organization
+from utils.fulltext_ddl import DDL, LANGUAGE
+
+MAX_TERMS = 8
+# bm25 weights for SQLite's (title, context, body) - roughly Postgres' A/B/C
+FTS5_WEIGHTS = (10.0, 4.0, 1.0)
+# ids per DELETE/INSERT ... WHERE id IN (...)
+CHUNK_SIZE = 500
+
+
+@event.listens_for(SearchDocument.__table__, 'after_create')
+def _create_text_index(target, connection, **kw):
+    for statement in DDL.get(connection.dialect.name, []):
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(SearchDocument.__table__, 'after_drop')
+def _drop_text_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('DROP TABLE IF EXISTS search_documents_fts')
+
+
+# Documents
+def _joined_text(*columns):
+    expr = func.coalesce(columns[0], '')
+    for col in columns[1:]:
+        expr = expr + ' ' + func.coalesce(col, '')
+    return expr
+
+
+def _shift_documents():
+    return select(
+        literal('shift'), Shift.id, Shift.project_id, Shift.title,
+        _joined_text(Project.name, Organization.name, Project.address), func.coalesce(Shift.description, '')
+    ).select_from(Shift)\
+        .outerjoin(Project, Project.id == Shift.project_id)\
+        .outerjoin(Organization, Organization.id == Project.org_id)
+
+
+def _project_documents():
+    return select(
+        literal('project'), Project.id, Project.id, Project.name,
+        _joined_text(Organization.name, Project.address), func.coalesce(Project.description, '')
+    ).select_from(Project).outerjoin(Organization, Organization.id == Project.org_id)
+
+
+def _organization_documents():
+    return select(
+        literal('organization'), Organization.id, null(), Organization.name, literal(''),
+        func.coalesce(Organization.description, '')
+    ).select_from(Organization)
+
+
+DOCUMENTS = {'shift': _shift_documents, 'project': _project_documents, 'organization': _organization_documents}
+DOCUMENT_COLUMNS = ['entity_type', 'entity_id', 'project_id', 'title', 'context', 'body']
+
+# Only these attributes change a document - status, seat and funding updates don't reindex
+INDEXED_ATTRIBUTES = {
+    Shift: ('shift', ('title', 'description', 'project_id')),
+    Project: ('project', ('name', 'description', 'address', 'org_id')),
+    Organization: ('organization', ('name', 'description')),
+}
+
+
+def _chunks(ids):
+    ids = sorted(ids)
+    for i in range(0, len(ids), CHUNK_SIZE):
+        yield ids[i:i + CHUNK_SIZE]
+
+
+def _write_documents(connection, entity_type, condition):
+    """Replace the documents of the `entity_type` rows matching `condition`"""
+    documents = DOCUMENTS[entity_type]().where(condition)
+    entity_ids = documents.with_only_columns(documents.selected_columns[1])
+    connection.execute(delete(SearchDocument).where(
+        SearchDocument.entity_type == entity_type, SearchDocument.entity_id.in_(entity_ids)
+    ))
+    connection.execute(SearchDocument.__table__.insert().from_select(DOCUMENT_COLUMNS, documents))
+
+
+def remove_documents(connection, entity_type, ids):
+    for chunk in _chunks(ids):
+        connection.execute(delete(SearchDocument).where(
+            SearchDocument.entity_type == entity_type, SearchDocument.entity_id.in_(chunk)
+        ))
+
+
+def reindex(connection, shift_ids=(), project_ids=(), organization_ids=()):
+    """Rewrite the documents of these rows and of everything that embeds their text"""
+    for chunk in _chunks(organization_ids):
+        _write_documents(connection, 'organization', Organization.id.in_(chunk))
+        _write_documents(connection, 'project', Project.org_id.in_(chunk))
+        _write_documents(connection, 'shift', Project.org_id.in_(chunk))
+    for chunk in _chunks(project_ids):
+        _write_documents(connection, 'project', Project.id.in_(chunk))
+        _write_documents(connection, 'shift', Shift.project_id.in_(chunk))
+    for chunk in _chunks(shift_ids):
+        _write_documents(connection, 'shift', Shift.id.in_(chunk))
+
+
+def rebuild_search_index(connection):
+    """Recreate every document (after bulk loads that bypass the ORM)"""
+    connection.execute(delete(SearchDocument))
+    for documents in DOCUMENTS.values():
+        connection.execute(SearchDocument.__table__.insert().from_select(DOCUMENT_COLUMNS, documents()))
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_documents(session, flush_context):
+    changed = {'shift': set(), 'project': set(), 'organization': set()}
+    removed = {'shift': set(), 'project': set(), 'organization': set()}
+
+    for obj in session.new:
+        if type(obj) in INDEXED_ATTRIBUTES:
+            changed[INDEXED_ATTRIBUTES[type(obj)][0]].add(obj.id)
+    for obj in session.dirty:
+        if type(obj) in INDEXED_ATTRIBUTES:
+            entity_type, attributes = INDEXED_ATTRIBUTES[type(obj)]
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in attributes):
+                changed[entity_type].add(obj.id)
+    for obj in session.deleted:
+        if type(obj) in INDEXED_ATTRIBUTES:
+            removed[INDEXED_ATTRIBUTES[type(obj)][0]].add(obj.id)
+
+    if not any(changed.values()) and not any(removed.values()):
+        return
+
+    connection = session.connection()
+    for entity_type, ids in removed.items():
+        remove_documents(connection, entity_type, ids)
+    reindex(
+        connection,
+        shift_ids=changed['shift'] - removed['shift'],
+        project_ids=changed['project'] - removed['project'],
+        organization_ids=changed['organization'] - removed['organization']
+    )
+
+
+# Queries
+def search_terms(text):
+    return re.findall(r'\w+', (text or '').lower())[:MAX_TERMS]
+
+
+def text_match(query, text, dialect):
+    """
+    Restrict `query` (selecting from search_documents) to documents containing
+    every word of `text` as a word prefix. Returns (query, rank); higher rank
+    is a better match.
+    """
+    terms = search_terms(text)
+    if dialect == 'postgresql':
+        tsv = literal_column('search_documents.tsv')
+        tsquery = func.to_tsquery(LANGUAGE, ' & '.join(f'{term}:*' for term in terms))
+        return query.filter(tsv.op('@@')(tsquery)), func.ts_rank(tsv, tsquery)
+
+    fts = table('search_documents_fts', column('rowid'))
+    match = ' '.join(f'"{term}"*' for term in terms)
+    query = query.join(fts, fts.c.rowid == SearchDocument.id)\
+        .filter(literal_column('search_documents_fts').op('MATCH')(match))
+    # bm25 is lower-is-better
+    return query, -func.bm25(literal_column('search_documents_fts'), *FTS5_WEIGHTS)
+
+
+def init_fulltext(app):
+    """`flask reindex-search` rebuilds every document, e.g. after a bulk import"""
+    @app.cli.command('reindex-search')
+    def reindex_search():
+        from app.config import db
+        with db.engine.begin() as connection:
+            rebuild_search_index(connection)
+            count = connection.execute(select(func.count()).select_from(SearchDocument)).scalar()
+        click.echo(f'Indexed {count} documents')
+
+    return app
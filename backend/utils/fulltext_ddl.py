@@ -0,0 +1,51 @@
+"""
+Database-side full-text index DDL for search_documents.
+Plain statements with no app imports, so the c5e8a2f1d374 migration runs the
+same DDL as utils/fulltext.py's after_create hook, and migrations/env.py can
+leave the objects it creates out of autogenerate. Changing a statement here
+needs a migration for existing databases.
+"""
+LANGUAGE = 'english'
+
+POSTGRES_DDL = [
+    f"""ALTER TABLE search_documents ADD COLUMN tsv tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('{LANGUAGE}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{LANGUAGE}', coalesce(context, '')), 'B') ||
+        setweight(to_tsvector('{LANGUAGE}', coalesce(body, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX ix_search_documents_tsv ON search_documents USING GIN (tsv)",
+]
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5(
+        title, context, body, content='search_documents', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER search_documents_ai AFTER INSERT ON search_documents BEGIN
+        INSERT INTO search_documents_fts(rowid, title, context, body) VALUES (new.id, new.title, new.context, new.body);
+    END""",
+    """CREATE TRIGGER search_documents_ad AFTER DELETE ON search_documents BEGIN
+        INSERT INTO search_documents_fts(search_documents_fts, rowid, title, context, body)
+        VALUES ('delete', old.id, old.title, old.context, old.body);
+    END""",
+    """CREATE TRIGGER search_documents_au AFTER UPDATE ON search_documents BEGIN
+        INSERT INTO search_documents_fts(search_documents_fts, rowid, title, context, body)
+        VALUES ('delete', old.id, old.title, old.context, old.body);
+        INSERT INTO search_documents_fts(rowid, title, context, body) VALUES (new.id, new.title, new.context, new.body);
+    END""",
+]
+DDL = {'postgresql': POSTGRES_DDL, 'sqlite': SQLITE_DDL}
+
+# what the DDL creates outside the models - the FTS5 table and its shadow tables, the tsvector column and index
+FTS_TABLES = {'search_documents_fts', *(f'search_documents_fts_{part}' for part in ('data', 'idx', 'content', 'docsize', 'config'))}
+TSV_COLUMN = ('search_documents', 'tsv')
+TSV_INDEX = 'ix_search_documents_tsv'
+
+
+def is_text_index_object(obj, name, type_):
+    """True for the schema objects above; used as alembic's include_object filter"""
+    if type_ == 'table':
+        return name in FTS_TABLES
+    if type_ == 'column':
+        return (obj.table.name, name) == TSV_COLUMN
+    if type_ == 'index':
+        return name == TSV_INDEX
+    return False
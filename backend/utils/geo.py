@@ -18,4 +18,19 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     distance = R * c
     # distance_in_meters = distance * 1000
     
-    return round(distance, 2) # Returns distance in km
\ No newline at end of file
+    return round(distance, 2) # Returns distance in km
+
+def calculate_distances(coords):
+    """
+    Haversine distances in meters for a batch of (lat1, lon1, lat2, lon2)
+    tuples, computed in one pass with the math lookups hoisted out of the loop.
+    """
+    R = 6371000
+    radians, sin, cos, asin, sqrt = math.radians, math.sin, math.cos, math.asin, math.sqrt
+    distances = []
+    for lat1, lon1, lat2, lon2 in coords:
+        phi1 = radians(lat1)
+        phi2 = radians(lat2)
+        a = sin(radians(lat2 - lat1) / 2) ** 2 + cos(phi1) * cos(phi2) * sin(radians(lon2 - lon1) / 2) ** 2
+        distances.append(2 * R * asin(min(1.0, sqrt(a))))
+    return distances
@@ -0,0 +1,121 @@
+"""
+Geofence helpers for VolaPlace attendance.
+Caches each shift's project geometry so check-in/check-out don't have to
+load the Shift and Project rows on every request.
+"""
+from collections import namedtuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.config import db
+from app.models import Shift, Project
+from utils.cache import cache, MISS
+from utils.polygon import prepare_polygon
+
+GEOMETRY_TTL_SECONDS = 3600
+
+ShiftGeometry = namedtuple('ShiftGeometry', [
+    'shift_id', 'shift_title', 'project_id', 'org_id',
+    'project_name', 'address', 'lat', 'lon', 'radius', 'polygon'
+])
+
+
+def _generation():
+    # Bumped on every shift/project edit - old keys simply stop being read
+    generation = cache.get('geofence:generation')
+    return 0 if generation is MISS else generation
+
+
+def get_shift_geometry(shift_id):
+    """
+    Return the cached ShiftGeometry for a shift, loading it with a single
+    joined query on a miss. Returns None if the shift or project is missing.
+    """
+    return get_shift_geometries([shift_id]).get(shift_id)
+
+
+def get_shift_geometries(shift_ids):
+    """
+    Batch version of get_shift_geometry - returns {shift_id: ShiftGeometry},
+    loading every cache miss in one IN query. Missing shifts are left out.
+    """
+    shift_ids = list(set(shift_ids))
+    if not shift_ids:
+        return {}
+
+    prefix = f'geofence:{_generation()}:shift:'
+    found = {
+        shift_id: geometry
+        for shift_id, geometry in zip(shift_ids, cache.get_many([prefix + str(i) for i in shift_ids]))
+        if geometry is not MISS
+    }
+
+    missing = [shift_id for shift_id in shift_ids if shift_id not in found]
+    if missing:
+        rows = db.session.query(
+            Shift.id, Shift.title, Project.id, Project.org_id,
+            Project.name, Project.address, Project.lat, Project.lon, Project.geofence_radius,
+            Project.geofence_polygon
+        ).join(Project, Shift.project_id == Project.id).filter(Shift.id.in_(missing)).all()
+
+        for row in rows:
+            geometry = ShiftGeometry(*row)
+            found[geometry.shift_id] = geometry
+            cache.set(prefix + str(geometry.shift_id), geometry, GEOMETRY_TTL_SECONDS)
+    return found
+
+
+def is_inside(geometry, lat, lon, distance):
+    """
+    Check a point against the project's polygon fence if it has one,
+    otherwise against the radius (distance in meters from the project point).
+    """
+    if geometry.polygon:
+        return prepare_polygon(geometry.polygon).contains(lat, lon)
+    return distance <= geometry.radius
+
+
+def outside_message(geometry):
+    if geometry.polygon:
+        return 'You need to be inside the project site boundary'
+    return f'You need to be within {geometry.radius}m of the project location'
+
+
+def invalidate_geometry():
+    """Drop every cached geometry (in all workers when the cache is shared)"""
+    cache.incr('geofence:generation')
+
+
+# Only these attributes end up in a ShiftGeometry - seat, status and funding
+# updates (every check-in, checkout and payout) leave the cache alone
+GEOMETRY_ATTRIBUTES = {
+    Shift: ('title', 'project_id'),
+    Project: ('org_id', 'name', 'address', 'lat', 'lon', 'geofence_radius', 'geofence_polygon'),
+}
+
+
+# Invalidation - note geometry edits at flush time and only invalidate once
+# the transaction has actually committed.
+@event.listens_for(Session, 'after_flush')
+def _collect_geometry_changes(session, flush_context):
+    for obj in session.deleted:
+        if type(obj) in GEOMETRY_ATTRIBUTES:
+            session.info['geofence_changed'] = True
+            return
+    for obj in session.dirty:
+        attributes = GEOMETRY_ATTRIBUTES.get(type(obj))
+        if attributes:
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in attributes):
+                session.info['geofence_changed'] = True
+                return
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_geometry_changes(session):
+    if session.info.pop('geofence_changed', False):
+        invalidate_geometry()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_geometry_changes(session):
+    session.info.pop('geofence_changed', None)
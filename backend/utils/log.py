@@ -0,0 +1,154 @@
+"""
+Structured logging for VolaPlace.
+Records are JSON objects (one per line) tagged with the request id, and are
+written by a background QueueListener thread - request handlers only put
+the record on a queue, so slow stdout/log shipping never blocks a worker.
+
+Usage:
+    import logging
+    logger = logging.getLogger('volaplace.payments')
+    logger.info('Funding successful', extra={'checkout_request_id': cid})
+
+    # hot-path debug logs - only a fraction are kept
+    logger.debug('Search served', extra={'shifts': n, 'sample_rate': 0.01})
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, request, has_request_context
+
+# Attributes every LogRecord has - anything else was passed via extra=
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'sample_rate'}
+
+# Incoming X-Request-ID values are echoed back, so only accept simple tokens
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,128}$')
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Tag records with the current request id (runs on the request thread)"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = g.get('request_id') if has_request_context() else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a record passed with extra={'sample_rate': r} with probability r"""
+
+    def filter(self, record):
+        rate = getattr(record, 'sample_rate', None)
+        return rate is None or random.random() < rate
+
+
+class RequestQueueHandler(QueueHandler):
+    """
+    QueueHandler that keeps extra fields and the traceback as separate
+    attributes instead of flattening everything into the message.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_queue = queue.SimpleQueue()
+_listener = None
+_handler = None
+
+
+def start_listener():
+    """Start the background writer thread (safe to call more than once)"""
+    global _listener
+    if _listener is None and _handler is not None:
+        _listener = QueueListener(_queue, _handler, respect_handler_level=True)
+        _listener.start()
+
+
+def stop_listener():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    # Threads don't survive fork(); gunicorn workers need their own writer
+    global _listener
+    _listener = None
+    start_listener()
+
+
+def configure_logging(level=None, fmt=None):
+    """Route all logging through the queue to a JSON (or plain text) stdout handler"""
+    global _handler
+    level = level or os.environ.get('LOG_LEVEL', 'INFO')
+    fmt = fmt or os.environ.get('LOG_FORMAT', 'json')
+
+    root = logging.getLogger()
+    if any(isinstance(h, RequestQueueHandler) for h in root.handlers):
+        return
+
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(
+        '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+
+    queue_handler = RequestQueueHandler(_queue)
+    queue_handler.addFilter(SamplingFilter())
+    queue_handler.addFilter(RequestIdFilter())
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+
+    start_listener()
+    atexit.register(stop_listener)
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def init_logging(app):
+    """Configure logging and give every request an id (X-Request-ID in and out)"""
+    configure_logging(app.config.get('LOG_LEVEL'), app.config.get('LOG_FORMAT'))
+
+    @app.before_request
+    def assign_request_id():
+        incoming = request.headers.get('X-Request-ID', '')
+        g.request_id = incoming if _REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+
+    @app.after_request
+    def echo_request_id(response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
+
+    return app
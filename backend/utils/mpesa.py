@@ -1,11 +1,23 @@
 """
 M-Pesa Integration for VolaPlace
 Handles STK Push for volunteer payments
+
+HTTP calls share one keep-alive session, always have a timeout, and the
+OAuth token is cached until shortly before it expires, so a worker thread
+(or greenlet) is only blocked for the STK Push round trip itself.
 """
+import logging
 import os
-import requests
+import threading
 import base64
 from datetime import datetime
+from utils.cache import cache, MISS
+
+logger = logging.getLogger('volaplace.mpesa')
+
+SANDBOX_BASE_URL = 'https://sandbox.safaricom.co.ke'
+# Refresh the token this many seconds before Daraja expires it
+TOKEN_EXPIRY_MARGIN = 60
 
 class MPesa:
     """M-Pesa Daraja API Integration"""
@@ -18,17 +30,50 @@ class MPesa:
         self.passkey = os.getenv('MPESA_PASSKEY', '')
         self.callback_url = os.getenv('MPESA_CALLBACK_URL', 'https://volaplace-api.onrender.com/api/payments/mpesa/callback')
         
-        # API URLs
-        self.auth_url = 'https://sandbox.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials'
-        self.stk_push_url = 'https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest'
+        # API URLs - MPESA_BASE_URL points at production or a local stub
+        self.base_url = os.getenv('MPESA_BASE_URL', SANDBOX_BASE_URL).rstrip('/')
+        self.auth_url = f'{self.base_url}/oauth/v1/generate?grant_type=client_credentials'
+        self.stk_push_url = f'{self.base_url}/mpesa/stkpush/v1/processrequest'
+        self.query_url = f'{self.base_url}/mpesa/stkpushquery/v1/query'
+        
+        # (connect, read) timeouts in seconds
+        self.timeout = (
+            float(os.getenv('MPESA_CONNECT_TIMEOUT', 5)),
+            float(os.getenv('MPESA_READ_TIMEOUT', 30))
+        )
+        self._session = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """Keep-alive HTTP session, created per process (after gunicorn forks)"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    # requests is imported on first use - it's a noticeable part of app startup
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    pool_size = int(os.getenv('MPESA_POOL_SIZE', 20))
+                    session.mount('https://', HTTPAdapter(pool_connections=2, pool_maxsize=pool_size))
+                    session.mount('http://', HTTPAdapter(pool_connections=2, pool_maxsize=pool_size))
+                    self._session = session
+        return self._session
+    
+    def _token_key(self):
+        return f'mpesa:token:{self.base_url}:{self.consumer_key}'
         
     def get_access_token(self):
-        """Get OAuth access token from M-Pesa"""
+        """Get OAuth access token from M-Pesa (cached until shortly before expiry)"""
         try:
             if not self.consumer_key or not self.consumer_secret:
-                print("ERROR: M-Pesa consumer key or secret is missing")
+                logger.error("M-Pesa consumer key or secret is missing")
                 return None
             
+            token = cache.get(self._token_key())
+            if token is not MISS:
+                return token
+            
             # Create base64 encoded credentials with explicit UTF-8 encoding
             credentials = f"{self.consumer_key}:{self.consumer_secret}"
             credentials_bytes = credentials.encode('utf-8')
@@ -38,17 +83,21 @@ class MPesa:
                 'Authorization': f'Basic {encoded_credentials}'
             }
             
-            response = requests.get(self.auth_url, headers=headers)
+            response = self.session.get(self.auth_url, headers=headers, timeout=self.timeout)
             
             if response.status_code != 200:
-                print(f"M-Pesa Auth Failed: {response.status_code} - {response.text}")
+                logger.error("M-Pesa auth failed: %s - %s", response.status_code, response.text)
                 return None
             
             result = response.json()
-            return result.get('access_token')
+            token = result.get('access_token')
+            if token:
+                expires_in = int(result.get('expires_in', 3599))
+                cache.set(self._token_key(), token, max(expires_in - TOKEN_EXPIRY_MARGIN, 1))
+            return token
             
         except Exception as e:
-            print(f"M-Pesa auth error: {str(e)}")
+            logger.exception("M-Pesa auth error: %s", e)
             return None
     
     def generate_password(self):
@@ -73,6 +122,8 @@ class MPesa:
         Returns:
             dict: Response from M-Pesa API
         """
+        from requests.exceptions import RequestException
+        
         try:
             # Get access token
             access_token = self.get_access_token()
@@ -108,13 +159,17 @@ class MPesa:
             }
             
             # Make request
-            response = requests.post(
+            response = self.session.post(
                 self.stk_push_url,
                 json=payload,
                 headers=headers,
-                timeout=30
+                timeout=self.timeout
             )
             
+            if response.status_code == 401:
+                # Token revoked early - fetch a fresh one next time
+                cache.delete(self._token_key())
+            
             result = response.json()
             
             # Check response
@@ -126,21 +181,21 @@ class MPesa:
                     'message': result.get('CustomerMessage', 'STK Push sent successfully')
                 }
             else:
-                print(f"M-Pesa STK Push failed: {result.get('errorMessage', 'Unknown error')}")
+                logger.warning("M-Pesa STK Push failed: %s", result.get('errorMessage', 'Unknown error'), extra={'error_code': result.get('errorCode')})
                 return {
                     'success': False,
                     'error': result.get('errorMessage', 'STK Push failed'),
                     'error_code': result.get('errorCode', 'N/A')
                 }
                 
-        except requests.exceptions.RequestException as e:
-            print(f"M-Pesa request error: {str(e)}")
+        except RequestException as e:
+            logger.error("M-Pesa request error: %s", e)
             return {
                 'success': False,
                 'error': f'Network error: {str(e)}'
             }
         except Exception as e:
-            print(f"M-Pesa error: {str(e)}")
+            logger.exception("M-Pesa error: %s", e)
             return {
                 'success': False,
                 'error': str(e)
@@ -175,15 +230,17 @@ class MPesa:
                 'CheckoutRequestID': checkout_request_id
             }
             
-            query_url = 'https://sandbox.safaricom.co.ke/mpesa/stkpushquery/v1/query'
-            response = requests.post(query_url, json=payload, headers=headers)
+            response = self.session.post(self.query_url, json=payload, headers=headers, timeout=self.timeout)
             
             return response.json()
             
         except Exception as e:
-            print(f"M-Pesa query error: {str(e)}")
+            logger.exception("M-Pesa query error: %s", e)
             return {'success': False, 'error': str(e)}
 
 
 # Singleton instance
 mpesa = MPesa()
+
+# Sockets must not be shared between forked gunicorn workers
+os.register_at_fork(after_in_child=lambda: setattr(mpesa, '_session', None))
@@ -0,0 +1,127 @@
+"""
+Polygon geofences for VolaPlace projects.
+Polygons are stored as encoded polylines (Google polyline format at 1e-6
+precision) and prepared once into a bounding box plus latitude-banded edge
+table, so a containment check only looks at the few edges near the point.
+"""
+from functools import lru_cache
+
+PRECISION = 1e6
+MAX_VERTICES = 500
+
+
+def encode_polyline(points):
+    """Encode [(lat, lon), ...] into a compact polyline string"""
+    result = []
+    prev_lat = prev_lon = 0
+    for lat, lon in points:
+        lat_i = int(round(lat * PRECISION))
+        lon_i = int(round(lon * PRECISION))
+        for delta in (lat_i - prev_lat, lon_i - prev_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                result.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            result.append(chr(value + 63))
+        prev_lat, prev_lon = lat_i, lon_i
+    return ''.join(result)
+
+
+def decode_polyline(encoded):
+    """Decode a polyline string back into [(lat, lon), ...]"""
+    points = []
+    index = lat = lon = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = value = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                value |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        points.append((lat / PRECISION, lon / PRECISION))
+    return points
+
+
+def validate_polygon(points):
+    """
+    Validate a polygon given as a list of [lat, lon] pairs.
+
+    Returns:
+        tuple: (points as list of float tuples, error_message)
+    """
+    if not isinstance(points, list) or len(points) < 3:
+        return None, 'polygon must be a list of at least 3 [lat, lon] points'
+    if len(points) > MAX_VERTICES:
+        return None, f'polygon can have at most {MAX_VERTICES} points'
+    try:
+        cleaned = [(float(p[0]), float(p[1])) for p in points]
+    except (TypeError, ValueError, IndexError):
+        return None, 'polygon points must be [lat, lon] pairs'
+    for lat, lon in cleaned:
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return None, 'polygon points must be valid coordinates'
+    # The ring is closed implicitly
+    if cleaned[0] == cleaned[-1]:
+        cleaned.pop()
+    if len(cleaned) < 3:
+        return None, 'polygon must have at least 3 distinct points'
+    return cleaned, None
+
+
+class PreparedPolygon:
+    """Point-in-polygon index: bounding box precheck plus edges bucketed by latitude band"""
+
+    def __init__(self, points):
+        lats = [p[0] for p in points]
+        lons = [p[1] for p in points]
+        self.min_lat, self.max_lat = min(lats), max(lats)
+        self.min_lon, self.max_lon = min(lons), max(lons)
+
+        # Each edge is kept as (lat1, lat2, lon1, dlon/dlat) for the ray cast;
+        # horizontal edges never cross a horizontal ray so they are skipped
+        edges = []
+        for i, (lat1, lon1) in enumerate(points):
+            lat2, lon2 = points[(i + 1) % len(points)]
+            if lat1 != lat2:
+                edges.append((lat1, lat2, lon1, (lon2 - lon1) / (lat2 - lat1)))
+
+        self.band_count = max(1, min(64, len(edges)))
+        self.band_height = (self.max_lat - self.min_lat) / self.band_count or 1.0
+        self.bands = [[] for _ in range(self.band_count)]
+        for edge in edges:
+            first = self._band(min(edge[0], edge[1]))
+            last = self._band(max(edge[0], edge[1]))
+            for band in range(first, last + 1):
+                self.bands[band].append(edge)
+
+    def _band(self, lat):
+        return min(self.band_count - 1, max(0, int((lat - self.min_lat) / self.band_height)))
+
+    def contains(self, lat, lon):
+        """Even-odd ray cast against the edges in the point's latitude band"""
+        if not (self.min_lat <= lat <= self.max_lat and self.min_lon <= lon <= self.max_lon):
+            return False
+        inside = False
+        for lat1, lat2, lon1, slope in self.bands[self._band(lat)]:
+            if (lat1 > lat) != (lat2 > lat) and lon < lon1 + (lat - lat1) * slope:
+                inside = not inside
+        return inside
+
+    def contains_many(self, points):
+        """Test many (lat, lon) points against the same fence"""
+        contains = self.contains
+        return [contains(lat, lon) for lat, lon in points]
+
+
+@lru_cache(maxsize=1024)
+def prepare_polygon(encoded):
+    """Build (and memoize) the containment index for an encoded polygon"""
+    return PreparedPolygon(decode_polyline(encoded))
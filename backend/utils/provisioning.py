@@ -0,0 +1,251 @@
+"""
+Bulk user provisioning (partner onboarding spreadsheets).
+A batch of users is validated as a set: email and phone uniqueness against
+the database is one query each for the whole batch (plus duplicates within
+the file), and the accepted users go in with one multi-row INSERT. Password
+hashing is the slow part (~0.1s per scrypt hash) and happens before the
+first query, so no pooled connection waits on it: the API hashes its small
+batches inline in the request thread, the CLI spreads large files over one
+process pool. Every input row gets a result: created (with its id) or the
+reason it was rejected.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import click
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import generate_password_hash
+from app.config import db
+from app.models import User
+from utils.validators import normalize_email, normalize_phone, validate_email
+
+VALID_ROLES = ('volunteer', 'org_admin', 'admin')
+COLUMNS = ('name', 'email', 'phone', 'password', 'role', 'mpesa_phone')
+# users per API call - hashed inline (~0.1s each), so a request holds its thread ~5s at most
+MAX_BULK_USERS = 50
+# users per CLI transaction
+CLI_BATCH_SIZE = 1000
+# below this, starting worker processes costs more than it saves
+MIN_POOL_BATCH = 16
+# passwords per task sent to a pool process (~1.6s of hashing)
+HASH_CHUNK_SIZE = 16
+PHONE_PATTERN = re.compile(r'^254\d{9}$')
+
+
+class ProvisioningConflict(Exception):
+    """Another request registered one of the emails/phones mid-import - nothing was created"""
+
+
+# Parsing
+def parse_records(records, default_role='volunteer'):
+    """Input rows (dicts with COLUMNS) numbered from 1; rows that aren't objects are kept to be reported"""
+    if not isinstance(records, list):
+        raise ValueError('users must be a list')
+    if not records:
+        raise ValueError('No users to provision')
+    rows = []
+    for number, record in enumerate(records, start=1):
+        record = record if isinstance(record, dict) else {}
+        row = {name: str(record.get(name) or '').strip() or None for name in COLUMNS}
+        row['row'] = number
+        row['role'] = row['role'] or default_role
+        rows.append(row)
+    return rows
+
+
+def parse_csv(text, default_role='volunteer'):
+    """Rows of a CSV whose header names some of COLUMNS; row numbers are file lines"""
+    reader = csv.DictReader(io.StringIO(text.lstrip('\ufeff')))
+    if not reader.fieldnames:
+        raise ValueError('CSV has no header row')
+    reader.fieldnames = [(name or '').strip().lower() for name in reader.fieldnames]
+    missing = {'email', 'phone', 'password'} - set(reader.fieldnames)
+    if missing:
+        raise ValueError(f'CSV is missing columns: {", ".join(sorted(missing))}')
+    records, lines = [], []
+    for record in reader:
+        if any((value or '').strip() for value in record.values() if isinstance(value, str)):
+            records.append(record)
+            lines.append(reader.line_num)
+    rows = parse_records(records, default_role)
+    for row, line in zip(rows, lines):
+        row['row'] = line
+    return rows
+
+
+# Hashing
+def hashing_pool(workers):
+    """
+    Process pool for hash_passwords() - CLI only. Its processes are spawned
+    rather than forked, so they don't inherit the parent's locks or database
+    connections; web workers are threaded, so requests hash inline instead.
+    """
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def hash_passwords(passwords, pool=None):
+    """generate_password_hash() for each password, in input order - across `pool` if given"""
+    if pool is None or len(passwords) < MIN_POOL_BATCH:
+        return [generate_password_hash(password) for password in passwords]
+    return list(pool.map(generate_password_hash, passwords, chunksize=HASH_CHUNK_SIZE))
+
+
+# Checking and inserting
+def _row_error(row, allowed_roles):
+    if not row['email'] or not row['phone'] or not row['password']:
+        missing = [name for name in ('email', 'phone', 'password') if not row[name]]
+        return f'Missing required field: {", ".join(missing)}'
+    if not validate_email(row['email']):
+        return 'Invalid email format'
+    if not PHONE_PATTERN.match(row['phone']):
+        return 'Invalid phone format. Use 254XXXXXXXXX (e.g., 254712345678)'
+    if row['mpesa_phone'] and not PHONE_PATTERN.match(row['mpesa_phone']):
+        return 'Invalid mpesa_phone format. Use 254XXXXXXXXX'
+    if row['role'] not in allowed_roles:
+        return f'Invalid role. Must be one of: {", ".join(allowed_roles)}'
+    return None
+
+
+def provision_users(rows, allowed_roles=VALID_ROLES, pool=None, dry_run=False):
+    """
+    Create the valid users of `rows` (from parse_records/parse_csv). Runs in
+    the caller's transaction - commit afterwards, or roll back on
+    ProvisioningConflict (a concurrent registration took an email/phone).
+    Passwords of well-formed rows are hashed before the session is used -
+    inline, or across a hashing_pool() if one is passed. Returns
+    (summary, results) with one {row, email, phone, status, id | error} per
+    input row.
+    """
+    for row in rows:
+        if row['email']:
+            row['email'] = normalize_email(row['email'])
+        if row['phone']:
+            row['phone'] = normalize_phone(row['phone'])
+        if row['mpesa_phone']:
+            row['mpesa_phone'] = normalize_phone(row['mpesa_phone'])
+
+    errors = [_row_error(row, allowed_roles) for row in rows]
+    if not dry_run:
+        candidates = [row for row, error in zip(rows, errors) if not error]
+        for row, password_hash in zip(candidates, hash_passwords([row['password'] for row in candidates], pool)):
+            row['password_hash'] = password_hash
+
+    emails = {row['email'] for row in rows if row['email']}
+    phones = {row['phone'] for row in rows if row['phone']}
+    email_key = func.lower(User.email)
+    taken_emails = set(db.session.scalars(select(email_key).where(email_key.in_(emails)))) if emails else set()
+    taken_phones = set(db.session.scalars(select(User.phone).where(User.phone.in_(phones)))) if phones else set()
+
+    results, accepted = [], []
+    seen_emails, seen_phones = {}, {}
+    for row, error in zip(rows, errors):
+        if not error:
+            if row['email'] in taken_emails:
+                error = 'Email already registered'
+            elif row['phone'] in taken_phones:
+                error = 'Phone number already registered to another user'
+            elif row['email'] in seen_emails:
+                error = f'Same email as row {seen_emails[row["email"]]}'
+            elif row['phone'] in seen_phones:
+                error = f'Same phone as row {seen_phones[row["phone"]]}'
+        result = {'row': row['row'], 'email': row['email'], 'phone': row['phone']}
+        if error:
+            result.update(status='error', error=error)
+        else:
+            seen_emails[row['email']] = seen_phones[row['phone']] = row['row']
+            result.update(status='created' if not dry_run else 'valid', id=None)
+            accepted.append((row, result))
+        results.append(result)
+
+    if accepted and not dry_run:
+        values = [{
+            'name': row['name'],
+            'email': row['email'],
+            'phone': row['phone'],
+            'mpesa_phone': row['mpesa_phone'] or row['phone'],
+            'role': row['role'],
+            'password_hash': row['password_hash'],
+        } for row, _ in accepted]
+        try:
+            ids = db.session.scalars(
+                insert(User).returning(User.id, sort_by_parameter_order=True), values
+            ).all()
+        except IntegrityError:
+            raise ProvisioningConflict('An email or phone in this batch was registered meanwhile - nothing was created, please retry')
+        for (_, result), user_id in zip(accepted, ids):
+            result['id'] = user_id
+
+    summary = {
+        'rows': len(rows),
+        'created': 0 if dry_run else len(accepted),
+        'failed': len(rows) - len(accepted),
+        'dry_run': dry_run,
+    }
+    return summary, results
+
+
+def init_provisioning(app):
+    """`flask provision-users FILE` creates the users of a CSV or JSON file, e.g. a partner's volunteer list"""
+    @app.cli.command('provision-users')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--role', default='volunteer', show_default=True, type=click.Choice(VALID_ROLES),
+                  help='Role for rows without one')
+    @click.option('--workers', type=int, help='Hashing processes (default: one per CPU)')
+    @click.option('--batch-size', default=CLI_BATCH_SIZE, show_default=True, help='Users per transaction')
+    @click.option('--dry-run', is_flag=True, help='Only validate')
+    @click.option('--report', type=click.Path(dir_okay=False, writable=True), help='Write per-row results as JSON')
+    def provision_users_command(path, role, workers, batch_size, dry_run, report):
+        with open(path, encoding='utf-8-sig') as f:
+            text = f.read()
+        try:
+            if path.lower().endswith('.json'):
+                data = json.loads(text)
+                rows = parse_records(data.get('users') if isinstance(data, dict) else data, role)
+            else:
+                rows = parse_csv(text, role)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='PATH')
+
+        totals = {'rows': 0, 'created': 0, 'failed': 0}
+        results = []
+        workers = workers or os.cpu_count() or 1
+        # one pool for the whole file, started only when it pays off
+        pool = hashing_pool(workers) if workers > 1 and not dry_run and len(rows) >= MIN_POOL_BATCH else None
+        try:
+            # each batch is its own transaction, so a conflict only loses that batch
+            for i in range(0, len(rows), batch_size):
+                batch = rows[i:i + batch_size]
+                try:
+                    summary, batch_results = provision_users(batch, pool=pool, dry_run=dry_run)
+                except ProvisioningConflict as e:
+                    db.session.rollback()
+                    click.echo(f'Rows {batch[0]["row"]}-{batch[-1]["row"]}: {e}', err=True)
+                    totals['rows'] += len(batch)
+                    totals['failed'] += len(batch)
+                    continue
+                if dry_run:
+                    db.session.rollback()
+                else:
+                    db.session.commit()
+                for key in totals:
+                    totals[key] += summary[key]
+                results.extend(batch_results)
+        finally:
+            if pool:
+                pool.shutdown()
+
+        for result in results:
+            if result['status'] == 'error':
+                click.echo(f'row {result["row"]}: {result["error"]}', err=True)
+        if report:
+            with open(report, 'w') as f:
+                json.dump(results, f, indent=2)
+        verb = 'Would create' if dry_run else 'Created'
+        click.echo(f'{verb} {totals["rows"] - totals["failed"]} of {totals["rows"]} users ({totals["failed"]} failed)')
+
+    return app
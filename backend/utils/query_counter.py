@@ -0,0 +1,74 @@
+"""
+Query counting for tests and benchmarks.
+Records every SQL statement sent to the database while the block runs so a
+test can assert how many queries a handler issues (catching N+1 loops) and
+which columns they select (catching list endpoints that load whole rows).
+
+Usage:
+    from utils.query_counter import assert_queries
+
+    with assert_queries(max_count=2, forbid_columns=['users.password_hash']):
+        client.get('/api/projects', headers=headers)
+
+    with count_queries() as counter:
+        ...
+    print(counter.count, counter.statements)
+"""
+import re
+from contextlib import contextmanager
+from sqlalchemy import event
+from app.config import db
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def selects(self):
+        return [s for s in self.statements if s.lstrip().upper().startswith(('SELECT', 'WITH'))]
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def selected_columns(self):
+        """Qualified table.column names found in the SELECT lists of recorded queries"""
+        columns = set()
+        for statement in self.selects():
+            select_list = re.split(r'\sFROM\s', statement, maxsplit=1, flags=re.IGNORECASE)[0]
+            columns.update(re.findall(r'"?(\w+)"?\."?(\w+)"?', select_list))
+        return {f'{table}.{column}' for table, column in columns}
+
+
+@contextmanager
+def count_queries(engine=None):
+    """Collect the statements executed on `engine` (the app's engine by default)"""
+    engine = engine or db.engine
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter._record)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter._record)
+
+
+@contextmanager
+def assert_queries(max_count=None, forbid_columns=(), engine=None):
+    """
+    Fail if the block runs more than `max_count` statements or selects any of
+    `forbid_columns` ('table.column').
+    """
+    with count_queries(engine) as counter:
+        yield counter
+
+    if max_count is not None and counter.count > max_count:
+        listing = '\n'.join(f'  {i + 1}. {s}' for i, s in enumerate(counter.statements))
+        raise AssertionError(f'Expected at most {max_count} queries, got {counter.count}:\n{listing}')
+
+    selected = counter.selected_columns()
+    loaded = sorted(c for c in forbid_columns if c in selected)
+    if loaded:
+        raise AssertionError(f'Unexpected columns selected: {", ".join(loaded)}')
@@ -0,0 +1,261 @@
+"""
+Shift recommendations for volunteers.
+Each volunteer with attendance history has a compact volunteer_profiles row:
+where they usually volunteer (centroid of the attended sites), their usual
+start time, and the projects/organizations they go back to. A volunteer's
+profile is recomputed from their latest attended shifts when their roster
+changes (after_flush), or by refresh_profiles() after bulk UPDATEs - check-out
+refreshes it, so check-in stays a single UPDATE. Serving
+a list reads one profile row, the volunteer's upcoming bookings and a few
+hundred candidate shifts from the (lat, lon) and (project_id, date) indexes -
+nothing grows with the number of volunteers.
+"""
+import math
+from collections import Counter
+from datetime import date, datetime, timedelta
+from itertools import groupby
+import click
+from sqlalchemy import delete, event, exists, func, inspect, or_, select
+from sqlalchemy.orm import Session
+from app.config import db
+from app.models import Shift, ShiftRoster, Project, VolunteerProfile
+from utils.conflict_validation import ACTIVE_SIGNUP_STATUSES, MAX_SHIFTS_PER_DAY, find_time_conflict
+from utils.geo import calculate_distance
+from utils.seats import INACTIVE_ROSTER_STATUSES
+
+# profiles summarise the most recent attended shifts
+PROFILE_HISTORY = 200
+PROFILE_TOP_N = 10
+CHUNK_SIZE = 500
+
+# candidates: upcoming shifts with places left at the nearest sites or at projects the volunteer attended
+HORIZON_DAYS = 30
+CANDIDATE_RADIUS_KM = 25
+MAX_NEARBY_PROJECTS = 200
+MAX_CANDIDATES = 500
+
+WEIGHTS = {'distance': 0.4, 'project': 0.25, 'organization': 0.1, 'time_of_day': 0.15, 'soon': 0.1}
+# distance at which the proximity score halves
+DISTANCE_SCALE_KM = 10
+# narrowest spread used for the usual start time
+TIME_SCALE_MINUTES = 90
+
+
+# Profiles
+def _attended(condition):
+    """
+    The PROFILE_HISTORY most recent attended shifts (checked in) matching
+    `condition`, per volunteer, newest first - each row carries the volunteer's
+    total in `attended`, so long histories are cut off in SQL.
+    """
+    newest_first = (Shift.date.desc(), Shift.start_time.desc(), ShiftRoster.id.desc())
+    visits = select(
+        ShiftRoster.volunteer_id, Shift.project_id, Project.org_id, Project.lat, Project.lon, Shift.start_time,
+        func.row_number().over(partition_by=ShiftRoster.volunteer_id, order_by=newest_first).label('position'),
+        func.count().over(partition_by=ShiftRoster.volunteer_id).label('attended')
+    ).join(Shift, Shift.id == ShiftRoster.shift_id)\
+        .join(Project, Project.id == Shift.project_id)\
+        .where(condition, ShiftRoster.check_in_time.isnot(None))\
+        .subquery()
+    return select(
+        visits.c.volunteer_id, visits.c.project_id, visits.c.org_id, visits.c.lat, visits.c.lon,
+        visits.c.start_time, visits.c.attended
+    ).where(visits.c.position <= PROFILE_HISTORY).order_by(visits.c.volunteer_id, visits.c.position)
+
+
+def build_profile(volunteer_id, visits):
+    """volunteer_profiles row from a volunteer's most recent attended shifts (newest first, from _attended)"""
+    starts = [v.start_time.hour * 60 + v.start_time.minute for v in visits if v.start_time]
+    mean = sum(starts) / len(starts) if starts else None
+    return {
+        'volunteer_id': volunteer_id,
+        'shifts_attended': visits[0].attended,
+        'home_lat': sum(v.lat for v in visits) / len(visits),
+        'home_lon': sum(v.lon for v in visits) / len(visits),
+        'start_minutes_mean': mean,
+        'start_minutes_std': math.sqrt(sum((s - mean) ** 2 for s in starts) / len(starts)) if starts else None,
+        'top_projects': [list(p) for p in Counter(v.project_id for v in visits).most_common(PROFILE_TOP_N)],
+        'top_organizations': [list(o) for o in Counter(v.org_id for v in visits).most_common(PROFILE_TOP_N)],
+        'updated_at': datetime.utcnow(),
+    }
+
+
+def _write_profiles(connection, rows):
+    profiles = [build_profile(volunteer_id, list(visits)) for volunteer_id, visits in groupby(rows, lambda r: r.volunteer_id)]
+    if profiles:
+        connection.execute(VolunteerProfile.__table__.insert(), profiles)
+
+
+def refresh_profiles(connection, volunteer_ids):
+    """Recompute these volunteers' profiles (volunteers with no attendance have none)"""
+    volunteer_ids = sorted(set(volunteer_ids))
+    for i in range(0, len(volunteer_ids), CHUNK_SIZE):
+        chunk = volunteer_ids[i:i + CHUNK_SIZE]
+        rows = connection.execute(_attended(ShiftRoster.volunteer_id.in_(chunk))).all()
+        connection.execute(delete(VolunteerProfile).where(VolunteerProfile.volunteer_id.in_(chunk)))
+        _write_profiles(connection, rows)
+
+
+def rebuild_profiles(connection, batch_size=5000):
+    """Recompute every profile in one pass over the roster (after bulk loads)"""
+    connection.execute(delete(VolunteerProfile))
+    rows = connection.execution_options(yield_per=batch_size).execute(_attended(ShiftRoster.volunteer_id.isnot(None)))
+    batch = []
+    for volunteer_id, visits in groupby(rows, lambda r: r.volunteer_id):
+        batch.append(build_profile(volunteer_id, list(visits)))
+        if len(batch) >= batch_size:
+            connection.execute(VolunteerProfile.__table__.insert(), batch)
+            batch = []
+    if batch:
+        connection.execute(VolunteerProfile.__table__.insert(), batch)
+    return connection.execute(select(func.count()).select_from(VolunteerProfile)).scalar()
+
+
+# roster changes that move a volunteer's attendance
+PROFILE_ATTRIBUTES = ('check_in_time', 'shift_id', 'volunteer_id')
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_changed_profiles(session, flush_context):
+    volunteer_ids = set()
+    for obj in session.new:
+        if isinstance(obj, ShiftRoster) and obj.check_in_time is not None:
+            volunteer_ids.add(obj.volunteer_id)
+    for obj in session.dirty:
+        if isinstance(obj, ShiftRoster):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in PROFILE_ATTRIBUTES):
+                volunteer_ids.add(obj.volunteer_id)
+                volunteer_ids.update(state.attrs.volunteer_id.history.deleted)
+    for obj in session.deleted:
+        if isinstance(obj, ShiftRoster) and obj.check_in_time is not None:
+            volunteer_ids.add(obj.volunteer_id)
+
+    volunteer_ids.discard(None)
+    if volunteer_ids:
+        refresh_profiles(session.connection(), volunteer_ids)
+
+
+# Serving
+def _nearby_projects(lat, lon):
+    """Ids of the closest project sites within CANDIDATE_RADIUS_KM, from the (lat, lon) index"""
+    dlat = CANDIDATE_RADIUS_KM / 111.0
+    dlon = CANDIDATE_RADIUS_KM / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+    sites = db.session.query(Project.id, Project.lat, Project.lon).filter(
+        Project.lat.between(lat - dlat, lat + dlat), Project.lon.between(lon - dlon, lon + dlon)
+    ).all()
+    # flat-earth distance is enough to order sites this close, and much cheaper than haversine
+    scale = math.cos(math.radians(lat)) ** 2
+    sites.sort(key=lambda p: (p.lat - lat) ** 2 + (p.lon - lon) ** 2 * scale)
+    return [p.id for p in sites[:MAX_NEARBY_PROJECTS]]
+
+
+def _candidates(volunteer_id, today, project_ids=None):
+    """
+    Upcoming shifts with places left that the volunteer hasn't signed up for -
+    at these projects (one (project_id, date) index range each), or the
+    soonest anywhere.
+    """
+    signed_up = exists().where(
+        ShiftRoster.shift_id == Shift.id,
+        ShiftRoster.volunteer_id == volunteer_id,
+        func.coalesce(ShiftRoster.status, '').notin_(INACTIVE_ROSTER_STATUSES)
+    )
+    query = db.session.query(
+        Shift.id, Shift.date, Shift.start_time, Shift.end_time, Shift.project_id,
+        Project.org_id, Project.lat, Project.lon
+    ).join(Project, Project.id == Shift.project_id).filter(
+        Shift.date.between(today, today + timedelta(days=HORIZON_DAYS)),
+        Shift.status == 'upcoming',
+        or_(Shift.open_seats.is_(None), Shift.open_seats > 0),
+        ~signed_up
+    )
+    if project_ids is not None:
+        query = query.filter(Shift.project_id.in_(project_ids))
+    return query.order_by(Shift.date, Shift.start_time).limit(MAX_CANDIDATES).all()
+
+
+def _bookings(volunteer_id, today):
+    """The volunteer's upcoming active sign-ups, by date"""
+    rows = db.session.query(Shift.id, Shift.date, Shift.start_time, Shift.end_time)\
+        .join(ShiftRoster, ShiftRoster.shift_id == Shift.id)\
+        .filter(
+            ShiftRoster.volunteer_id == volunteer_id,
+            ShiftRoster.status.in_(ACTIVE_SIGNUP_STATUSES),
+            Shift.date.between(today, today + timedelta(days=HORIZON_DAYS))
+        ).all()
+    booked = {}
+    for row in rows:
+        booked.setdefault(row.date, []).append(row)
+    return booked
+
+
+def recommend_shifts(volunteer_id, lat=None, lon=None, limit=20, today=None):
+    """
+    Rank open shifts for a volunteer. `lat`/`lon` (e.g. the device location)
+    override the profile's usual area. Shifts that clash with the volunteer's
+    bookings or fall on a day they are already fully booked are left out.
+    Returns [{'shift_id', 'score', 'distance_km', 'reasons'}], best first.
+    """
+    today = today or date.today()
+    profile = db.session.get(VolunteerProfile, volunteer_id)
+    if lat is None or lon is None:
+        lat, lon = (profile.home_lat, profile.home_lon) if profile else (None, None)
+    projects = dict(profile.top_projects) if profile else {}
+    organizations = dict(profile.top_organizations) if profile else {}
+
+    project_ids = set(projects)
+    if lat is not None and lon is not None:
+        project_ids.update(_nearby_projects(lat, lon))
+    # nothing to go on - the soonest open shifts
+    candidates = _candidates(volunteer_id, today, sorted(project_ids) if project_ids else None)
+
+    booked = _bookings(volunteer_id, today)
+    top_project = max(projects.values(), default=1)
+    top_organization = max(organizations.values(), default=1)
+    time_scale = max(profile.start_minutes_std or 0, TIME_SCALE_MINUTES) if profile else TIME_SCALE_MINUTES
+
+    ranked = []
+    for shift in candidates:
+        same_day = booked.get(shift.date, [])
+        if len(same_day) >= MAX_SHIFTS_PER_DAY or find_time_conflict(shift.start_time, shift.end_time, same_day):
+            continue
+
+        reasons = []
+        distance = calculate_distance(lat, lon, shift.lat, shift.lon) if lat is not None and lon is not None else None
+        score = WEIGHTS['soon'] * (1 - (shift.date - today).days / HORIZON_DAYS)
+        if distance is not None:
+            score += WEIGHTS['distance'] / (1 + distance / DISTANCE_SCALE_KM)
+            if distance <= DISTANCE_SCALE_KM:
+                reasons.append('nearby')
+        if shift.project_id in projects:
+            score += WEIGHTS['project'] * projects[shift.project_id] / top_project
+            reasons.append('attended_project')
+        if shift.org_id in organizations:
+            score += WEIGHTS['organization'] * organizations[shift.org_id] / top_organization
+            reasons.append('attended_organization')
+        if profile and profile.start_minutes_mean is not None and shift.start_time:
+            offset = (shift.start_time.hour * 60 + shift.start_time.minute - profile.start_minutes_mean) / time_scale
+            score += WEIGHTS['time_of_day'] * math.exp(-offset * offset / 2)
+            if abs(offset) <= 1:
+                reasons.append('usual_time')
+
+        ranked.append((score, shift, distance, reasons))
+
+    ranked.sort(key=lambda r: (-r[0], r[1].date, r[1].start_time, r[1].id))
+    return [
+        {'shift_id': shift.id, 'score': round(score, 4),
+         'distance_km': round(distance, 2) if distance is not None else None, 'reasons': reasons}
+        for score, shift, distance, reasons in ranked[:limit]
+    ]
+
+
+def init_recommendations(app):
+    """`flask rebuild-profiles` recomputes every volunteer profile, e.g. after a bulk import"""
+    @app.cli.command('rebuild-profiles')
+    def rebuild_profiles_command():
+        with db.engine.begin() as connection:
+            count = rebuild_profiles(connection)
+        click.echo(f'Rebuilt {count} volunteer profiles')
+
+    return app
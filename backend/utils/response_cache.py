@@ -0,0 +1,138 @@
+"""
+Response caching for read endpoints with strong ETags.
+Cached bodies are keyed by route, query string, role and scope, and are only
+reused while the version counters of the tables they depend on are unchanged.
+Versions are bumped after every commit that writes to a table, so create,
+update and delete handlers invalidate the cache without extra code.
+Bodies and versions live in utils.cache, so they are shared across workers
+when a Redis cache is configured.
+"""
+import hashlib
+from functools import wraps
+from flask import request, make_response
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from utils.cache import cache, MISS
+
+# Upper bound on an entry's life (versions normally invalidate much sooner);
+# with the per-process memory backend this also bounds cross-worker staleness
+DEFAULT_TTL_SECONDS = 30
+
+
+def table_versions(tables):
+    values = cache.get_many([f'response:version:{table}' for table in tables])
+    return tuple(0 if value is MISS else value for value in values)
+
+
+def bump_versions(tables):
+    for table in tables:
+        cache.incr(f'response:version:{table}')
+
+
+def _etag_matches(etag):
+    return etag in request.if_none_match
+
+
+def _not_modified(etag):
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def role_scope():
+    """Default scope: everyone with the same role sees the same response"""
+    return get_jwt().get('role', 'anonymous')
+
+
+def user_scope():
+    """Per-user responses (e.g. an org admin's own projects)"""
+    return f'{get_jwt().get("role")}:{get_jwt_identity()}'
+
+
+def org_admin_scope():
+    """Org admins only see their own organization's data, other roles share one entry"""
+    if get_jwt().get('role') == 'org_admin':
+        return user_scope()
+    return role_scope()
+
+
+def owner_scope():
+    """Admins share one entry, everyone else only sees what they own"""
+    if get_jwt().get('role') == 'admin':
+        return 'admin'
+    return user_scope()
+
+
+def cached_response(*tables, scope=role_scope, ttl=DEFAULT_TTL_SECONDS):
+    """
+    Cache a GET view's JSON body until one of `tables` is written to.
+    Place it below @jwt_required() so the scope can read the token; public
+    views pass a constant string scope.
+    Answers If-None-Match with 304 without running the view at all.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            scope_key = scope() if callable(scope) else scope
+            key = f'{request.path}?{request.query_string.decode()}|{scope_key}'
+            versions = table_versions(tables)
+
+            entry = cache.get(f'response:{key}')
+            if entry is not MISS and entry[0] == versions:
+                etag = entry[1]
+                if _etag_matches(etag):
+                    return _not_modified(etag)
+                response = make_response(entry[2])
+                response.mimetype = entry[3]
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+
+            response = make_response(fn(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+
+            body = response.get_data()
+            etag = hashlib.sha256(body).hexdigest()[:32]
+            cache.set(f'response:{key}', (versions, etag, body, response.mimetype), ttl)
+
+            if _etag_matches(etag):
+                return _not_modified(etag)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+# Invalidation - remember which tables a transaction wrote and bump their
+# versions once it commits (ORM flushes and bulk UPDATE/DELETE/INSERT alike).
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_tables(session, flush_context):
+    touched = session.info.setdefault('touched_tables', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__tablename__', None)
+        if table:
+            touched.add(table)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_statement_tables(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None:
+            orm_execute_state.session.info.setdefault('touched_tables', set()).add(table.name)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_committed_tables(session):
+    touched = session.info.pop('touched_tables', None)
+    if touched:
+        bump_versions(touched)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_touched_tables(session):
+    session.info.pop('touched_tables', None)
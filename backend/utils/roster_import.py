@@ -0,0 +1,248 @@
+"""
+Bulk roster import for organizations.
+A CSV or JSON list of (shift, volunteer) rows is checked and applied as one
+set instead of row by row: the shifts, the volunteers (by phone or email) and
+those volunteers' bookings on the affected dates are each read with a single
+query, then capacity, the daily limit and time conflicts are checked in
+memory with the utils.conflict_validation helpers, in file order, so an
+earlier row wins over a later one. Valid rows go in with one multi-row INSERT
+and one seat UPDATE per shift; the rest come back in a per-row error report.
+"""
+import csv
+import io
+from sqlalchemy import delete, func, insert, or_, update
+from app.config import db
+from app.models import Shift, Project, Organization, User, ShiftRoster, ShiftWaitlist
+from utils.conflict_validation import ACTIVE_SIGNUP_STATUSES, MAX_SHIFTS_PER_DAY, find_time_conflict
+from utils.seats import INACTIVE_ROSTER_STATUSES, claim_seats
+from utils.validators import normalize_email, normalize_phone
+from utils.waitlist import OPEN_SHIFT_STATUSES
+
+MAX_IMPORT_ROWS = 10000
+COLUMNS = ('shift_id', 'phone', 'email')
+
+
+class RosterImportConflict(Exception):
+    """A shift filled up between the checks and the write - nothing was imported"""
+
+
+# Parsing
+def _row(number, shift_id, phone, email, default_shift_id):
+    row = {
+        'row': number,
+        'shift_id': default_shift_id,
+        'phone': normalize_phone(phone) or None,
+        'email': normalize_email(email) or None,
+        'error': None,
+    }
+    if shift_id not in (None, ''):
+        try:
+            row['shift_id'] = int(shift_id)
+        except (TypeError, ValueError):
+            row['error'] = 'shift_id must be a number'
+    if not row['phone'] and not row['email']:
+        row['error'] = row['error'] or 'phone or email is required'
+    return row
+
+
+def _check_size(rows):
+    if not rows:
+        raise ValueError('No rows to import')
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise ValueError(f'At most {MAX_IMPORT_ROWS} rows per import')
+    return rows
+
+
+def parse_csv(text, default_shift_id=None):
+    """Rows of a CSV with a header naming shift_id, phone and/or email; row numbers are file lines"""
+    reader = csv.DictReader(io.StringIO(text.lstrip('\ufeff')))
+    if not reader.fieldnames:
+        raise ValueError('CSV has no header row')
+    reader.fieldnames = [(name or '').strip().lower() for name in reader.fieldnames]
+    if not {'phone', 'email'} & set(reader.fieldnames):
+        raise ValueError('CSV needs a phone or email column')
+    if 'shift_id' not in reader.fieldnames and default_shift_id is None:
+        raise ValueError('CSV needs a shift_id column, or pass shift_id')
+
+    rows = []
+    for record in reader:
+        if not any((value or '').strip() for value in record.values() if isinstance(value, str)):
+            continue
+        rows.append(_row(reader.line_num, (record.get('shift_id') or '').strip(), record.get('phone'),
+                         record.get('email'), default_shift_id))
+        if len(rows) > MAX_IMPORT_ROWS:
+            break
+    return _check_size(rows)
+
+
+def parse_json(records, default_shift_id=None):
+    """Rows of a JSON list of {shift_id, phone, email}; row numbers count from 1"""
+    if not isinstance(records, list):
+        raise ValueError('rows must be a list')
+    rows = []
+    for number, record in enumerate(records[:MAX_IMPORT_ROWS + 1], start=1):
+        if not isinstance(record, dict):
+            record = {}
+        rows.append(_row(number, record.get('shift_id'), record.get('phone'), record.get('email'), default_shift_id))
+    return _check_size(rows)
+
+
+# Checking and applying
+def _load_shifts(shift_ids, user):
+    """Importable shifts by id - all of them for admins, the caller's organization's otherwise"""
+    query = db.session.query(
+        Shift.id, Shift.title, Shift.date, Shift.start_time, Shift.end_time, Shift.status,
+        Shift.open_seats, Shift.is_funded, Shift.funded_amount
+    ).join(Project, Project.id == Shift.project_id).filter(Shift.id.in_(shift_ids))
+    if user.role != 'admin':
+        query = query.join(Organization, Organization.id == Project.org_id).filter(Organization.user_id == user.id)
+    return {shift.id: shift for shift in query}
+
+
+def _load_volunteers(phones, emails):
+    """(by phone, by lowercased email) for every user matching either"""
+    conditions = []
+    if phones:
+        conditions.append(User.phone.in_(phones))
+    if emails:
+        conditions.append(func.lower(User.email).in_(emails))
+    by_phone, by_email = {}, {}
+    if conditions:
+        for match in db.session.query(User.id, User.phone, func.lower(User.email).label('email'), User.role)\
+                .filter(or_(*conditions)):
+            by_phone[match.phone] = match
+            by_email[match.email] = match
+    return by_phone, by_email
+
+
+def _load_bookings(volunteer_ids, dates):
+    """
+    The volunteers' roster rows on these dates: ({(shift_id, volunteer_id): row}
+    for every status, {(volunteer_id, date): [active bookings]})
+    """
+    existing, booked = {}, {}
+    if not volunteer_ids or not dates:
+        return existing, booked
+    rows = db.session.query(
+        ShiftRoster.id.label('roster_id'), ShiftRoster.shift_id, ShiftRoster.volunteer_id, ShiftRoster.status,
+        Shift.title, Shift.date, Shift.start_time, Shift.end_time
+    ).join(Shift, Shift.id == ShiftRoster.shift_id).filter(
+        ShiftRoster.volunteer_id.in_(volunteer_ids), Shift.date.in_(dates)
+    )
+    for row in rows:
+        existing[(row.shift_id, row.volunteer_id)] = row
+        if row.status in ACTIVE_SIGNUP_STATUSES:
+            booked.setdefault((row.volunteer_id, row.date), []).append(row)
+    return existing, booked
+
+
+def _resolve(row, by_phone, by_email):
+    """(volunteer, error) for the row's phone/email"""
+    from_phone = by_phone.get(row['phone']) if row['phone'] else None
+    from_email = by_email.get(row['email']) if row['email'] else None
+    if from_phone and from_email and from_phone.id != from_email.id:
+        return None, 'phone and email belong to different users'
+    volunteer = from_phone or from_email
+    if not volunteer:
+        return None, 'No user with this phone or email'
+    if volunteer.role != 'volunteer':
+        return None, 'User is not a volunteer'
+    return volunteer, None
+
+
+def import_roster(rows, user, dry_run=False):
+    """
+    Register the volunteers of `rows` (from parse_csv/parse_json) on their
+    shifts. Runs in the caller's transaction - commit afterwards. Raises
+    RosterImportConflict if a shift filled up concurrently. Returns the report
+    and {shift_id: [volunteer ids rostered]}.
+    """
+    shifts = _load_shifts({row['shift_id'] for row in rows if row['shift_id'] is not None}, user)
+    by_phone, by_email = _load_volunteers(
+        {row['phone'] for row in rows if row['phone']}, {row['email'] for row in rows if row['email']}
+    )
+    volunteer_ids = {match.id for match in (*by_phone.values(), *by_email.values())}
+    existing, booked = _load_bookings(volunteer_ids, {shift.date for shift in shifts.values()})
+
+    seats_left = {shift.id: shift.open_seats for shift in shifts.values()}
+    accepted = {}
+    errors = []
+    for row in rows:
+        shift = shifts.get(row['shift_id'])
+        error = row['error']
+        if not error:
+            if row['shift_id'] is None:
+                error = 'shift_id is required'
+            elif not shift:
+                error = 'Shift not found'
+            elif not shift.is_funded or (shift.funded_amount or 0) <= 0:
+                error = 'Shift has not been funded yet'
+            elif shift.status not in OPEN_SHIFT_STATUSES:
+                error = 'Can only register for upcoming or in-progress shifts'
+        if not error:
+            volunteer, error = _resolve(row, by_phone, by_email)
+        if not error:
+            key = (shift.id, volunteer.id)
+            same_day = booked.setdefault((volunteer.id, shift.date), [])
+            current = existing.get(key)
+            if volunteer.id in accepted.get(shift.id, ()):
+                error = 'Duplicate of an earlier row'
+            elif current and current.status not in INACTIVE_ROSTER_STATUSES:
+                error = 'Already registered for this shift'
+            elif len(same_day) >= MAX_SHIFTS_PER_DAY:
+                error = f'Maximum {MAX_SHIFTS_PER_DAY} shifts per day reached'
+            elif seats_left[shift.id] is not None and seats_left[shift.id] <= 0:
+                error = 'Shift is full'
+            else:
+                conflict = find_time_conflict(shift.start_time, shift.end_time, same_day)
+                if conflict:
+                    error = (f'Time conflict with shift "{conflict.title}" '
+                             f'({conflict.start_time.strftime("%H:%M")} - {conflict.end_time.strftime("%H:%M")})')
+
+        if error:
+            errors.append(dict({name: row[name] for name in ('row', *COLUMNS)}, error=error))
+            continue
+        accepted.setdefault(shift.id, []).append(volunteer.id)
+        same_day.append(shift)
+        if seats_left[shift.id] is not None:
+            seats_left[shift.id] -= 1
+
+    if not dry_run and accepted:
+        _apply(accepted, existing)
+
+    report = {
+        'rows': len(rows),
+        'imported': sum(len(ids) for ids in accepted.values()),
+        'failed': len(errors),
+        'dry_run': dry_run,
+        'shifts': {shift_id: len(ids) for shift_id, ids in accepted.items()},
+        'errors': errors,
+    }
+    return report, accepted
+
+
+def _apply(accepted, existing):
+    new_rows, reactivated = [], []
+    for shift_id, volunteer_ids in accepted.items():
+        if not claim_seats(shift_id, len(volunteer_ids)):
+            raise RosterImportConflict(f'Shift {shift_id} filled up during the import - nothing was imported, please retry')
+        for volunteer_id in volunteer_ids:
+            cancelled = existing.get((shift_id, volunteer_id))
+            if cancelled:
+                reactivated.append(cancelled.roster_id)
+            else:
+                new_rows.append({'shift_id': shift_id, 'volunteer_id': volunteer_id, 'status': 'registered'})
+        # rostered now - drop any place they held in the queue
+        db.session.execute(delete(ShiftWaitlist).where(
+            ShiftWaitlist.shift_id == shift_id, ShiftWaitlist.volunteer_id.in_(volunteer_ids)
+        ))
+
+    if new_rows:
+        db.session.execute(insert(ShiftRoster), new_rows)
+    if reactivated:
+        db.session.execute(
+            update(ShiftRoster)
+            .where(ShiftRoster.id.in_(reactivated))
+            .values(status='registered')
+            .execution_options(synchronize_session=False)
+        )
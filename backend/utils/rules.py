@@ -0,0 +1,22 @@
+"""
+Payout rules lookup for VolaPlace.
+GlobalRules changes rarely but is read on every checkout, so it is cached.
+"""
+from app.config import db
+from app.models import GlobalRules
+from utils.cache import memoize
+
+DEFAULT_BASE_HOURLY_RATE = 100.0
+DEFAULT_BONUS_PER_BENEFICIARY = 10.0
+
+
+@memoize(ttl=600)
+def get_payout_rates():
+    """
+    Returns:
+        tuple: (base_hourly_rate, bonus_per_beneficiary)
+    """
+    rules = db.session.query(GlobalRules.base_hourly_rate, GlobalRules.bonus_per_beneficiary).first()
+    if not rules:
+        return DEFAULT_BASE_HOURLY_RATE, DEFAULT_BONUS_PER_BENEFICIARY
+    return rules.base_hourly_rate, rules.bonus_per_beneficiary
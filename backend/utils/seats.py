@@ -0,0 +1,75 @@
+"""
+Open-seat bookkeeping for shifts.
+shifts.open_seats is max_volunteers minus the shift's active (not cancelled)
+roster rows. It is changed with single UPDATE statements in the same
+transaction as the roster change, so search can filter on it without
+counting rows, and two volunteers racing for the last place can't both get it.
+NULL means the shift has no volunteer limit.
+"""
+from sqlalchemy import func, literal, or_, select, update
+from app.config import db
+from app.models import Shift, ShiftRoster, User
+
+INACTIVE_ROSTER_STATUSES = ('cancelled',)
+
+
+def claim_seat(shift_id):
+    """Take one place on the shift; False if it is already full"""
+    return claim_seats(shift_id, 1)
+
+
+def claim_seats(shift_id, count):
+    """Take `count` places at once (bulk rostering); False, taking none, if fewer are left"""
+    result = db.session.execute(
+        update(Shift)
+        .where(Shift.id == shift_id, or_(Shift.open_seats.is_(None), Shift.open_seats >= count))
+        .values(open_seats=Shift.open_seats - count)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def adjust_open_seats(shift_id, delta):
+    """Add `delta` places (negative to take them) without checking capacity"""
+    db.session.execute(
+        update(Shift)
+        .where(Shift.id == shift_id)
+        .values(open_seats=Shift.open_seats + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def release_seat(shift_id):
+    adjust_open_seats(shift_id, 1)
+
+
+def lock_volunteer(volunteer_id):
+    """
+    Serialize one volunteer's concurrent sign-ups (double taps) until commit.
+    A no-op UPDATE takes the row lock on Postgres and the write lock on SQLite,
+    so the duplicate checks that follow see the other request's result.
+    """
+    db.session.execute(
+        update(User)
+        .where(User.id == volunteer_id)
+        .values(profile_completed=User.profile_completed)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def active_roster_count(shift_id_column=Shift.id):
+    return select(func.count(ShiftRoster.id)).where(
+        ShiftRoster.shift_id == shift_id_column,
+        func.coalesce(ShiftRoster.status, '').notin_(INACTIVE_ROSTER_STATUSES)
+    ).scalar_subquery()
+
+
+def recounted_open_seats(max_volunteers):
+    """
+    SQL expression for a shift's open seats given its new max_volunteers, for
+    assigning to shift.open_seats when the limit changes (SET sees the old row,
+    so the new limit is passed in rather than read from the column).
+    """
+    if max_volunteers is None:
+        return None
+    return literal(int(max_volunteers)) - active_roster_count()
@@ -0,0 +1,102 @@
+"""
+Schema-driven serializers for VolaPlace list endpoints.
+A schema lists the output keys, the column each one comes from and an
+optional formatter. Queries select exactly schema.columns and rows are turned
+into dicts straight from the result tuples - no ORM objects are hydrated.
+
+Usage:
+    SHIFT_SCHEMA = Schema(
+        Field('id', Shift.id),
+        Field('date', Shift.date, iso),
+        Nested('project', Field('name', Project.name), when=Project.id),
+    )
+    rows = db.session.query(*SHIFT_SCHEMA.columns).join(...).all()
+    return jsonify(SHIFT_SCHEMA.dump(rows))
+"""
+
+
+def iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def hhmm(value):
+    return value.strftime('%H:%M') if value is not None else None
+
+
+def or_false(value):
+    return value or False
+
+
+def or_zero(value):
+    return value or 0.0
+
+
+def as_float(value):
+    return float(value) if value is not None else None
+
+
+def fallback(default):
+    """Formatter that substitutes `default` for NULL, e.g. an outer-joined name"""
+    return lambda value: default if value is None else value
+
+
+class Field:
+    def __init__(self, key, column, formatter=None):
+        self.key = key
+        self.column = column
+        self.formatter = formatter
+
+
+class Nested:
+    """A sub-object built from its own fields, or None when the `when` column is NULL"""
+
+    def __init__(self, key, *fields, when=None):
+        self.key = key
+        self.fields = fields
+        self.when = when
+
+
+class Schema:
+    def __init__(self, *fields):
+        self.fields = fields
+        self.columns = []
+        self._positions = {}
+        self._plan = self._compile(fields)
+
+    def _position(self, column):
+        # The same column can back several keys (aliases) but is selected once
+        key = id(column)
+        if key not in self._positions:
+            self._positions[key] = len(self.columns)
+            self.columns.append(column)
+        return self._positions[key]
+
+    def _compile(self, fields):
+        plan = []
+        for field in fields:
+            if isinstance(field, Nested):
+                when = self._position(field.when) if field.when is not None else None
+                plan.append((field.key, None, None, (when, self._compile(field.fields))))
+            else:
+                plan.append((field.key, self._position(field.column), field.formatter, None))
+        return plan
+
+    @staticmethod
+    def _build(plan, row):
+        obj = {}
+        for key, index, formatter, nested in plan:
+            if nested is not None:
+                when, sub_plan = nested
+                obj[key] = Schema._build(sub_plan, row) if when is None or row[when] is not None else None
+            elif formatter is None:
+                obj[key] = row[index]
+            else:
+                obj[key] = formatter(row[index])
+        return obj
+
+    def dump_one(self, row):
+        return self._build(self._plan, row)
+
+    def dump(self, rows):
+        build, plan = self._build, self._plan
+        return [build(plan, row) for row in rows]
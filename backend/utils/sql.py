@@ -0,0 +1,45 @@
+"""
+Portable SQL expressions for VolaPlace.
+We run Postgres in production and SQLite locally, so date/time arithmetic
+is compiled per dialect here instead of being repeated in the routes.
+"""
+from sqlalchemy import Float, Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+
+class hours_between(FunctionElement):
+    """Hours between two timestamps as a float (NULL if either is NULL)"""
+    type = Float()
+    name = 'hours_between'
+    inherit_cache = True
+
+
+@compiles(hours_between)
+def _hours_between_default(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return 'EXTRACT(EPOCH FROM (%s - %s)) / 3600.0' % (compiler.process(end, **kw), compiler.process(start, **kw))
+
+
+@compiles(hours_between, 'sqlite')
+def _hours_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return '((julianday(%s) - julianday(%s)) * 24.0)' % (compiler.process(end, **kw), compiler.process(start, **kw))
+
+
+class day_of_week(FunctionElement):
+    """ISO day of the week for a date: 1 = Monday ... 7 = Sunday"""
+    type = Integer()
+    name = 'day_of_week'
+    inherit_cache = True
+
+
+@compiles(day_of_week)
+def _day_of_week_default(element, compiler, **kw):
+    return 'CAST(EXTRACT(ISODOW FROM %s) AS INTEGER)' % compiler.process(list(element.clauses)[0], **kw)
+
+
+@compiles(day_of_week, 'sqlite')
+def _day_of_week_sqlite(element, compiler, **kw):
+    # strftime('%w') counts from Sunday = 0
+    return "((CAST(strftime('%%w', %s) AS INTEGER) + 6) %% 7 + 1)" % compiler.process(list(element.clauses)[0], **kw)
@@ -3,5 +3,16 @@ import re
 
 def validate_email(email):
     '''validate email format'''
-    pattern = r'^[a-za-z0-9._%+-]+@[a-za-z0-9.-]+\.[a-za-z]{2,}$'
+    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
     return bool(re.match(pattern, email))
+
+def normalize_email(email):
+    '''emails are compared and stored lower-case'''
+    return (email or '').strip().lower()
+
+def normalize_phone(phone):
+    '''254XXXXXXXXX form of a Kenyan number typed as +254 7.., 07.. or 7..'''
+    phone = re.sub(r'[\s+\-()]', '', str(phone or ''))
+    if phone and not phone.startswith('254'):
+        phone = '254' + phone.lstrip('0')
+    return phone
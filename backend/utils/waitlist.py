@@ -0,0 +1,94 @@
+"""
+Per-shift FIFO waitlist.
+Volunteers who find a shift full queue in shift_waitlist. Whenever places
+open up (a cancellation, a higher volunteer limit) promote_waitlisted()
+moves the queue forward inside the caller's transaction: each seat is taken
+with utils.seats.claim_seat() and the queue entry removed with a conditional
+DELETE, so two transactions freeing seats at once can't promote the same
+volunteer twice or overfill the shift. Volunteers who would now clash with
+another booking, or are at the daily limit, keep their place and are passed
+over.
+"""
+from sqlalchemy import delete, func, select
+from app.config import db
+from app.models import ShiftRoster, ShiftWaitlist
+from utils.conflict_validation import validate_shift_time_conflict, validate_volunteer_shift_limit
+from utils.seats import claim_seat, release_seat
+
+# queue entries read per round while promoting
+PROMOTION_BATCH = 20
+# shift statuses that still take volunteers
+OPEN_SHIFT_STATUSES = ('upcoming', 'in_progress')
+
+
+def waitlist_position(shift_id, volunteer_id):
+    """1-based place in the shift's queue, or None when not waitlisted"""
+    entry_id = db.session.query(ShiftWaitlist.id).filter_by(shift_id=shift_id, volunteer_id=volunteer_id).scalar()
+    if entry_id is None:
+        return None
+    return db.session.query(func.count(ShiftWaitlist.id)).filter(
+        ShiftWaitlist.shift_id == shift_id, ShiftWaitlist.id <= entry_id
+    ).scalar()
+
+
+def leave_waitlist(shift_id, volunteer_id):
+    """Remove the volunteer from the queue; False if they weren't on it"""
+    result = db.session.execute(
+        delete(ShiftWaitlist).where(ShiftWaitlist.shift_id == shift_id, ShiftWaitlist.volunteer_id == volunteer_id)
+    )
+    return result.rowcount == 1
+
+
+def _seat(shift, volunteer_id):
+    """Roster the volunteer, reusing the row of an earlier cancelled sign-up"""
+    entry = ShiftRoster.query.filter_by(shift_id=shift.id, volunteer_id=volunteer_id).first()
+    if entry:
+        entry.status = 'registered'
+    else:
+        entry = ShiftRoster(shift_id=shift.id, volunteer_id=volunteer_id, status='registered')
+        db.session.add(entry)
+    return entry
+
+
+def promote_waitlisted(shift):
+    """
+    Fill the shift's open places from its waitlist, oldest entry first.
+    Runs in the caller's transaction - commit afterwards. Returns the
+    promoted roster entries.
+    """
+    if shift.status not in OPEN_SHIFT_STATUSES:
+        return []
+
+    promoted = []
+    passed_over = set()
+    while True:
+        queue = db.session.execute(
+            select(ShiftWaitlist.id, ShiftWaitlist.volunteer_id)
+            .where(ShiftWaitlist.shift_id == shift.id, ShiftWaitlist.id.notin_(passed_over))
+            .order_by(ShiftWaitlist.id)
+            .limit(PROMOTION_BATCH)
+        ).all()
+        if not queue:
+            return promoted
+
+        for entry_id, volunteer_id in queue:
+            # reapply the sign-up rules - they may have booked something else since joining
+            is_valid, _ = validate_volunteer_shift_limit(volunteer_id, shift.date)
+            if is_valid:
+                is_valid, _, _ = validate_shift_time_conflict(volunteer_id, shift.date, shift.start_time, shift.end_time)
+            if not is_valid:
+                passed_over.add(entry_id)
+                continue
+
+            if not claim_seat(shift.id):
+                return promoted
+
+            taken = db.session.execute(delete(ShiftWaitlist).where(ShiftWaitlist.id == entry_id)).rowcount == 1
+            if not taken:
+                # promoted (or left) in another transaction meanwhile - give the seat back and move on
+                release_seat(shift.id)
+                passed_over.add(entry_id)
+                continue
+
+            promoted.append(_seat(shift, volunteer_id))
+            db.session.flush()
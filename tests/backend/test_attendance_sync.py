@@ -0,0 +1,96 @@
+"""
+Offline attendance sync (POST /api/attendance/sync): events are applied once
+per client_event_id, however many times the phone resends them.
+"""
+from datetime import datetime, timedelta
+import pytest
+
+SITE = (-1.2921, 36.8219)
+
+
+@pytest.fixture
+def booking(make):
+    volunteer = make.user()
+    shift = make.shift(make.project(lat=SITE[0], lon=SITE[1], geofence_radius=50), date=datetime.utcnow().date())
+    make.roster(shift, volunteer)
+    return volunteer, shift
+
+
+def event(shift, client_event_id, type='check_in', at=None, lat=SITE[0], lon=SITE[1], **extra):
+    at = at or datetime.utcnow() - timedelta(hours=2)
+    return {'client_event_id': client_event_id, 'type': type, 'shift_id': shift.id,
+            'latitude': lat, 'longitude': lon, 'timestamp': at.isoformat() + 'Z', **extra}
+
+
+def sync(client, make, volunteer, *events):
+    response = client.post('/api/attendance/sync', headers=make.headers(volunteer), json={'events': list(events)})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def roster_entry(db, shift, volunteer):
+    from app.models import ShiftRoster
+    db.session.expire_all()
+    return ShiftRoster.query.filter_by(shift_id=shift.id, volunteer_id=volunteer.id).one()
+
+
+def test_resent_batch_is_applied_once(client, make, db, booking):
+    volunteer, shift = booking
+    start = datetime.utcnow() - timedelta(hours=3)
+    batch = [event(shift, 'in-1', at=start), event(shift, 'out-1', 'check_out', at=start + timedelta(hours=2),
+                                                    beneficiaries_served=7)]
+
+    first = sync(client, make, volunteer, *batch)
+    assert (first['applied'], first['duplicates']) == (2, 0)
+    entry = roster_entry(db, shift, volunteer)
+    assert entry.status == 'completed'
+    assert entry.beneficiaries_served == 7
+    check_in, check_out = entry.check_in_time, entry.check_out_time
+
+    # the phone lost the response and sends everything again
+    second = sync(client, make, volunteer, *batch)
+    assert (second['applied'], second['duplicates']) == (0, 2)
+    assert [r['original_status'] for r in second['results']] == ['applied', 'applied']
+    entry = roster_entry(db, shift, volunteer)
+    assert (entry.check_in_time, entry.check_out_time) == (check_in, check_out)
+
+
+def test_repeats_within_a_batch_count_once(client, make, db, booking):
+    volunteer, shift = booking
+    result = sync(client, make, volunteer, event(shift, 'same'), event(shift, 'same'))
+    assert [r['status'] for r in result['results']] == ['applied', 'duplicate']
+
+
+def test_rejected_events_stay_rejected_on_retry(client, make, db, booking):
+    from app.models import AttendanceSyncEvent
+    volunteer, shift = booking
+    far_away = event(shift, 'far', lat=SITE[0] + 0.01)
+
+    first = sync(client, make, volunteer, far_away)
+    assert first['results'][0]['status'] == 'rejected'
+    assert 'geofence' in first['results'][0]['error']
+
+    second = sync(client, make, volunteer, far_away)
+    assert second['results'][0] == {'client_event_id': 'far', 'status': 'duplicate', 'original_status': 'rejected',
+                                    'error': first['results'][0]['error']}
+    assert roster_entry(db, shift, volunteer).check_in_time is None
+    assert AttendanceSyncEvent.query.count() == 1
+
+
+def test_event_ids_are_per_volunteer(client, make, db, booking):
+    volunteer, shift = booking
+    other = make.user()
+    make.roster(shift, other)
+    sync(client, make, volunteer, event(shift, 'shared-id'))
+    result = sync(client, make, other, event(shift, 'shared-id'))
+    assert result['applied'] == 1
+    assert roster_entry(db, shift, other).status == 'checked_in'
+
+
+def test_cancelled_sign_up_is_not_checked_in(client, make, db, booking):
+    volunteer, shift = booking
+    entry = roster_entry(db, shift, volunteer)
+    entry.status = 'cancelled'
+    db.session.commit()
+    result = sync(client, make, volunteer, event(shift, 'late'))
+    assert result['results'][0]['error'] == 'You are not registered for this shift'
@@ -0,0 +1,47 @@
+"""
+Email normalisation (utils.validators.normalize_email, User.by_email): emails
+are stored trimmed and lower-cased, looked up case-insensitively, and kept
+unique by the lower(email) index.
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+REGISTRATION = {'name': 'Jane', 'email': ' Jane.Doe@Example.COM ', 'password': 'pw', 'phone': '254711111111',
+                'role': 'volunteer'}
+
+
+def test_register_stores_the_normalised_email(client):
+    response = client.post('/api/auth/register', json=REGISTRATION)
+    assert response.status_code == 201
+    assert response.get_json()['user']['email'] == 'jane.doe@example.com'
+
+    response = client.post('/api/auth/register', json={**REGISTRATION, 'email': 'JANE.doe@example.com',
+                                                       'phone': '254711111112'})
+    assert response.status_code == 409
+
+
+@pytest.mark.parametrize('email', ['jane.doe@example.com', 'JANE.DOE@EXAMPLE.COM', ' Jane.Doe@example.com '])
+def test_login_ignores_case_and_spaces(client, email):
+    client.post('/api/auth/register', json=REGISTRATION)
+    assert client.post('/api/auth/login', json={'email': email, 'password': 'pw'}).status_code == 200
+    assert client.post('/api/auth/login', json={'email': email, 'password': 'nope'}).status_code == 401
+
+
+def test_model_normalises_and_looks_up(make):
+    from app.models import User
+    user = make.user(email='  Mixed@Example.Org')
+    assert user.email == 'mixed@example.org'
+    assert User.by_email('MIXED@example.org ').id == user.id
+    assert User.by_email('other@example.org') is None
+
+
+def test_index_rejects_case_duplicates(make, db):
+    make.user(email='taken@example.com')
+    with pytest.raises(IntegrityError):
+        # bypasses the model's normalisation
+        db.session.execute(text(
+            "INSERT INTO users (name, email, password_hash, role, phone) "
+            "VALUES ('x', 'TAKEN@example.com', 'h', 'volunteer', '254799999999')"
+        ))
+    db.session.rollback()
@@ -0,0 +1,36 @@
+"""
+In-process cache backend (utils/cache.py MemoryCache): bounded for entries
+and locks alike, while counters survive any amount of eviction.
+"""
+from utils.cache import MISS, MemoryCache
+
+
+def test_counters_are_never_evicted():
+    backend = MemoryCache(max_entries=3)
+    assert backend.incr('response:version:shifts') == 1
+    assert backend.incr('response:version:shifts') == 2
+    for i in range(10):
+        backend.set(f'entry:{i}', i)
+
+    assert backend.get('response:version:shifts') == 2
+    assert backend.get_many(['response:version:shifts', 'entry:9']) == [2, 9]
+    assert backend.incr('response:version:shifts') == 3
+
+
+def test_add_is_bounded_like_set():
+    backend = MemoryCache(max_entries=3)
+    for i in range(10):
+        assert backend.add(f'memo:{i}:lock', 1, 10)
+    assert len(backend._data) == 3
+    assert backend.get('memo:0:lock') is MISS
+    assert not backend.add('memo:9:lock', 1, 10)
+
+
+def test_set_and_delete_replace_a_counter():
+    backend = MemoryCache()
+    backend.incr('key')
+    backend.set('key', 'value')
+    assert backend.get('key') == 'value'
+    backend.incr('other')
+    backend.delete('other')
+    assert backend.get('other') is MISS
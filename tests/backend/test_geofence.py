@@ -0,0 +1,49 @@
+"""
+Project geofence endpoints (routes/projects.py): PUT /geofence changes only
+what it is sent, and /geofence/contains bounds its batch.
+"""
+import pytest
+from routes.projects import MAX_CONTAINS_POINTS
+
+SQUARE = [[-1.0, 36.0], [-1.0, 36.1], [-1.1, 36.1], [-1.1, 36.0]]
+
+
+@pytest.fixture
+def fenced(make, client):
+    owner = make.user('org_admin')
+    project = make.project(make.organization(owner), lat=-1.05, lon=36.05)
+    response = client.put(f'/api/projects/{project.id}/geofence', headers=make.headers(owner), json={'polygon': SQUARE})
+    assert response.status_code == 200
+    return owner, project
+
+
+def put_geofence(client, make, owner, project, body):
+    return client.put(f'/api/projects/{project.id}/geofence', headers=make.headers(owner), json=body)
+
+
+def test_radius_update_keeps_the_polygon(client, make, fenced):
+    owner, project = fenced
+    response = put_geofence(client, make, owner, project, {'geofence_radius': 150})
+    assert response.status_code == 200
+    assert response.get_json()['geofence_radius'] == 150
+    assert len(response.get_json()['points']) == 4
+
+    response = put_geofence(client, make, owner, project, {'polygon': None})
+    assert response.get_json()['geofence_polygon'] is None
+
+
+@pytest.mark.parametrize('radius', ['wide', 0, -5, None, True])
+def test_bad_radius_is_rejected(client, make, fenced, radius):
+    owner, project = fenced
+    response = put_geofence(client, make, owner, project, {'geofence_radius': radius})
+    assert response.status_code == 400
+
+
+def test_contains_caps_the_batch(client, make, fenced):
+    owner, project = fenced
+    url = f'/api/projects/{project.id}/geofence/contains'
+    response = client.post(url, headers=make.headers(owner), json={'points': [[-1.05, 36.05], [-2.0, 36.05]]})
+    assert response.status_code == 200
+
+    response = client.post(url, headers=make.headers(owner), json={'points': [[-1.05, 36.05]] * (MAX_CONTAINS_POINTS + 1)})
+    assert response.status_code == 400
@@ -0,0 +1,46 @@
+"""
+Shift geometry cache (utils/geofence.py): invalidated by edits to what it
+caches, not by the seat, status and funding updates of every check-in and
+payout.
+"""
+from utils.geofence import _generation, get_shift_geometry
+
+
+def test_funding_and_status_updates_keep_the_cache(make, db):
+    shift = make.shift()
+    get_shift_geometry(shift.id)
+    generation = _generation()
+
+    shift.funded_amount = 1234
+    shift.status = 'in_progress'
+    shift.open_seats = 0
+    db.session.commit()
+    project = shift.project
+    project.description = 'Longer description'
+    db.session.commit()
+
+    assert _generation() == generation
+
+
+def test_geometry_edits_invalidate(make, db):
+    shift = make.shift()
+    project = shift.project
+    generation = _generation()
+
+    project.geofence_radius = 75
+    db.session.commit()
+    assert _generation() == generation + 1
+    assert get_shift_geometry(shift.id).radius == 75
+
+    shift.title = 'Renamed'
+    db.session.commit()
+    assert get_shift_geometry(shift.id).shift_title == 'Renamed'
+
+
+def test_rolled_back_edit_keeps_the_cache(make, db):
+    shift = make.shift()
+    generation = _generation()
+    shift.project.lat = 0.5
+    db.session.flush()
+    db.session.rollback()
+    assert _generation() == generation
@@ -0,0 +1,41 @@
+"""
+Request instrumentation (middleware/instrumentation.py): slow-request logs
+keep query strings (and the ?jwt= tokens they can carry) out, and /metrics
+is closed unless a scrape token is configured or the app runs in debug/testing.
+"""
+import logging
+import pytest
+
+
+@pytest.fixture
+def every_request_slow(monkeypatch):
+    # read when the app is created - request this before `client`
+    monkeypatch.setenv('SLOW_REQUEST_MS', '0')
+
+
+def test_slow_request_log_leaves_out_the_query_string(every_request_slow, client, caplog):
+    with caplog.at_level(logging.WARNING, logger='volaplace.requests'):
+        client.get('/metrics?jwt=secret-token')
+
+    slow = [r.getMessage() for r in caplog.records if r.getMessage().startswith('Slow request')]
+    assert slow and 'GET /metrics ->' in slow[0]
+    assert 'secret-token' not in ' '.join(slow)
+
+
+def test_metrics_without_a_token_only_serve_debug_and_testing(app, client):
+    assert client.get('/metrics').status_code == 200
+
+    app.config['TESTING'] = False
+    response = client.get('/metrics')
+    assert response.status_code == 403
+    assert 'METRICS_TOKEN' in response.get_json()['error']
+
+
+def test_metrics_token_is_required_when_set(monkeypatch, tmp_path):
+    monkeypatch.setenv('DATABASE_URL', f'sqlite:///{tmp_path / "test.db"}')
+    monkeypatch.setenv('METRICS_TOKEN', 'scrape')
+    from app import create_app
+    client = create_app().test_client()
+
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer scrape'}).status_code == 200
@@ -0,0 +1,32 @@
+"""
+orjson provider (app/json_provider.py) against Flask's default provider:
+identical bytes for ASCII responses, same decoded value otherwise.
+"""
+import json
+from datetime import date, datetime
+import pytest
+from flask.json.provider import DefaultJSONProvider
+from app.json_provider import OrjsonProvider, orjson
+
+pytestmark = pytest.mark.skipif(orjson is None, reason='orjson not installed')
+
+PAYLOAD = {'title': 'Tree planting', 'id': 3, 'ratio': 0.1, 'date': date(2026, 1, 20),
+           'at': datetime(2026, 1, 20, 8, 30), 'tags': [None, True], 'nested': {'b': 1, 'a': 2}}
+
+
+def bodies(app, payload):
+    with app.test_request_context():
+        return (OrjsonProvider(app).response(payload).get_data(),
+                DefaultJSONProvider(app).response(payload).get_data())
+
+
+def test_ascii_output_matches_flask(app):
+    fast, default = bodies(app, PAYLOAD)
+    assert fast == default
+
+
+def test_non_ascii_is_raw_utf8(app):
+    fast, default = bodies(app, {'name': 'Nyeri Café'})
+    assert 'Café'.encode() in fast
+    assert b'\\u00e9' in default
+    assert json.loads(fast) == json.loads(default)
@@ -0,0 +1,31 @@
+"""
+Live roster streams (routes/live.py): the snapshot counts only active
+sign-ups, and a process refuses streams beyond its limit.
+"""
+import json
+import routes.live as live
+
+
+def test_snapshot_leaves_out_cancelled_sign_ups(client, make):
+    owner = make.user('org_admin')
+    shift = make.shift(make.project(make.organization(owner)))
+    make.roster(shift, make.user())
+    make.roster(shift, make.user(), status='checked_in')
+    make.roster(shift, make.user(), status='cancelled')
+
+    response = client.get(f'/api/live/shifts/{shift.id}/stream', headers=make.headers(owner))
+    frames = response.response
+    assert next(frames) == b'retry: 3000\n\n'
+    snapshot = json.loads(next(frames).decode().split('data: ', 1)[1])
+    response.close()
+    assert snapshot['total_volunteers'] == 2
+    assert snapshot['status_counts']['cancelled'] == 1
+
+
+def test_streams_beyond_the_limit_get_503(client, make, monkeypatch):
+    monkeypatch.setattr(live, 'MAX_STREAMS', 0)
+    owner = make.user('org_admin')
+    organization = make.organization(owner)
+    response = client.get(f'/api/live/organizations/{organization.id}/stream', headers=make.headers(owner))
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '30'
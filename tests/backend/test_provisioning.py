@@ -0,0 +1,43 @@
+"""
+Bulk provisioning (POST /api/auth/register/bulk, utils/provisioning.py): the
+API hashes its (capped) batches inline - no worker processes inside a web
+worker - and before the first query, so no pooled connection waits on it.
+"""
+from sqlalchemy import event
+import utils.provisioning as provisioning
+
+
+def test_bulk_register_creates_users(client, make, db):
+    from app.models import User
+    users = [{'name': f'V{i}', 'email': f'V{i}@Example.com', 'phone': f'07120000{i:02d}', 'password': f'pw{i}'}
+             for i in range(3)]
+
+    response = client.post('/api/auth/register/bulk', headers=make.headers(make.user('admin')), json={'users': users})
+    assert response.status_code == 200
+    assert response.get_json()['created'] == 3
+    created = User.by_email('v2@example.com')
+    assert created.phone == '254712000002' and created.check_password('pw2')
+
+
+def test_bulk_register_caps_the_batch(client, make):
+    users = [{}] * (provisioning.MAX_BULK_USERS + 1)
+    response = client.post('/api/auth/register/bulk', headers=make.headers(make.user('admin')), json={'users': users})
+    assert response.status_code == 400
+    assert 'flask provision-users' in response.get_json()['error']
+
+
+def test_passwords_are_hashed_before_the_first_query(app, db, monkeypatch):
+    calls = []
+    hash_passwords = provisioning.hash_passwords
+    monkeypatch.setattr(provisioning, 'hash_passwords', lambda *a: calls.append('hash') or hash_passwords(*a))
+    on_query = lambda *a: calls.append('sql')
+    event.listen(db.engine, 'before_cursor_execute', on_query)
+    try:
+        rows = provisioning.parse_records([{'email': 'a@example.com', 'phone': '254712000001', 'password': 'pw'}])
+        summary, _ = provisioning.provision_users(rows)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', on_query)
+    db.session.commit()
+
+    assert summary['created'] == 1
+    assert calls[0] == 'hash' and 'sql' in calls
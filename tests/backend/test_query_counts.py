@@ -0,0 +1,82 @@
+"""
+Query budgets for the list endpoints that were rewritten as column-projected
+joins. Each is exercised with several rows, so a per-row lookup (N+1) shows
+up as a higher count, and must not select password hashes or long text.
+"""
+from datetime import date, datetime
+import pytest
+from utils.query_counter import assert_queries, count_queries
+
+ROWS = 4
+WIDE_COLUMNS = ['users.password_hash', 'projects.description', 'shifts.description']
+
+
+@pytest.fixture
+def payouts(make, db):
+    """ROWS volunteers with a checked-out, unpaid shift and a pending transaction each"""
+    from app.models import TransactionLog
+    organization = make.organization()
+    project = make.project(organization)
+    for i in range(ROWS):
+        volunteer = make.user()
+        shift = make.shift(project, title=f'Shift {i}', date=date(2026, 1, 10 + i))
+        entry = make.roster(shift, volunteer, status='pending_payment', is_paid=False, payout_amount=100,
+                            check_in_time=datetime(2026, 1, 10 + i, 8), check_out_time=datetime(2026, 1, 10 + i, 12))
+        db.session.add(TransactionLog(volunteer_id=volunteer.id, shift_roster_id=entry.id, amount=100,
+                                      status='pending', phone=volunteer.phone))
+    db.session.commit()
+    return organization
+
+
+def test_admin_transactions(client, make, payouts):
+    headers = make.headers(make.user('admin'))
+    # role check, count, page
+    with assert_queries(max_count=3, forbid_columns=WIDE_COLUMNS):
+        response = client.get('/api/admin/transactions', headers=headers)
+    assert response.status_code == 200
+    assert len(response.get_json()['transactions']) == ROWS
+
+
+def test_admin_pending_payments(client, make, payouts):
+    headers = make.headers(make.user('admin'))
+    # role check, roster joined to volunteer and shift
+    with assert_queries(max_count=2, forbid_columns=WIDE_COLUMNS):
+        response = client.get('/api/admin/pending-payments', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['total'] == ROWS
+
+
+def test_attendance_report(client, make, payouts):
+    headers = make.headers(payouts.user)
+    # organization, per-shift stats, rows
+    with assert_queries(max_count=3, forbid_columns=WIDE_COLUMNS):
+        response = client.get('/api/attendance/report?start_date=2026-01-01&end_date=2026-12-31', headers=headers)
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['totals']['shifts'] == ROWS
+    assert all(len(shift['attendance']) == 1 for shift in report['shifts'])
+
+
+def test_organizations(client, make):
+    for _ in range(ROWS):
+        make.organization(description='x' * 1000)
+    headers = make.headers(make.user('admin'))
+    with assert_queries(max_count=1, forbid_columns=WIDE_COLUMNS + ['organizations.description']):
+        response = client.get('/api/organizations', headers=headers)
+    assert response.status_code == 200
+    assert len(response.get_json()) == ROWS
+
+
+def test_assert_queries_reports_overruns(app, make):
+    from app.models import User
+    make.user()
+    with pytest.raises(AssertionError, match='at most 1 queries, got 2'):
+        with assert_queries(max_count=1):
+            User.query.all()
+            User.query.all()
+    with pytest.raises(AssertionError, match='users.password_hash'):
+        with assert_queries(forbid_columns=['users.password_hash']):
+            User.query.all()
+    with count_queries() as counter:
+        User.query.with_entities(User.id).all()
+    assert counter.count == 1
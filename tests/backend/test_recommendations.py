@@ -0,0 +1,46 @@
+"""
+Volunteer profiles behind the recommendations (utils/recommendations.py):
+check-in stays a single UPDATE, check-out records the attendance, and only
+the most recent PROFILE_HISTORY shifts are read back.
+"""
+from datetime import date, datetime, timedelta
+import utils.recommendations as recommendations
+
+SITE = (-1.2921, 36.8219)
+
+
+def profile(db, volunteer):
+    from app.models import VolunteerProfile
+    db.session.expire_all()
+    return db.session.get(VolunteerProfile, volunteer.id)
+
+
+def test_profile_is_refreshed_on_check_out_not_check_in(client, make, db):
+    volunteer = make.user()
+    shift = make.shift(make.project(lat=SITE[0], lon=SITE[1], geofence_radius=50), date=date.today())
+    make.roster(shift, volunteer)
+    position = {'shift_id': shift.id, 'latitude': SITE[0], 'longitude': SITE[1]}
+
+    response = client.post('/api/attendance/check-in', headers=make.headers(volunteer), json=position)
+    assert response.status_code == 200
+    assert profile(db, volunteer) is None
+
+    response = client.post('/api/attendance/check-out', headers=make.headers(volunteer), json=position)
+    assert response.status_code == 200
+    assert profile(db, volunteer).shifts_attended == 1
+
+
+def test_history_is_capped_in_sql_but_counted_in_full(make, db, monkeypatch):
+    monkeypatch.setattr(recommendations, 'PROFILE_HISTORY', 2)
+    volunteer = make.user()
+    old, recent = make.project(), make.project()
+    for days_ago, project in ((30, old), (20, recent), (10, recent)):
+        shift = make.shift(project, date=date.today() - timedelta(days=days_ago), status='completed')
+        make.roster(shift, volunteer, status='completed', check_in_time=datetime.utcnow() - timedelta(days=days_ago))
+
+    rows = db.session.execute(recommendations._attended(recommendations.ShiftRoster.volunteer_id == volunteer.id)).all()
+    assert len(rows) == 2 and {row.project_id for row in rows} == {recent.id}
+
+    saved = profile(db, volunteer)
+    assert saved.shifts_attended == 3
+    assert saved.top_projects == [[recent.id, 2]]
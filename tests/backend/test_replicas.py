@@ -0,0 +1,21 @@
+"""
+Read-replica routing (app/replicas.py): the read-your-writes markers need a
+cache every worker shares, so without CACHE_URL reads stay on the primary.
+"""
+import logging
+from flask import Flask
+from app.replicas import init_replicas
+from utils.cache import cache, MemoryCache
+
+
+def test_replica_routing_needs_a_shared_cache(monkeypatch, caplog):
+    # a bare app - binds on the shared `db` would outlive this test
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_BINDS'] = {'replica_0': {'url': 'sqlite://'}}
+    monkeypatch.setattr(cache, 'backend', MemoryCache())
+
+    with caplog.at_level(logging.WARNING, logger='volaplace.db'):
+        init_replicas(app)
+
+    assert any('CACHE_URL' in r.getMessage() for r in caplog.records)
+    assert not app.before_request_funcs.get(None)
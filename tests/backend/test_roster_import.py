@@ -0,0 +1,107 @@
+"""
+Bulk roster import (POST /api/shifts/roster-import, utils/roster_import.py):
+valid rows are rostered in one go, every other row comes back with its
+reason, and capacity / daily limit / time conflicts hold across the file.
+"""
+from datetime import time
+import pytest
+
+
+@pytest.fixture
+def owner(make):
+    return make.user('org_admin')
+
+
+@pytest.fixture
+def organization(make, owner):
+    return make.organization(owner)
+
+
+def import_csv(client, make, user, text, **params):
+    return client.post('/api/shifts/roster-import', headers=make.headers(user), query_string=params,
+                       data=text, content_type='text/csv')
+
+
+def roster(db, shift):
+    from app.models import ShiftRoster
+    db.session.expire_all()
+    return {(entry.volunteer_id, entry.status) for entry in ShiftRoster.query.filter_by(shift_id=shift.id)}
+
+
+def errors(report):
+    return {error['row']: error['error'] for error in report['errors']}
+
+
+def test_csv_import_reports_each_row(client, make, db, owner, organization):
+    from app.models import ShiftWaitlist
+    shift = make.shift(make.project(organization))
+    by_phone, by_email, queued = make.user(), make.user(email='mixed.case@example.com'), make.user()
+    db.session.add(ShiftWaitlist(shift_id=shift.id, volunteer_id=queued.id))
+    db.session.commit()
+    text = (
+        'phone,email\n'
+        f'0{by_phone.phone[3:]},\n'          # line 2 - local format
+        ',Mixed.Case@Example.com\n'          # line 3
+        '254711111111,\n'                    # line 4 - unknown
+        f'{by_phone.phone},\n'               # line 5 - repeat of line 2
+        f'{owner.phone},\n'                  # line 6 - not a volunteer
+        f'{queued.phone},\n'                 # line 7
+    )
+
+    response = import_csv(client, make, owner, text, shift_id=shift.id)
+    assert response.status_code == 200
+    report = response.get_json()
+    assert (report['imported'], report['failed']) == (3, 3)
+    assert errors(report) == {4: 'No user with this phone or email', 5: 'Duplicate of an earlier row',
+                              6: 'User is not a volunteer'}
+    assert roster(db, shift) == {(v.id, 'registered') for v in (by_phone, by_email, queued)}
+    assert db.session.get(type(shift), shift.id).open_seats == 2
+    assert ShiftWaitlist.query.count() == 0
+
+
+def test_capacity_daily_limit_and_clashes_hold_across_rows(client, make, db, owner, organization):
+    project = make.project(organization)
+    small = make.shift(project, max_volunteers=1)
+    later = make.shift(project, date=small.date, start_time=time(13), end_time=time(15))
+    clashing = make.shift(project, date=small.date, start_time=time(9), end_time=time(11))
+    first, second = make.user(), make.user()
+    rows = [
+        {'shift_id': small.id, 'phone': first.phone},
+        {'shift_id': small.id, 'phone': second.phone},     # no place left
+        {'shift_id': later.id, 'phone': first.phone},
+        {'shift_id': clashing.id, 'phone': first.phone},   # overlaps row 1
+    ]
+
+    response = client.post('/api/shifts/roster-import', headers=make.headers(owner), json={'rows': rows})
+    report = response.get_json()
+    assert report['shifts'] == {str(small.id): 1, str(later.id): 1}
+    assert errors(report)[2] == 'Shift is full'
+    assert errors(report)[4].startswith('Time conflict with shift')
+
+
+def test_cancelled_sign_up_is_reactivated(client, make, db, owner, organization):
+    shift = make.shift(make.project(organization), max_volunteers=2, open_seats=2)
+    volunteer = make.user()
+    make.roster(shift, volunteer, status='cancelled')
+
+    report = import_csv(client, make, owner, f'shift_id,phone\n{shift.id},{volunteer.phone}\n').get_json()
+    assert report['imported'] == 1
+    assert roster(db, shift) == {(volunteer.id, 'registered')}
+    assert db.session.get(type(shift), shift.id).open_seats == 1
+
+
+def test_dry_run_and_other_organizations_shifts(client, make, db, owner, organization):
+    own = make.shift(make.project(organization))
+    other = make.shift()
+    volunteer = make.user()
+    text = f'shift_id,phone\n{own.id},{volunteer.phone}\n{other.id},{volunteer.phone}\n'
+
+    report = import_csv(client, make, owner, text, dry_run='true').get_json()
+    assert (report['imported'], report['dry_run']) == (1, True)
+    assert errors(report) == {3: 'Shift not found'}
+    assert roster(db, own) == set()
+
+
+def test_bad_requests(client, make, owner, organization):
+    assert import_csv(client, make, owner, 'name\nx\n', shift_id=1).status_code == 400
+    assert import_csv(client, make, make.user(), 'phone\n254700000000\n', shift_id=1).status_code == 403
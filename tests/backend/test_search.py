@@ -0,0 +1,39 @@
+"""
+Search (routes/search.py, utils/fulltext_ddl.py). Radius searches apply the
+circle, the closest-first order and the page in SQL.
+"""
+
+
+def test_radius_search_pages_closest_first(make, client):
+    organization = make.organization()
+    # ~1.1 km apart going north from the search point, the last one outside 5 km
+    shifts = [make.shift(make.project(organization, name=f'Site {i}', lat=-1.30 + 0.01 * i, lon=36.8))
+              for i in (3, 0, 6, 1)]
+
+    response = client.get('/api/shifts?lat=-1.30&log=36.8&radius_km=5&limit=2')
+    assert response.status_code == 200
+    assert [s['id'] for s in response.get_json()] == [shifts[1].id, shifts[3].id]
+
+    response = client.get('/api/shifts?lat=-1.30&log=36.8&radius_km=5&limit=2&offset=2')
+    page = response.get_json()
+    assert [s['id'] for s in page] == [shifts[0].id]
+    assert 3.3 < page[0]['distance_km'] < 3.4
+
+
+def test_radius_limits_text_search_in_sql(make, client):
+    organization = make.organization()
+    near = make.project(organization, name='Beach cleanup north', lat=-4.04, lon=39.67)
+    make.project(organization, name='Beach cleanup south', lat=-4.50, lon=39.67)
+
+    response = client.get('/api/search?q=beach&type=project&lat=-4.04&log=39.67&radius_km=10&limit=1')
+    assert response.status_code == 200
+    assert [hit['id'] for hit in response.get_json()] == [near.id]
+
+
+def test_text_index_tables_are_left_out_of_autogenerate(db):
+    from sqlalchemy import inspect
+    from utils.fulltext_ddl import is_text_index_object
+
+    extra = set(inspect(db.engine).get_table_names()) - set(db.metadata.tables)
+    assert extra and all(is_text_index_object(None, name, 'table') for name in extra)
+    assert not is_text_index_object(None, 'search_documents', 'table')
@@ -0,0 +1,92 @@
+"""
+Seats and the waitlist (utils/seats.py, utils/waitlist.py): places are taken
+with a conditional UPDATE, a full shift queues volunteers, and a cancellation
+hands the place to the oldest waitlisted volunteer who can still take it.
+"""
+from datetime import time
+import pytest
+
+
+@pytest.fixture
+def full_shift(make, client):
+    """A one-place shift, taken"""
+    shift = make.shift(max_volunteers=1)
+    holder = make.user()
+    assert register(client, make, shift, holder).status_code == 201
+    return shift, holder
+
+
+def register(client, make, shift, volunteer, **body):
+    return client.post(f'/api/shifts/{shift.id}/register', headers=make.headers(volunteer), json=body)
+
+
+def status(db, shift, volunteer):
+    from app.models import ShiftRoster
+    db.session.expire_all()
+    entry = ShiftRoster.query.filter_by(shift_id=shift.id, volunteer_id=volunteer.id).first()
+    return entry.status if entry else None
+
+
+def open_seats(db, shift):
+    db.session.expire_all()
+    return db.session.get(type(shift), shift.id).open_seats
+
+
+def test_claim_seats_takes_all_or_nothing(make, db):
+    from utils.seats import claim_seat, claim_seats
+    shift = make.shift(max_volunteers=2)
+
+    assert not claim_seats(shift.id, 3)
+    assert claim_seats(shift.id, 2)
+    assert not claim_seat(shift.id)
+    db.session.commit()
+    assert open_seats(db, shift) == 0
+
+
+def test_roster_status_defaults_to_registered(make, db):
+    from app.models import ShiftRoster
+    entry = ShiftRoster(shift_id=make.shift().id, volunteer_id=make.user().id)
+    db.session.add(entry)
+    db.session.commit()
+    assert entry.status == 'registered'
+
+
+def test_full_shift_queues_volunteers_in_order(client, make, db, full_shift):
+    shift, _ = full_shift
+    first, second, opted_out = make.user(), make.user(), make.user()
+
+    assert register(client, make, shift, first).get_json()['waitlist_position'] == 1
+    response = register(client, make, shift, second)
+    assert response.status_code == 202 and response.get_json()['waitlist_position'] == 2
+    assert register(client, make, shift, opted_out, waitlist=False).status_code == 400
+    assert open_seats(db, shift) == 0 and status(db, shift, first) is None
+
+
+def test_cancellation_promotes_the_oldest_waitlisted(client, make, db, full_shift):
+    shift, holder = full_shift
+    first, second = make.user(), make.user()
+    register(client, make, shift, first)
+    register(client, make, shift, second)
+
+    response = client.post(f'/api/shifts/{shift.id}/cancel', headers=make.headers(holder))
+    assert response.get_json()['promoted_from_waitlist'] == 1
+    assert (status(db, shift, holder), status(db, shift, first), status(db, shift, second)) == \
+        ('cancelled', 'registered', None)
+    assert open_seats(db, shift) == 0
+
+    response = client.get(f'/api/shifts/{shift.id}/waitlist', headers=make.headers(second))
+    assert response.get_json()['your_position'] == 1
+
+
+def test_promotion_passes_over_a_clashing_volunteer(client, make, db, full_shift):
+    shift, holder = full_shift
+    busy, free = make.user(), make.user()
+    register(client, make, shift, busy)
+    register(client, make, shift, free)
+    # busy books an overlapping shift while queued
+    make.roster(make.shift(date=shift.date, start_time=time(9), end_time=time(11)), busy)
+
+    client.post(f'/api/shifts/{shift.id}/cancel', headers=make.headers(holder))
+    assert (status(db, shift, busy), status(db, shift, free)) == (None, 'registered')
+    response = client.get(f'/api/shifts/{shift.id}/waitlist', headers=make.headers(busy))
+    assert response.get_json()['your_position'] == 1